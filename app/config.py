@@ -11,4 +11,65 @@ DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_PORT = os.getenv("DB_PORT", "5432")
 
+# Database connection behaviour
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))  # seconds
+# Connections idle for longer than this are validated before use (e.g. after a Lambda freeze)
+DB_HEALTHCHECK_INTERVAL = float(os.getenv("DB_HEALTHCHECK_INTERVAL", "30"))  # seconds
+DB_POOL_MIN_CONN = int(os.getenv("DB_POOL_MIN_CONN", "1"))
+DB_POOL_MAX_CONN = int(os.getenv("DB_POOL_MAX_CONN", "5"))
+# How long a thread waits for a free pooled connection before failing
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds
+# Pool of the asyncio backend (app/services/async_database.py)
+DB_ASYNC_POOL_MIN_CONN = int(os.getenv("DB_ASYNC_POOL_MIN_CONN", "0"))
+DB_ASYNC_POOL_MAX_CONN = int(os.getenv("DB_ASYNC_POOL_MAX_CONN", "10"))
+# Statements sent per round trip by the asyncio backend's execute_batch
+DB_PIPELINE_DEPTH = int(os.getenv("DB_PIPELINE_DEPTH", "100"))
 
+
+# Importer state (watermarks, checkpoints)
+# "postgres" or "file"; defaults to postgres when a database is configured
+STATE_BACKEND = os.getenv("STATE_BACKEND", "postgres" if DB_NAME else "file")
+STATE_TABLE = os.getenv("STATE_TABLE", "importer_state")
+STATE_FILE_PATH = os.getenv("STATE_FILE_PATH", ".importer_state.json")
+
+
+# Work queue of planner/worker (fan-out) runs
+# "postgres" or "file"; defaults to postgres when a database is configured
+WORK_QUEUE_BACKEND = os.getenv("WORK_QUEUE_BACKEND", "postgres" if DB_NAME else "file")
+WORK_QUEUE_TABLE = os.getenv("WORK_QUEUE_TABLE", "work_queue")
+WORK_QUEUE_FILE_PATH = os.getenv("WORK_QUEUE_FILE_PATH", ".work_queue.json")
+# Claimed partitions not finished within this time go to another worker (longer than the Lambda timeout)
+WORK_QUEUE_LEASE = float(os.getenv("WORK_QUEUE_LEASE", "960"))  # seconds
+# Attempts per partition before it is marked as failed
+WORK_QUEUE_MAX_ATTEMPTS = int(os.getenv("WORK_QUEUE_MAX_ATTEMPTS", "3"))
+
+
+# Conditional-request cache of HTTP sources (importer config "http_cache": "file" or "postgres")
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", "/tmp/http_cache")
+HTTP_CACHE_TABLE = os.getenv("HTTP_CACHE_TABLE", "http_cache")
+HTTP_CACHE_TTL = float(os.getenv("HTTP_CACHE_TTL", "86400"))  # seconds
+HTTP_CACHE_MAX_MB = float(os.getenv("HTTP_CACHE_MAX_MB", "100"))
+
+
+# Orchestration of several importers per invocation
+# Comma-separated registry names run when the event does not select importers
+IMPORTERS = [name.strip() for name in os.getenv("IMPORTERS", "intaker").split(",") if name.strip()]
+IMPORT_CONCURRENCY = int(os.getenv("IMPORT_CONCURRENCY", "4"))
+# Importers are not started when less than this much Lambda time is left
+IMPORT_TIME_MARGIN_MS = int(os.getenv("IMPORT_TIME_MARGIN_MS", "30000"))
+
+
+# Checkpointing of long imports
+# Minimum time between two checkpoints of a streaming import
+CHECKPOINT_INTERVAL = float(os.getenv("CHECKPOINT_INTERVAL", "30"))  # seconds
+# Resumable importers stop this long (plus the duration of a chunk) before their deadline
+IMPORT_STOP_MARGIN = float(os.getenv("IMPORT_STOP_MARGIN", "10"))  # seconds
+
+
+# Metrics
+# CloudWatch namespace of the import metrics (defaults to the app identifier)
+METRICS_NAMESPACE = os.getenv("METRICS_NAMESPACE", os.getenv("APP_IDENT", "DataImporter"))
+# Write Embedded Metric Format log lines per importer run (default: only in AWS Lambda)
+EMIT_METRICS = os.getenv(
+    "EMIT_METRICS", "true" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "false"
+).lower() in ("1", "true", "yes")
@@ -3,38 +3,60 @@ AWS Lambda handler for data import.
 
 This is the entry point for the Lambda function. It orchestrates the data import process.
 """
-from app.logger_config import get_logger
-from app.services.intaker_importer import IntakerImporter
+from app.config import IMPORT_CONCURRENCY
+from app.logger_config import flush_logs, get_logger
+from app.services.database import db_manager
+from app.services.fanout import run_fanout
+from app.services.orchestrator import Orchestrator, jobs_from_event
+# Importing an importer module registers it; add your importers here
+import app.services.google_ads_importer  # noqa: F401
+import app.services.intaker_importer  # noqa: F401
 
 logger = get_logger(__name__)
 
 
-def process():
+def process(event=None, context=None):
     """
     Main processing function that runs the data import.
     
     This function:
-    1. Initializes the importer
-    2. Runs the import process
-    3. Returns the result
+    1. Selects the importers to run from the event (see app/services/orchestrator.py)
+    2. Runs them in parallel, within the remaining Lambda time
+    3. Returns the aggregated per-importer result
+    
+    If importers stopped before the end of the invocation, result["continuation"]
+    is the event that continues them from their checkpoints (None otherwise).
+    
+    Events with "fanout" run the planner ("plan") or a worker ("work") of a
+    fan-out import instead (see app/services/fanout.py).
     
     Customize this function to use different importers or add additional logic.
+    
+    Args:
+        event: Lambda event, e.g. {"importers": ["intaker"], "concurrency": 2}
+        context: Lambda context (None when run locally: no time limit)
     """
     try:
-        # Initialize the importer with optional configuration
-        config = {
-            # Add your configuration here
-            # "table_name": "your_table",
-            # "api_url": "https://api.example.com",
-            # etc.
-        }
-
-        importer = IntakerImporter(config=config)
-        print(importer)
-        # Run the import process
-        result = importer.run()
+        event = event if isinstance(event, dict) else {}
+        jobs = jobs_from_event(event)
+        remaining_ms = getattr(context, "get_remaining_time_in_millis", None)
+        if event.get("fanout"):
+            result = run_fanout(event, remaining_ms)
+            if result["continuation"]:
+                result["continuation"] = {**event, "importers": result["continuation"]}
+            logger.info(f"Fan-out {event['fanout']} completed: {result['status']} {result['summary']}")
+            return result
+        
+        orchestrator = Orchestrator(
+            concurrency=int(event.get("concurrency", IMPORT_CONCURRENCY)),
+            remaining_ms=remaining_ms
+        )
+        result = orchestrator.run(jobs)
+        if result["continuation"]:
+            result["continuation"] = {**event, "importers": result["continuation"]}
 
-        logger.info(f"Import process completed: {result}")
+        logger.info(f"Import process completed: {result['status']} {result['summary']}")
+        logger.info(f"Database timings: {db_manager.get_timings()}")
         return result
 
     except Exception as e:
@@ -58,20 +80,27 @@ def lambda_handler(event, context):
         context: Lambda context object
         
     Returns:
-        Response dictionary with status code and body
+        Response dictionary with status code and body; body["continuation"]
+        is the event for the next invocation when the import is not finished
     """
     logger.info("Lambda function invoked")
     logger.info(f"Event: {event}")
 
     try:
         # Run the import process
-        result = process()
+        result = process(event, context)
+
+        message = "Data import completed successfully"
+        if result["continuation"]:
+            message = "Data import stopped at a checkpoint, invoke again with the continuation event"
+            logger.info(message)
 
         return {
             "statusCode": 200,
             "body": {
-                "message": "Data import completed successfully",
-                "result": result
+                "message": message,
+                "result": result,
+                "continuation": result["continuation"]
             }
         }
 
@@ -84,3 +113,6 @@ def lambda_handler(event, context):
                 "error": str(e)
             }
         }
+    finally:
+        # Async log records and suppressed-message counts must be out before Lambda freezes the process
+        flush_logs()
@@ -0,0 +1,130 @@
+"""
+Run the Lambda handler locally until the import is complete.
+
+Each invocation gets a time budget like a Lambda timeout; when importers
+stop at a checkpoint, the handler's continuation event is invoked again,
+just like a Step Functions loop or a re-queued event would in AWS.
+
+Usage:
+    python -m app.local_runner --importers intaker --budget 900
+    python -m app.local_runner --module examples.example_csv_importer \\
+        --event '{"importers": [{"name": "csv", "config": {"file_path": "big.csv"}}]}'
+
+With --workers the jobs are planned as a fan-out import and their partitions
+are imported by that many local worker processes (see app/services/fanout.py):
+    python -m app.local_runner --module examples.example_csv_importer --workers 4 \\
+        --event '{"importers": [{"name": "csv", "config": {"file_path": "big.csv"}}]}'
+"""
+import argparse
+import importlib
+import json
+import time
+from typing import Any, Dict, List, Optional
+from app.lambda_handler import lambda_handler
+from app.services.fanout import plan, run_workers
+from app.services.orchestrator import jobs_from_event
+from app.services.work_queue import get_work_queue
+from app.logger_config import get_logger
+
+logger = get_logger(__name__)
+
+# Default time budget per invocation, like the Lambda timeout (APP_TIMEOUT)
+DEFAULT_BUDGET_S = 900
+
+
+class LocalContext:
+    """Minimal stand-in for the Lambda context, with a time budget."""
+    
+    def __init__(self, budget_s: float):
+        self.deadline = time.monotonic() + budget_s
+    
+    def get_remaining_time_in_millis(self) -> int:
+        return max(0, int((self.deadline - time.monotonic()) * 1000))
+
+
+def run_until_complete(
+    event: Dict[str, Any],
+    budget_s: float = DEFAULT_BUDGET_S,
+    max_invocations: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Invoke the handler, following continuation events.
+    
+    Args:
+        event: Event of the first invocation
+        budget_s: Time budget of every invocation in seconds
+        max_invocations: Stop after this many invocations (None for no limit)
+    
+    Returns:
+        Handler responses, one per invocation
+    """
+    responses = []
+    while True:
+        response = lambda_handler(event, LocalContext(budget_s))
+        responses.append(response)
+        continuation = response["body"].get("continuation")
+        if response["statusCode"] != 200 or not continuation:
+            break
+        if max_invocations is not None and len(responses) >= max_invocations:
+            logger.warning(f"Stopping after {len(responses)} invocations, the import is not finished")
+            break
+        logger.info(f"Invocation {len(responses)} stopped at a checkpoint, continuing")
+        event = continuation
+    return responses
+
+
+def run_fanout_locally(
+    event: Dict[str, Any],
+    workers: int,
+    modules: List[str],
+    budget_s: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Plan the event's jobs and import their partitions with local worker processes.
+    
+    Args:
+        event: Event selecting the jobs, as for a normal run
+        workers: Number of worker processes
+        modules: Modules registering importers, imported in every worker
+        budget_s: Time budget of every worker in seconds (None: until the queue is empty)
+    
+    Returns:
+        Dictionary with the "plan" result and the "workers" results
+    """
+    queue = get_work_queue()
+    jobs = jobs_from_event(event)
+    planned = plan(jobs, queue)
+    names = [name for name, result in planned["results"].items() if result["status"] == "success"]
+    return {"plan": planned, "workers": run_workers(names, workers, queue, modules, budget_s)}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run the import locally until it is complete.")
+    parser.add_argument("--event", default="{}", help="JSON event of the first invocation")
+    parser.add_argument("--importers", help="Comma-separated importer names (overrides the event)")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_S, help="Seconds per invocation")
+    parser.add_argument("--max-invocations", type=int, help="Maximum number of invocations")
+    parser.add_argument(
+        "--module", action="append", default=[], help="Module registering importers (repeatable)"
+    )
+    parser.add_argument("--workers", type=int, help="Fan out over this many local worker processes")
+    args = parser.parse_args(argv)
+    
+    for module in args.module:
+        importlib.import_module(module)
+    event = json.loads(args.event)
+    if args.importers:
+        event["importers"] = [name.strip() for name in args.importers.split(",") if name.strip()]
+    
+    if args.workers:
+        result = run_fanout_locally(event, args.workers, args.module)
+        print(json.dumps(result, indent=2, default=str))
+        return
+    
+    responses = run_until_complete(event, args.budget, args.max_invocations)
+    print(json.dumps(responses[-1]["body"], indent=2, default=str))
+    print(f"{len(responses)} invocation(s)")
+
+
+if __name__ == "__main__":
+    main()
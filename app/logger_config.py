@@ -1,34 +1,186 @@
+import atexit
+import copy
+import json
 import logging
 import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Dict, List, Optional
+
+
+def _env_flag(name: str, default: str = "false") -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
 
 # Logger name
 LOG_NAME = os.getenv("APP_LOGGER_NAME", "intaker_data_importer")
 
+# Minimum level logged (DEBUG, INFO, WARNING, ...)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG").upper()
+
 # Create base logger
 logger = logging.getLogger(LOG_NAME)
-logger.setLevel(logging.DEBUG)
+logger.setLevel(LOG_LEVEL)
 
 # Log format with ISO-like timestamp including milliseconds
 LOG_FORMAT = "%(asctime)s.%(msecs)03d - %(filename)s - %(funcName)s - %(levelname)s - %(message)s"
 DATE_FORMAT = "%Y-%m-%dT%H:%M:%S"
 
-# Formatter
-formatter = logging.Formatter(fmt=LOG_FORMAT, datefmt=DATE_FORMAT)
+# One JSON object per line instead of LOG_FORMAT (for CloudWatch Logs Insights etc.)
+LOG_JSON = _env_flag("LOG_JSON")
+
+# Hand records to a background thread instead of writing them in the logging thread
+LOG_ASYNC = _env_flag("LOG_ASYNC")
+
+# Rate limiting of messages logged with ``extra=rate_limited(key)`` (per-record errors):
+# at most LOG_RATE_LIMIT messages per key and LOG_RATE_WINDOW seconds (0 = no limit),
+# then only every LOG_SAMPLE_EVERY-th one (0 = none) until the window ends
+LOG_RATE_LIMIT = int(os.getenv("LOG_RATE_LIMIT", "10"))
+LOG_RATE_WINDOW = float(os.getenv("LOG_RATE_WINDOW", "60"))
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", "0"))
+
+# LogRecord attribute holding the rate limit key
+RATE_LIMIT_KEY = "rate_limit_key"
+
+# LogRecord attribute holding a rate limit filter's decision, so a record
+# passing several handlers with the same filter is counted once
+_RATE_LIMIT_DECISION = "_rate_limit_decision"
+
+# Attributes every LogRecord has; anything else was passed with ``extra``
+_RECORD_ATTRIBUTES = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime"}
+
+
+def rate_limited(key: str) -> Dict[str, str]:
+    """
+    ``extra`` for a message that may be logged very often, e.g. once per bad record.
+    
+    Usage:
+        logger.error("Error transforming record %s: %s", position, error, extra=rate_limited("transform_error"))
+    """
+    return {RATE_LIMIT_KEY: key}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, including ``extra`` fields."""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        document = {
+            "timestamp": f"{self.formatTime(record, DATE_FORMAT)}.{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "file": record.filename,
+            "function": record.funcName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            document["exception"] = record.exc_text
+        for name, value in record.__dict__.items():
+            if name not in _RECORD_ATTRIBUTES and name not in document and not name.startswith("_"):
+                document[name] = value
+        return json.dumps(document, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Drops messages of the same rate limit key beyond a limit per time window.
+    
+    Messages without a key always pass. The first message let through after
+    some were dropped says how many were suppressed; ``summarize`` logs the
+    counts not reported yet (e.g. at the end of an invocation). The filter
+    can be added to several handlers: each record is counted once.
+    
+    Args:
+        limit: Messages per key and window (0 or less: no limit)
+        window: Window length in seconds
+        sample_every: Past the limit, still let every n-th message through (0: none)
+        clock: Time source in seconds
+    """
+    
+    def __init__(self, limit: int, window: float, sample_every: int = 0, clock: Callable[[], float] = time.monotonic):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.sample_every = sample_every
+        self.clock = clock
+        # key -> [window start, messages in window, suppressed since last reported]
+        self._keys: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, RATE_LIMIT_KEY, None)
+        if key is None or self.limit <= 0:
+            return True
+        decision = getattr(record, _RATE_LIMIT_DECISION, None)
+        if decision is not None and decision[0] is self:
+            return decision[1]
+        passed = self._count(record, key)
+        setattr(record, _RATE_LIMIT_DECISION, (self, passed))
+        return passed
+    
+    def _count(self, record: logging.LogRecord, key: str) -> bool:
+        """Count a record against its key's limit; False if it is dropped."""
+        now = self.clock()
+        with self._lock:
+            state = self._keys.get(key)
+            if state is None:
+                state = self._keys[key] = [now, 0, 0]
+            elif now - state[0] >= self.window:
+                state[0], state[1] = now, 0
+            state[1] += 1
+            over = state[1] - self.limit
+            if over > 0 and not (self.sample_every and over % self.sample_every == 0):
+                state[2] += 1
+                return False
+            suppressed, state[2] = state[2], 0
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed} similar messages suppressed)"
+            record.args = None
+            record.suppressed = suppressed
+        return True
+    
+    def summarize(self, target: logging.Logger):
+        """Log and reset the suppressed counts not reported yet."""
+        with self._lock:
+            counts = {key: state[2] for key, state in self._keys.items() if state[2]}
+            for key in counts:
+                self._keys[key][2] = 0
+        for key, count in counts.items():
+            target.warning("Suppressed %d '%s' log messages", count, key)
+
+
+class _QueueHandler(QueueHandler):
+    """Queue handler keeping the traceback apart from the message, for JsonFormatter."""
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments now: they may change or not be picklable later
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+formatter = JsonFormatter() if LOG_JSON else logging.Formatter(fmt=LOG_FORMAT, datefmt=DATE_FORMAT)
+rate_limit_filter = RateLimitFilter(LOG_RATE_LIMIT, LOG_RATE_WINDOW, LOG_SAMPLE_EVERY)
 
 # Console handler
 console_handler = logging.StreamHandler()
 console_handler.setLevel(logging.DEBUG)
 console_handler.setFormatter(formatter)
-
-# Prevent duplicate handlers
-if not logger.handlers:
-    logger.addHandler(console_handler)
+handlers = [console_handler]
 
 # Optional file handler
 LOG_TO_FILE = os.getenv("LOG_TO_FILE", "false").lower() in ("1", "true", "yes")
 LOG_FILE_PATH = os.getenv("LOG_FILE_PATH", "app.log")
 
 # In AWS Lambda, /var/task is read-only → use /tmp
+file_error = None
 if LOG_TO_FILE:
     if os.getenv("AWS_LAMBDA_FUNCTION_NAME") and not LOG_FILE_PATH.startswith("/tmp/"):
         LOG_FILE_PATH = "/tmp/app.log"
@@ -36,9 +188,32 @@ if LOG_TO_FILE:
         file_handler = logging.FileHandler(LOG_FILE_PATH)
         file_handler.setLevel(logging.DEBUG)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
     except Exception as e:
-        logger.warning(f"File logging disabled due to error opening {LOG_FILE_PATH}: {e}")
+        file_error = e
+
+# Async mode: the queue handler only merges the message and enqueues it;
+# the listener thread formats and writes it
+log_queue: Optional[queue.Queue] = None
+listener: Optional[QueueListener] = None
+
+# Prevent duplicate handlers
+if not logger.handlers:
+    if LOG_ASYNC:
+        log_queue = queue.Queue(-1)
+        queue_handler = _QueueHandler(log_queue)
+        queue_handler.addFilter(rate_limit_filter)
+        logger.addHandler(queue_handler)
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+    else:
+        for handler in handlers:
+            handler.addFilter(rate_limit_filter)
+            logger.addHandler(handler)
+
+if file_error is not None:
+    logger.warning(f"File logging disabled due to error opening {LOG_FILE_PATH}: {file_error}")
 
 # Avoid duplicate logs from root logger
 logger.propagate = False
@@ -50,3 +225,17 @@ def get_logger(name: str):
     Usage: logger = get_logger(__name__)
     """
     return logger.getChild(name)
+
+
+def flush_logs():
+    """
+    Log the suppressed message counts and wait until queued records are written.
+    
+    Call before the process may be frozen or exit, e.g. at the end of a Lambda
+    invocation, so async log records are not lost or delayed.
+    """
+    rate_limit_filter.summarize(logger)
+    if log_queue is not None:
+        log_queue.join()
+    for handler in handlers:
+        handler.flush()
@@ -4,15 +4,43 @@ Services module for data import operations.
 This module contains:
 - BaseImporter: Base class for all data importers
 - DatabaseManager: Database connection management
+- HttpClient: Pooled HTTP client with retries and rate limiting
+- StateStore: Persistent importer state (watermarks)
+- register_importer / Orchestrator: Importer registry and parallel runs per invocation
+- WorkQueue / Worker: Fan-out imports over many invocations
+- GoogleAdsReportImporter: Google Ads reports, sharded by account and date range
 - IntakerImporter: Example importer implementation
 """
 from app.services.base_importer import BaseImporter
 from app.services.database import DatabaseManager, db_manager
+from app.services.http_client import HttpClient, TokenBucket
+from app.services.state_store import FileStateStore, PostgresStateStore, StateStore, get_state_store
+from app.services.registry import get_importer, register_importer
+from app.services.orchestrator import ImportJob, Orchestrator
+from app.services.work_queue import FileWorkQueue, PostgresWorkQueue, WorkQueue, get_work_queue
+from app.services.fanout import Worker
+from app.services.google_ads_importer import GoogleAdsReportImporter
 from app.services.intaker_importer import IntakerImporter
 
 __all__ = [
     "BaseImporter",
     "DatabaseManager",
     "db_manager",
+    "HttpClient",
+    "TokenBucket",
+    "StateStore",
+    "PostgresStateStore",
+    "FileStateStore",
+    "get_state_store",
+    "register_importer",
+    "get_importer",
+    "ImportJob",
+    "Orchestrator",
+    "WorkQueue",
+    "PostgresWorkQueue",
+    "FileWorkQueue",
+    "get_work_queue",
+    "Worker",
+    "GoogleAdsReportImporter",
     "IntakerImporter",
 ]
@@ -0,0 +1,490 @@
+"""
+Asyncio database backend.
+
+``AsyncDatabaseManager`` offers the ``DatabaseManager`` query and bulk-write
+methods as coroutines, on psycopg2's non-blocking connections driven by the
+event loop, so one thread can keep many statements in flight. It needs no
+extra dependency. Async connections are in autocommit mode: a single
+statement costs one round trip (no separate COMMIT), and multi-statement
+work runs in ``transaction()``.
+
+Sync code (e.g. importer threads) runs coroutines with ``run_async`` on a
+shared background event loop, which also owns the ``async_db_manager`` pool.
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from itertools import islice
+from typing import Any, Awaitable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+import psycopg2
+from psycopg2 import extensions, pool, sql
+from psycopg2.extras import RealDictCursor
+
+from app.config import (
+    DB_HOST, DB_NAME, DB_USER, DB_PASSWORD, DB_PORT,
+    DB_CONNECT_TIMEOUT, DB_HEALTHCHECK_INTERVAL, DB_POOL_TIMEOUT,
+    DB_ASYNC_POOL_MIN_CONN, DB_ASYNC_POOL_MAX_CONN, DB_PIPELINE_DEPTH,
+)
+from app.logger_config import get_logger
+from app.services.database import DEFAULT_PAGE_SIZE, DatabaseManager, _record_db, db_manager, table_identifier
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+async def wait_ready(conn):
+    """
+    Wait until an async connection finished its current operation.
+    
+    Raises the psycopg2 error of the operation if it failed.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            return
+        if state == extensions.POLL_READ:
+            add, remove = loop.add_reader, loop.remove_reader
+        elif state == extensions.POLL_WRITE:
+            add, remove = loop.add_writer, loop.remove_writer
+        else:
+            raise psycopg2.OperationalError(f"Unexpected connection poll state: {state}")
+        ready = loop.create_future()
+        fd = conn.fileno()
+        add(fd, lambda: ready.done() or ready.set_result(None))
+        try:
+            await ready
+        finally:
+            remove(fd)
+
+
+class AsyncDatabaseManager:
+    """
+    Asyncio connection pool with the ``DatabaseManager`` methods as coroutines.
+    
+    Connections are opened on demand up to ``max_conn``; ``get_connection()``
+    waits up to ``pool_timeout`` seconds for a free one. Like the sync pool,
+    connections idle longer than ``healthcheck_interval`` are probed before
+    use. The pool belongs to the event loop that first used it; call
+    ``close_pool()`` before using it from another loop.
+    
+    Usage:
+        rows = await async_db_manager.execute_query("SELECT * FROM imported_data WHERE id = %s", (1,))
+        await async_db_manager.upsert_many("imported_data", columns, rows)
+    
+    Or from sync code:
+        run_async(async_db_manager.execute_update("DELETE FROM imported_data"))
+    """
+    
+    def __init__(
+        self,
+        min_conn: int = DB_ASYNC_POOL_MIN_CONN,
+        max_conn: int = DB_ASYNC_POOL_MAX_CONN,
+        pool_timeout: float = DB_POOL_TIMEOUT,
+        healthcheck_interval: float = DB_HEALTHCHECK_INTERVAL,
+        pipeline_depth: int = DB_PIPELINE_DEPTH,
+        sync_manager: DatabaseManager = db_manager,
+    ):
+        """
+        Initialize the manager; no connection is opened until first use.
+        
+        Args:
+            min_conn: Connections opened when the pool is first used
+            max_conn: Maximum number of open connections
+            pool_timeout: Seconds to wait for a free connection when all are in use
+            healthcheck_interval: Idle seconds after which a connection is probed before use
+            pipeline_depth: Statements sent per round trip by ``execute_batch``
+            sync_manager: Sync manager used for COPY, which async connections do not support
+        """
+        self.min_conn = min_conn
+        self.max_conn = max_conn
+        self.pool_timeout = pool_timeout
+        self.healthcheck_interval = healthcheck_interval
+        self.pipeline_depth = pipeline_depth
+        self.sync_manager = sync_manager
+        self._idle: Deque[Tuple[Any, float]] = deque()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    async def _connect(self):
+        """Open a new async connection."""
+        conn = psycopg2.connect(
+            host=DB_HOST,
+            database=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            port=DB_PORT,
+            connect_timeout=DB_CONNECT_TIMEOUT,
+            keepalives=1,
+            async_=True,
+        )
+        try:
+            await wait_ready(conn)
+        except Exception:
+            conn.close()
+            raise
+        return conn
+    
+    async def _start(self):
+        """Bind the pool to the running loop and open ``min_conn`` connections."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._loop is not None:
+            raise RuntimeError("AsyncDatabaseManager is bound to another event loop; call close_pool() first")
+        self._loop = loop
+        self._slots = asyncio.Semaphore(self.max_conn)
+        started = time.perf_counter()
+        connections = await asyncio.gather(*(self._connect() for _ in range(self.min_conn)))
+        self._idle.extend((conn, time.monotonic()) for conn in connections)
+        logger.info(
+            f"Async database pool started with {self.min_conn} connections in "
+            f"{round((time.perf_counter() - started) * 1000, 2)} ms"
+        )
+    
+    async def _is_healthy(self, conn, last_used: float) -> bool:
+        """Check an idle connection, probing it with ``SELECT 1`` if it was idle long."""
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.healthcheck_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+                await wait_ready(conn)
+            return True
+        except psycopg2.Error as e:
+            logger.warning(f"Discarding stale database connection: {str(e)}")
+            conn.close()
+            return False
+    
+    async def _checkout(self):
+        """Take a healthy idle connection, or open a new one."""
+        while self._idle:
+            conn, last_used = self._idle.pop()
+            if await self._is_healthy(conn, last_used):
+                return conn
+        return await self._connect()
+    
+    @asynccontextmanager
+    async def get_connection(self):
+        """
+        Get an async connection from the pool (autocommit mode).
+        
+        Usage:
+            async with async_db_manager.get_connection() as conn:
+                rows = await async_db_manager.fetch(conn, "SELECT * FROM table")
+        """
+        await self._start()
+        waiting = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.pool_timeout)
+        except asyncio.TimeoutError:
+            raise pool.PoolError(f"No database connection available within {self.pool_timeout}s") from None
+        try:
+            conn = await self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+        _record_db("checkouts")
+        _record_db("checkout_wait_ms", (time.perf_counter() - waiting) * 1000)
+        try:
+            yield conn
+        except Exception as e:
+            logger.error(f"Database error: {str(e)}")
+            raise
+        finally:
+            # Connections left busy or inside a transaction are not reused
+            if conn.closed or conn.isexecuting() or conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                conn.close()
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._slots.release()
+    
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        Get a pooled connection inside a transaction, committed when the block succeeds.
+        
+        Usage:
+            async with async_db_manager.transaction() as conn:
+                await async_db_manager.execute(conn, "DELETE FROM a WHERE id = %s", (1,))
+                await async_db_manager.execute(conn, "INSERT INTO a (id) VALUES (%s)", (1,))
+        """
+        async with self.get_connection() as conn:
+            await self.execute(conn, "BEGIN")
+            try:
+                yield conn
+            except BaseException:
+                if not conn.closed and not conn.isexecuting():
+                    await self.execute(conn, "ROLLBACK")
+                raise
+            await self.execute(conn, "COMMIT")
+    
+    @staticmethod
+    async def execute(conn, query: Any, params: Optional[Sequence[Any]] = None, cursor_factory=RealDictCursor):
+        """
+        Send one statement (or several separated by semicolons) in one round trip.
+        
+        Args:
+            conn: Connection from ``get_connection()`` or ``transaction()``
+            query: SQL string or ``psycopg2.sql`` composable
+            params: Optional query parameters
+            cursor_factory: Cursor class of the returned cursor
+        
+        Returns:
+            The cursor, with the results of the (last) statement
+        """
+        cur = conn.cursor(cursor_factory=cursor_factory)
+        _record_db("round_trips")
+        cur.execute(query, params)
+        await wait_ready(conn)
+        return cur
+    
+    async def fetch(self, conn, query: Any, params: Optional[Sequence[Any]] = None) -> List[Dict[str, Any]]:
+        """Run a query on a connection and return its rows as dictionaries."""
+        cur = await self.execute(conn, query, params)
+        return cur.fetchall()
+    
+    async def execute_query(self, query: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
+        """
+        Execute a SELECT query and return results.
+        
+        Args:
+            query: SQL query string
+            params: Optional query parameters
+        
+        Returns:
+            List of dictionaries containing query results
+        """
+        async with self.get_connection() as conn:
+            return await self.fetch(conn, query, params)
+    
+    async def execute_update(self, query: str, params: Optional[tuple] = None) -> int:
+        """
+        Execute an INSERT/UPDATE/DELETE query.
+        
+        Args:
+            query: SQL query string
+            params: Optional query parameters
+        
+        Returns:
+            Number of affected rows
+        """
+        async with self.get_connection() as conn:
+            cur = await self.execute(conn, query, params)
+            return cur.rowcount
+    
+    async def execute_pipeline(self, statements: Iterable[Tuple[Any, Optional[Sequence[Any]]]]) -> int:
+        """
+        Send several statements in a single round trip, in one transaction.
+        
+        Args:
+            statements: (query, params) pairs
+        
+        Returns:
+            Number of rows affected by the last statement
+        """
+        async with self.get_connection() as conn:
+            text = self._pipeline_text(conn, list(statements))
+            cur = await self.execute(conn, f"BEGIN; {text}; COMMIT", cursor_factory=extensions.cursor)
+            return cur.rowcount
+    
+    async def execute_batch(self, query: str, data: Iterable[Sequence[Any]], page_size: Optional[int] = None) -> int:
+        """
+        Execute a statement for every parameter tuple, ``page_size`` statements per round trip.
+        
+        Like ``DatabaseManager.execute_batch``, the returned row count only
+        covers the last statement. All pages run in one transaction.
+        
+        Args:
+            query: SQL query string with placeholders
+            data: Parameter tuples, one per statement
+            page_size: Statements per round trip (default ``pipeline_depth``)
+        
+        Returns:
+            Number of affected rows (last statement only)
+        """
+        page_size = page_size or self.pipeline_depth
+        data = iter(data)
+        rowcount = 0
+        async with self.transaction() as conn:
+            while True:
+                page = list(islice(data, page_size))
+                if not page:
+                    break
+                cur = await self.execute(
+                    conn, self._pipeline_text(conn, [(query, params) for params in page]),
+                    cursor_factory=extensions.cursor
+                )
+                rowcount = cur.rowcount
+        return rowcount
+    
+    @staticmethod
+    def _pipeline_text(conn, statements: List[Tuple[Any, Optional[Sequence[Any]]]]) -> str:
+        """Bind parameters client-side and join the statements with semicolons."""
+        cur = conn.cursor()
+        return "; ".join(
+            cur.mogrify(query.as_string(conn) if isinstance(query, sql.Composable) else query, params).decode()
+            for query, params in statements
+        )
+    
+    async def upsert_many(
+        self,
+        table: str,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        conflict_columns: Sequence[str] = ("external_id",),
+        update_columns: Optional[Sequence[str]] = None,
+        update_expressions: Optional[Dict[str, str]] = None,
+        update_where: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        template: Optional[str] = None,
+    ) -> Dict[str, int]:
+        """
+        Upsert rows with multi-row ``INSERT ... VALUES`` statements.
+        
+        Same arguments and result as ``DatabaseManager.upsert_many``. The
+        transaction start is sent together with the first page, so a single
+        page costs two round trips (statement and COMMIT).
+        
+        Returns:
+            Dictionary with "inserted", "updated" and "skipped" counts
+        """
+        if update_columns is None:
+            update_columns = [column for column in columns if column not in conflict_columns]
+        if page_size < 1:
+            raise ValueError("page_size must be a positive integer")
+        template = template or "(" + ", ".join(["%s"] * len(columns)) + ")"
+        
+        result = {"inserted": 0, "updated": 0, "skipped": 0}
+        rows = iter(rows)
+        async with self.get_connection() as conn:
+            in_transaction = False
+            try:
+                while True:
+                    page = list(islice(rows, page_size))
+                    if not page:
+                        break
+                    encoder = conn.cursor()
+                    values = b", ".join(encoder.mogrify(template, row) for row in page).decode()
+                    query = sql.SQL(
+                        "INSERT INTO {table} ({columns}) VALUES {values} {on_conflict} RETURNING (xmax = 0)"
+                    ).format(
+                        table=table_identifier(table),
+                        columns=sql.SQL(", ").join(sql.Identifier(column) for column in columns),
+                        values=sql.SQL(values),
+                        on_conflict=DatabaseManager._on_conflict_clause(
+                            conflict_columns, update_columns, update_expressions, update_where
+                        ),
+                    )
+                    begin = "" if in_transaction else "BEGIN; "
+                    in_transaction = True
+                    cur = await self.execute(conn, begin + query.as_string(conn), cursor_factory=extensions.cursor)
+                    returned = cur.fetchall()
+                    inserted = sum(1 for (is_insert,) in returned if is_insert)
+                    result["inserted"] += inserted
+                    result["updated"] += len(returned) - inserted
+                    result["skipped"] += len(page) - len(returned)
+                if in_transaction:
+                    await self.execute(conn, "COMMIT")
+            except BaseException:
+                if in_transaction and not conn.closed and not conn.isexecuting():
+                    await self.execute(conn, "ROLLBACK")
+                raise
+        
+        logger.info(
+            f"Upsert into {table}: {result['inserted']} inserted, "
+            f"{result['updated']} updated, {result['skipped']} skipped"
+        )
+        return result
+    
+    async def copy_upsert(self, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]], **kwargs) -> int:
+        """
+        Bulk upsert rows using COPY, see ``DatabaseManager.copy_upsert``.
+        
+        Async psycopg2 connections cannot run COPY, so this runs the sync
+        manager's ``copy_upsert`` in a worker thread without blocking the loop.
+        """
+        context = contextvars.copy_context()
+        return await asyncio.to_thread(context.run, self.sync_manager.copy_upsert, table, columns, rows, **kwargs)
+    
+    async def close_pool(self):
+        """Close all idle connections and unbind the pool from its event loop."""
+        while self._idle:
+            conn, _ = self._idle.pop()
+            conn.close()
+        self._loop = None
+        self._slots = None
+        logger.info("Async database pool closed")
+
+
+class BackgroundLoop:
+    """
+    Event loop running in a daemon thread, for calling coroutines from sync code.
+    
+    The thread is started on first use and lives as long as the process, so
+    warm Lambda invocations reuse it and the connections of its pool.
+    """
+    
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+    
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(target=loop.run_forever, name="async-db-loop", daemon=True).start()
+                    self._loop = loop
+        return self._loop
+    
+    def run(self, coro: Awaitable[T]) -> T:
+        """
+        Run a coroutine on the loop and wait for its result.
+        
+        The coroutine runs in a copy of the caller's context, so context
+        variables such as the ``collect_db_stats`` collector carry over.
+        """
+        loop = self._get_loop()
+        context = contextvars.copy_context()
+        result: concurrent.futures.Future = concurrent.futures.Future()
+        
+        def done(task: asyncio.Task):
+            if task.cancelled():
+                result.cancel()
+            elif task.exception() is not None:
+                result.set_exception(task.exception())
+            else:
+                result.set_result(task.result())
+        
+        def start():
+            loop.create_task(coro, context=context).add_done_callback(done)
+        
+        loop.call_soon_threadsafe(start)
+        return result.result()
+
+
+# Shared loop of run_async() and owner of the async_db_manager pool
+background_loop = BackgroundLoop()
+
+
+def run_async(coro: Awaitable[T]) -> T:
+    """
+    Run a coroutine on the shared background loop from sync code and return its result.
+    
+    Usage:
+        rows = run_async(async_db_manager.execute_query("SELECT 1"))
+    """
+    return background_loop.run(coro)
+
+
+# Global async database manager instance (connections are opened on first use)
+async_db_manager = AsyncDatabaseManager()
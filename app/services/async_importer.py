@@ -0,0 +1,87 @@
+"""
+Adapter for importers written with asyncio.
+
+``AsyncImporter`` subclasses implement ``fetch_data_async`` and
+``save_data_async`` as coroutines (``fetch_data_async`` may also be an async
+generator); the sync ``BaseImporter`` run loop calls them on the shared
+background event loop (``run_async``), so batch, streaming, pipeline mode,
+checkpoints and metrics work unchanged. Sync importers are not affected.
+"""
+import inspect
+from abc import abstractmethod
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterator, List, Union
+
+from app.services.async_database import run_async
+from app.services.base_importer import BaseImporter
+
+
+async def _await(awaitable: Awaitable[Any]) -> Any:
+    # Tasks need a coroutine; async generator methods return other awaitables
+    return await awaitable
+
+
+class AsyncImporter(BaseImporter):
+    """
+    Base class for importers with async fetch and save.
+    
+    Usage:
+        class MyImporter(AsyncImporter):
+            async def fetch_data_async(self):
+                async for page in api.pages():
+                    yield page
+            
+            def transform_data(self, data):
+                return self.map_records(MAPPING, data)
+            
+            async def save_data_async(self, data):
+                await async_db_manager.upsert_many("target_table", MAPPING.names, data)
+                return True
+    
+    Each item yielded by ``fetch_data_async`` costs a hop to the event loop,
+    so yield pages (lists of records) rather than single records.
+    """
+    
+    @abstractmethod
+    def fetch_data_async(self) -> Union[AsyncIterator[Any], Any]:
+        """
+        Fetch data from the source.
+        
+        Either a coroutine returning a list of records, or an async generator
+        yielding single records or lists of records (streaming mode).
+        """
+        pass
+    
+    @abstractmethod
+    async def save_data_async(self, data: List[Dict[str, Any]]) -> bool:
+        """
+        Save transformed data to the target database.
+        
+        Args:
+            data: List of transformed records
+        
+        Returns:
+            True if save was successful, False otherwise
+        """
+        pass
+    
+    def fetch_data(self):
+        source = self.fetch_data_async()
+        if inspect.isasyncgen(source):
+            return self._iterate(source)
+        return run_async(source)
+    
+    def save_data(self, data: List[Dict[str, Any]]) -> bool:
+        return run_async(self.save_data_async(data))
+    
+    @staticmethod
+    def _iterate(source: AsyncIterator[Any]) -> Iterator[Any]:
+        """Iterate an async generator from sync code, closing it if iteration stops early."""
+        try:
+            while True:
+                try:
+                    item = run_async(_await(source.__anext__()))
+                except StopAsyncIteration:
+                    return
+                yield item
+        finally:
+            run_async(_await(source.aclose()))
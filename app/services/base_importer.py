@@ -3,12 +3,100 @@ Base importer class for data import operations.
 
 This is a template class that should be extended for specific data import needs.
 """
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
-from app.logger_config import get_logger
+from contextlib import contextmanager
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from app.config import CHECKPOINT_INTERVAL, EMIT_METRICS, IMPORT_STOP_MARGIN
+from app.services.change_detection import ChangeDetector
+from app.services.database import collect_db_stats
+from app.services.dedup import Deduplicator
+from app.services.metrics import ImportMetrics, emit_emf
+from app.services.pipeline import DEFAULT_QUEUE_SIZE, Pipeline
+from app.services.state_store import StateStore, get_state_store
+from app.services.transform import ColumnMapping
+from app.logger_config import get_logger, rate_limited
 
 logger = get_logger(__name__)
 
+# Run modes
+MODE_BATCH = "batch"
+MODE_STREAMING = "streaming"
+MODE_PIPELINE = "pipeline"
+
+# Default number of records per chunk in streaming mode
+DEFAULT_CHUNK_SIZE = 1000
+
+# State store namespace of incremental import watermarks
+WATERMARK_NAMESPACE = "watermark"
+
+# State store namespace of the resume positions of interrupted imports
+CHECKPOINT_NAMESPACE = "checkpoint"
+
+
+def later_watermark(a: Any, b: Any) -> Any:
+    """
+    Get the later of two watermarks (either may be None).
+    
+    Values of different types, e.g. a datetime and the ISO string it was
+    stored as, are compared as strings.
+    """
+    if a is None:
+        return b
+    if b is None:
+        return a
+    try:
+        return a if a >= b else b
+    except TypeError:
+        return a if str(a) >= str(b) else b
+
+
+def iter_chunks(source: Optional[Iterable[Any]], chunk_size: int) -> Iterator[List[Any]]:
+    """
+    Split a data source into lists of at most ``chunk_size`` records.
+    
+    The source can be a list of records, an iterator/generator yielding single
+    records, or an iterator yielding lists of records (e.g. one list per API page).
+    Yielded lists are passed through as chunks and only split when they are
+    larger than ``chunk_size``.
+    
+    Args:
+        source: List, iterator of records or iterator of record lists
+        chunk_size: Maximum number of records per chunk
+        
+    Yields:
+        Lists of records
+    """
+    if source is None:
+        return
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer")
+    
+    if isinstance(source, list):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+        return
+    
+    buffer: List[Any] = []
+    for item in source:
+        if isinstance(item, list):
+            if buffer:
+                yield buffer
+                buffer = []
+            for start in range(0, len(item), chunk_size):
+                yield item[start:start + chunk_size]
+            continue
+        
+        buffer.append(item)
+        if len(buffer) >= chunk_size:
+            yield buffer
+            buffer = []
+    
+    if buffer:
+        yield buffer
+
 
 class BaseImporter(ABC):
     """
@@ -30,6 +118,84 @@ class BaseImporter(ABC):
             def save_data(self, data: List[Dict]) -> bool:
                 # Save data to database
                 pass
+    
+    Streaming mode:
+        Set ``"mode": "streaming"`` in the config to process the data in chunks
+        of ``chunk_size`` records (default 1000). ``fetch_data`` may then return
+        a generator yielding single records or lists of records; every chunk is
+        transformed and saved before the next one is fetched, so only one chunk
+        is held in memory at a time. List-returning importers work in both modes.
+    
+    Pipeline mode:
+        ``"mode": "pipeline"`` processes the same chunks as streaming mode, but
+        fetching, transforming and saving run concurrently in three threads
+        connected by queues of ``queue_size`` chunks (default 2). A full queue
+        blocks the stage before it, so at most about ``2 * queue_size + 3``
+        chunks are in memory. Per-stage throughput and queue depths are
+        reported in ``stats["pipeline"]``. An exception in any stage stops the
+        others and counts as an error. ``transform_data`` and ``save_data``
+        run in different threads and must not share unsynchronised state.
+    
+    Incremental mode:
+        Set ``"incremental": True`` to import only what changed since the last
+        successful run. Before ``fetch_data`` is called, ``self.watermark`` holds
+        the stored watermark (None on the first run) and ``fetch_data`` should
+        only request newer records. After each successful save, the highest
+        ``watermark_field`` value (default "updated_at") of the saved records is
+        remembered; it is persisted under ``state_key`` only when the whole run
+        finished without errors. Importers paging by cursor can set
+        ``self.pending_watermark`` themselves.
+    
+    Checkpoints:
+        Importers that can resume set ``self.resumable = True`` and implement
+        ``checkpoint_position`` (e.g. {"offset": 1234}) and ``restore_position``.
+        In streaming mode the position is persisted under ``state_key`` every
+        ``checkpoint_interval`` seconds (default CHECKPOINT_INTERVAL) after a
+        saved chunk (in pipeline mode only when the run stops, after the
+        queued chunks are saved). With a "deadline" (epoch seconds, set by the orchestrator
+        from the Lambda context), no new chunk is started once less than
+        ``stop_margin`` seconds plus the duration of a chunk are left: the run
+        stops with status "incomplete" and its checkpoint in
+        ``result["checkpoint"]``. The next run resumes from the "checkpoint"
+        config entry or else the stored checkpoint; a run that reaches the
+        end deletes it. Checkpoints do not advance after a save error, and
+        the watermark is only committed by the run that completes the import.
+        The chunk in progress at a stop may be imported twice, so ``save_data``
+        should upsert.
+    
+    Change detection:
+        A "change_detection" config section (e.g. {"key": "external_id"})
+        hashes every transformed record, compares it with the hash stored in
+        the target table's "row_hash" column and only passes new or changed
+        records to ``save_data``. ``save_data`` must write the hash column.
+    
+    Deduplication:
+        A "dedup" config section (e.g. {"key": "external_id", "keep": "last"})
+        keeps one record per key in every transformed chunk, before change
+        detection, so a multi-row upsert never updates the same row twice.
+        "keep" is "last", "first" or "latest" (highest "order_field"); dropped
+        records are counted in ``stats["duplicates"]`` (see app/services/dedup.py).
+    
+    Metrics:
+        Every run reports the wall and CPU time and records/sec of the fetch,
+        transform and save stages, database round trips and connection wait
+        time, peak RSS and ``stats["bytes_fetched"]`` (set by importers that
+        know it) in ``stats["metrics"]``. With "emit_metrics" (default
+        EMIT_METRICS: on in AWS Lambda) they are also written as a CloudWatch
+        Embedded Metric Format line with an "Importer" dimension.
+    
+    Fan-out:
+        Importers whose data can be divided (date ranges, key ranges, file
+        byte ranges, ...) implement ``plan_partitions``. A planner invocation
+        then queues the partitions and worker invocations import them in
+        parallel (see app/services/fanout.py).
+    
+    Tuple records:
+        ``transform_data`` may return tuples instead of dictionaries, e.g. the
+        compact records (named tuples) of a ``ColumnMapping`` via ``map_records``.
+        Set ``self.columns`` to their column names so watermarks and change
+        detection can read fields; with change detection the hash is appended
+        as the last tuple element.
     """
     
     def __init__(self, config: Optional[Dict[str, Any]] = None):
@@ -41,12 +207,147 @@ class BaseImporter(ABC):
         """
         self.config = config or {}
         self.logger = get_logger(self.__class__.__name__)
+        self.mode = self.config.get("mode", MODE_BATCH)
+        self.chunk_size = int(self.config.get("chunk_size", DEFAULT_CHUNK_SIZE))
+        self.queue_size = int(self.config.get("queue_size", DEFAULT_QUEUE_SIZE))
         self.stats = {
             "fetched": 0,
             "transformed": 0,
             "saved": 0,
             "errors": 0
         }
+        self._stats_lock = threading.Lock()
+        # Transform errors of the chunk the current thread is transforming
+        self._chunk_errors = threading.local()
+        
+        # Stage timings, reported in stats["metrics"] and as CloudWatch EMF metrics
+        self.metrics = ImportMetrics()
+        self.emit_metrics = bool(self.config.get("emit_metrics", EMIT_METRICS))
+        
+        # Column names of tuple records produced by transform_data (None for dictionaries)
+        self.columns: Optional[Sequence[str]] = None
+        
+        # Incremental imports
+        self.incremental = bool(self.config.get("incremental", False))
+        self.watermark_field = self.config.get("watermark_field", "updated_at")
+        self.state_key = self.config.get("state_key", self.__class__.__name__)
+        self.watermark: Optional[Any] = None
+        self.pending_watermark: Optional[Any] = None
+        self._state_store: Optional[StateStore] = self.config.get("state_store")
+        
+        # Change detection
+        self.change_detection: Optional[Dict[str, Any]] = self.config.get("change_detection")
+        self._change_detector: Optional[ChangeDetector] = None
+        
+        # In-chunk deduplication by key
+        self.dedup: Optional[Dict[str, Any]] = self.config.get("dedup")
+        self._deduplicator: Optional[Deduplicator] = None
+        
+        # Checkpoints and time budget
+        self.resumable = False
+        self.deadline: Optional[float] = self.config.get("deadline")
+        self.stop_margin = float(self.config.get("stop_margin", IMPORT_STOP_MARGIN))
+        self.checkpoint_interval = float(self.config.get("checkpoint_interval", CHECKPOINT_INTERVAL))
+        self.checkpoint: Optional[Dict[str, Any]] = None
+        self.stopped_early = False
+        self._checkpoint_loaded = False
+        self._last_checkpoint = time.monotonic()
+        self._chunk_seconds = 0.0
+    
+    @property
+    def change_detector(self) -> Optional[ChangeDetector]:
+        """
+        Change detector built from the "change_detection" config section, or None.
+        
+        The target table defaults to the importer's ``table_name``.
+        """
+        if self.change_detection and self._change_detector is None:
+            self._change_detector = ChangeDetector.from_config(
+                self.change_detection, getattr(self, "table_name", self.config.get("table_name", ""))
+            )
+        return self._change_detector
+    
+    @property
+    def deduplicator(self) -> Optional[Deduplicator]:
+        """Deduplicator built from the "dedup" config section, or None."""
+        if self.dedup and self._deduplicator is None:
+            self._deduplicator = Deduplicator.from_config(self.dedup)
+        return self._deduplicator
+    
+    @property
+    def state_store(self) -> StateStore:
+        """State store used for watermarks (created from app config on first use)."""
+        if self._state_store is None:
+            self._state_store = get_state_store()
+        return self._state_store
+    
+    def field_getter(self, field: str) -> Callable[[Any], Any]:
+        """
+        Get a function reading ``field`` from a transformed record.
+        
+        Args:
+            field: Field name
+            
+        Returns:
+            Function returning the field value (None if the record has no such field)
+        """
+        if self.columns is None:
+            return lambda record: record.get(field)
+        if field not in self.columns:
+            return lambda record: None
+        return itemgetter(list(self.columns).index(field))
+    
+    def map_records(
+        self, mapping: ColumnMapping, data: List[Any], index: Optional[Dict[str, int]] = None
+    ) -> List[tuple]:
+        """
+        Transform a batch with a column mapping, logging and counting failed records.
+        
+        Args:
+            mapping: Column mapping
+            data: Raw records
+            index: Field name -> position mapping when records are sequences
+            
+        Returns:
+            ``mapping.record_type`` records of the inputs that transformed cleanly
+        """
+        rows, failures = mapping.apply(data, index)
+        for position, error in failures:
+            self.logger.error(
+                "Error transforming record %s: %s", position, error, extra=rate_limited("transform_error")
+            )
+        if failures:
+            self.count_transform_errors(len(failures))
+        return rows
+    
+    def count_transform_errors(self, count: int = 1):
+        """
+        Count records that failed to transform in ``stats["errors"]``.
+        
+        During a chunk's transformation they are also charged to that chunk
+        (in pipeline mode other chunks are saved, and may fail, meanwhile).
+        
+        Args:
+            count: Number of failed records
+        """
+        chunk_errors = getattr(self._chunk_errors, "count", None)
+        if chunk_errors is None:
+            self.increment_stat("errors", count)
+        else:
+            self._chunk_errors.count = chunk_errors + count
+    
+    def increment_stat(self, name: str, value: int = 1):
+        """
+        Add ``value`` to a counter in ``self.stats``, creating it if needed.
+        
+        Safe to call from worker threads.
+        
+        Args:
+            name: Statistic name
+            value: Amount to add
+        """
+        with self._stats_lock:
+            self.stats[name] = self.stats.get(name, 0) + value
     
     def run(self) -> Dict[str, Any]:
         """
@@ -58,36 +359,30 @@ class BaseImporter(ABC):
         try:
             self.logger.info(f"Starting {self.__class__.__name__} import process")
             
-            # Step 1: Fetch data
-            self.logger.info("Fetching data from source...")
-            raw_data = self.fetch_data()
-            self.stats["fetched"] = len(raw_data) if raw_data else 0
-            self.logger.info(f"Fetched {self.stats['fetched']} records")
+            if self.incremental:
+                self.watermark = self.load_watermark()
+                self.logger.info(f"Incremental import from watermark {self.watermark!r}")
             
-            if not raw_data:
-                self.logger.warning("No data fetched from source")
-                return self._get_result()
+            if self.resumable:
+                self.resume(self.load_checkpoint())
             
-            # Step 2: Transform data
-            self.logger.info("Transforming data...")
-            transformed_data = self.transform_data(raw_data)
-            self.stats["transformed"] = len(transformed_data) if transformed_data else 0
-            self.logger.info(f"Transformed {self.stats['transformed']} records")
+            if self.mode == MODE_STREAMING:
+                self._run_streaming()
+            elif self.mode == MODE_PIPELINE:
+                self._run_pipeline()
+            else:
+                self._run_batch()
             
-            if not transformed_data:
-                self.logger.warning("No data after transformation")
+            if self.stopped_early:
+                self.save_checkpoint()
                 return self._get_result()
             
-            # Step 3: Save data
-            self.logger.info("Saving data to database...")
-            success = self.save_data(transformed_data)
-            
-            if success:
-                self.stats["saved"] = len(transformed_data)
-                self.logger.info(f"Successfully saved {self.stats['saved']} records")
-            else:
-                self.logger.error("Failed to save data")
-                self.stats["errors"] += 1
+            if self._checkpoint_loaded or self.checkpoint is not None:
+                self.clear_checkpoint()
+            if self.incremental:
+                self._commit_watermark()
+            if not self.stats["errors"]:
+                self.on_success()
             
             return self._get_result()
             
@@ -96,6 +391,525 @@ class BaseImporter(ABC):
             self.stats["errors"] += 1
             return self._get_result()
     
+    def _run_batch(self):
+        """
+        Run the import on the whole data set at once.
+        """
+        # Step 1: Fetch data
+        self.logger.info("Fetching data from source...")
+        with self._stage("fetch"):
+            raw_data = self.fetch_data()
+            if raw_data is not None and not isinstance(raw_data, list):
+                # Generator-based importers run in batch mode too
+                raw_data = [record for chunk in iter_chunks(raw_data, self.chunk_size) for record in chunk]
+        self.stats["fetched"] = len(raw_data) if raw_data else 0
+        self.metrics.add("fetch", records=self.stats["fetched"])
+        self.logger.info(f"Fetched {self.stats['fetched']} records")
+        
+        if not raw_data:
+            self.logger.warning("No data fetched from source")
+            return
+        
+        # Step 2: Transform data
+        self.logger.info("Transforming data...")
+        with self._stage("transform", len(raw_data)):
+            transformed_data = self.transform_data(raw_data)
+            self.stats["transformed"] = len(transformed_data) if transformed_data else 0
+            if transformed_data and self.dedup:
+                transformed_data = self.deduplicate(transformed_data)
+            if transformed_data and self.change_detection:
+                changed_data = self.detect_changes(transformed_data)
+        self.logger.info(f"Transformed {self.stats['transformed']} records")
+        
+        if not transformed_data:
+            self.logger.warning("No data after transformation")
+            return
+        
+        if self.change_detection:
+            transformed_data = changed_data
+            if not transformed_data:
+                self.logger.info("No new or changed records to save")
+                return
+        
+        # Step 3: Save data
+        self.logger.info("Saving data to database...")
+        with self._stage("save", len(transformed_data)):
+            success = self.save_data(transformed_data)
+        
+        if success:
+            self.stats["saved"] = len(transformed_data)
+            self.track_watermark(transformed_data)
+            self.logger.info(f"Successfully saved {self.stats['saved']} records")
+        else:
+            self.logger.error("Failed to save data")
+            self.stats["errors"] += 1
+    
+    def _run_streaming(self):
+        """
+        Run the import chunk by chunk.
+        
+        Each chunk produced by ``fetch_data`` is transformed and saved before
+        the next chunk is requested from the source.
+        """
+        self.logger.info(f"Streaming data from source in chunks of {self.chunk_size} records...")
+        self.stats["chunks"] = 0
+        self.stats["chunk_stats"] = []
+        
+        started = time.monotonic()
+        for index, chunk in enumerate(self._fetch_chunks()):
+            chunk_stats = self._start_chunk(index, len(chunk))
+            transformed_data = self._transform_chunk(chunk, chunk_stats)
+            if transformed_data:
+                self._save_chunk(transformed_data, chunk_stats)
+            if self._chunk_done(started):
+                break
+            started = time.monotonic()
+        
+        if self.stats["fetched"] == 0:
+            self.logger.warning("No data fetched from source")
+        else:
+            self.logger.info(
+                f"Streamed {self.stats['fetched']} records in {self.stats['chunks']} chunks, "
+                f"saved {self.stats['saved']}"
+            )
+    
+    def _run_pipeline(self):
+        """
+        Run the import chunk by chunk with fetch, transform and save overlapping.
+        
+        Items passed between the stages are ``(index, records)`` pairs from
+        the fetcher and ``(chunk_stats, records)`` pairs from the transformer.
+        """
+        self.logger.info(
+            f"Pipelining data from source in chunks of {self.chunk_size} records "
+            f"(queue size {self.queue_size})..."
+        )
+        self.stats["chunks"] = 0
+        self.stats["chunk_stats"] = []
+        
+        # Chunks that may still be queued or in progress when the fetcher stops
+        in_flight = 2 * self.queue_size + 2
+        
+        def fetch():
+            chunks = self._fetch_chunks()
+            try:
+                started = time.monotonic()
+                for item in enumerate(chunks):
+                    yield item
+                    # Resumes once the chunk is queued, so this measures the pipeline's pace
+                    self._chunk_seconds = time.monotonic() - started
+                    started = time.monotonic()
+                    if self.should_stop(pending_chunks=in_flight):
+                        self._stop_early()
+                        break
+            finally:
+                # Runs in the fetch thread, also when another stage failed
+                chunks.close()
+        
+        def transform(item):
+            index, chunk = item
+            chunk_stats = self._start_chunk(index, len(chunk))
+            transformed_data = self._transform_chunk(chunk, chunk_stats)
+            return (chunk_stats, transformed_data) if transformed_data else None
+        
+        def save(item):
+            chunk_stats, transformed_data = item
+            self._save_chunk(transformed_data, chunk_stats)
+        
+        pipeline = Pipeline(
+            ("fetch", fetch()),
+            [("transform", transform), ("save", save)],
+            queue_size=self.queue_size,
+            size_of=lambda item: len(item[1])
+        )
+        try:
+            self.stats["pipeline"] = pipeline.run()
+        finally:
+            self.stats.setdefault("pipeline", pipeline.get_metrics())
+        
+        self.logger.info(
+            f"Pipelined {self.stats['fetched']} records in {self.stats['chunks']} chunks, "
+            f"saved {self.stats['saved']}"
+        )
+    
+    @contextmanager
+    def _stage(self, name: str, records: int = 0):
+        """
+        Measure a block as part of a stage, including its database activity.
+        
+        Args:
+            name: Stage name ("fetch", "transform" or "save")
+            records: Number of records the block processes
+        """
+        with self.metrics.stage(name, records), collect_db_stats(self.metrics.record_db):
+            yield
+    
+    def _fetch_chunks(self, fetch: Optional[Callable[[], Any]] = None) -> Iterator[List[Any]]:
+        """
+        Chunks of ``chunk_size`` records from ``fetch_data``, timing the fetch stage.
+        
+        Args:
+            fetch: Function returning the data source (defaults to ``fetch_data``)
+        
+        Yields:
+            Lists of raw records
+        """
+        with self._stage("fetch"):
+            chunks = iter_chunks((fetch or self.fetch_data)(), self.chunk_size)
+        try:
+            while True:
+                with self._stage("fetch"):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    return
+                self.metrics.add("fetch", records=len(chunk))
+                yield chunk
+        finally:
+            chunks.close()
+    
+    def _chunk_done(self, started: float) -> bool:
+        """
+        Checkpoint after a streamed chunk if it is time to, and check the deadline.
+        
+        Args:
+            started: ``time.monotonic()`` value when fetching the chunk began
+        
+        Returns:
+            True if the import should stop before the next chunk
+        """
+        self._chunk_seconds = time.monotonic() - started
+        if time.monotonic() - self._last_checkpoint >= self.checkpoint_interval:
+            self.save_checkpoint()
+        if self.should_stop():
+            self._stop_early()
+            return True
+        return False
+    
+    def _stop_early(self):
+        """Mark the run as stopped before the end of the data."""
+        self.stopped_early = True
+        self.stats["stopped_early"] = True
+        self.logger.info(
+            f"Stopping before the deadline ({self.time_left():.1f}s left, "
+            f"last chunk took {self._chunk_seconds:.1f}s)"
+        )
+    
+    def time_left(self) -> Optional[float]:
+        """
+        Seconds left before the deadline.
+        
+        Returns:
+            Remaining seconds, or None without a deadline
+        """
+        if self.deadline is None:
+            return None
+        return self.deadline - time.time()
+    
+    def should_stop(self, pending_chunks: int = 0) -> bool:
+        """
+        Check whether a resumable import should stop instead of starting another chunk.
+        
+        Args:
+            pending_chunks: Chunks already started that still have to finish
+        
+        Returns:
+            True if less than ``stop_margin`` plus the time of the pending
+            chunks and one more chunk is left before the deadline (never
+            without a position to resume from)
+        """
+        time_left = self.time_left()
+        if not self.resumable or time_left is None or self.checkpoint_position() is None:
+            return False
+        return time_left < self.stop_margin + (pending_chunks + 1) * self._chunk_seconds
+    
+    def checkpoint_position(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the position after the last saved record.
+        
+        Override in resumable importers, e.g. to return a file offset, the
+        next page cursor or the last key read.
+        
+        Returns:
+            JSON serializable position, or None if there is none (yet)
+        """
+        return None
+    
+    def restore_position(self, position: Dict[str, Any]):
+        """
+        Continue from a position returned by ``checkpoint_position``.
+        
+        Called before ``fetch_data``. Override in resumable importers.
+        
+        Args:
+            position: Stored position
+        """
+        pass
+    
+    def load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        """
+        Load the checkpoint to resume from.
+        
+        Returns:
+            The "checkpoint" config entry (e.g. from a continuation event), else
+            the stored checkpoint, or None
+        """
+        checkpoint = self.config.get("checkpoint")
+        if checkpoint is None:
+            checkpoint = self.state_store.get(CHECKPOINT_NAMESPACE, self.state_key)
+        self._checkpoint_loaded = checkpoint is not None
+        return checkpoint
+    
+    def resume(self, checkpoint: Optional[Dict[str, Any]]):
+        """
+        Restore the position and pending watermark of a checkpoint.
+        
+        Args:
+            checkpoint: Checkpoint from ``load_checkpoint`` (None to start from the beginning)
+        """
+        if not checkpoint or checkpoint.get("position") is None:
+            return
+        self.checkpoint = checkpoint
+        self.pending_watermark = checkpoint.get("watermark")
+        self.restore_position(checkpoint["position"])
+        self.stats["resumed_from"] = checkpoint["position"]
+        self.logger.info(f"Resuming from checkpoint {checkpoint['position']!r}")
+    
+    def save_checkpoint(self) -> bool:
+        """
+        Persist the current position, unless the run had errors.
+        
+        Returns:
+            True if a checkpoint was saved
+        """
+        self._last_checkpoint = time.monotonic()
+        position = self.checkpoint_position()
+        if position is None:
+            return False
+        if self.stats["errors"]:
+            self.logger.warning(f"Import had {self.stats['errors']} errors, keeping the previous checkpoint")
+            return False
+        
+        checkpoint = {"position": position, "watermark": self.pending_watermark}
+        self.state_store.set(CHECKPOINT_NAMESPACE, self.state_key, checkpoint)
+        self.checkpoint = checkpoint
+        self.stats["checkpoint"] = position
+        self.logger.debug(f"Saved checkpoint {position!r}")
+        return True
+    
+    def clear_checkpoint(self):
+        """Delete the stored checkpoint once the import reached the end of the data."""
+        self.state_store.delete(CHECKPOINT_NAMESPACE, self.state_key)
+        self.checkpoint = None
+    
+    def _start_chunk(self, index: int, size: int) -> Dict[str, Any]:
+        """
+        Register a fetched chunk and create its statistics entry.
+        
+        Args:
+            index: Zero-based chunk number
+            size: Number of raw records in the chunk
+            
+        Returns:
+            Per-chunk statistics dictionary (also appended to ``stats["chunk_stats"]``)
+        """
+        chunk_stats = {
+            "chunk": index,
+            "fetched": size,
+            "transformed": 0,
+            "saved": 0,
+            "errors": 0
+        }
+        self.increment_stat("chunks")
+        self.increment_stat("fetched", size)
+        self.stats["chunk_stats"].append(chunk_stats)
+        return chunk_stats
+    
+    def _transform_chunk(self, chunk: List[Any], chunk_stats: Dict[str, Any]) -> List[Any]:
+        """
+        Transform a single chunk and update statistics.
+        
+        Args:
+            chunk: Raw records of the chunk
+            chunk_stats: Per-chunk statistics dictionary
+            
+        Returns:
+            Transformed records (empty list if nothing survived the transformation)
+        """
+        with self._stage("transform", len(chunk)):
+            self._chunk_errors.count = 0
+            try:
+                transformed_data = self.transform_data(chunk) or []
+            finally:
+                errors, self._chunk_errors.count = self._chunk_errors.count, None
+            if errors:
+                chunk_stats["errors"] += errors
+                self.increment_stat("errors", errors)
+            return self._finish_transform(transformed_data, chunk_stats)
+    
+    def _finish_transform(self, transformed_data: List[Any], chunk_stats: Dict[str, Any]) -> List[Any]:
+        """
+        Count a transformed chunk and apply the post-transform stages
+        (deduplication, change detection).
+        
+        Args:
+            transformed_data: Transformed records of the chunk
+            chunk_stats: Per-chunk statistics dictionary
+            
+        Returns:
+            Records to save
+        """
+        chunk_stats["transformed"] = len(transformed_data)
+        self.increment_stat("transformed", len(transformed_data))
+        
+        if not transformed_data:
+            self.logger.warning("Chunk %d: no data after transformation", chunk_stats["chunk"])
+            return transformed_data
+        
+        if self.dedup:
+            unique_data = self.deduplicate(transformed_data)
+            chunk_stats["duplicates"] = len(transformed_data) - len(unique_data)
+            transformed_data = unique_data
+        if self.change_detection:
+            changed_data = self.detect_changes(transformed_data)
+            chunk_stats["unchanged"] = len(transformed_data) - len(changed_data)
+            transformed_data = changed_data
+        return transformed_data
+    
+    def _save_chunk(self, data: List[Any], chunk_stats: Dict[str, Any]) -> bool:
+        """
+        Save a single transformed chunk and update statistics.
+        
+        Args:
+            data: Transformed records of the chunk
+            chunk_stats: Per-chunk statistics dictionary
+            
+        Returns:
+            True if the chunk was saved, False otherwise
+        """
+        with self._stage("save", len(data)):
+            saved = self.save_data(data)
+        if saved:
+            chunk_stats["saved"] = len(data)
+            self.increment_stat("saved", len(data))
+            self.track_watermark(data)
+            self.logger.debug("Chunk %d: saved %d records", chunk_stats["chunk"], len(data))
+            return True
+        
+        self.logger.error("Failed to save chunk %d", chunk_stats["chunk"])
+        chunk_stats["errors"] += 1
+        self.increment_stat("errors")
+        return False
+    
+    def deduplicate(self, data: List[Any]) -> List[Any]:
+        """
+        Keep one record per dedup key, counting the others in ``stats["duplicates"]``.
+        
+        Args:
+            data: Transformed records
+            
+        Returns:
+            Records with unique keys
+        """
+        deduplicator = self.deduplicator
+        getters = [self.field_getter(field) for field in deduplicator.key_fields]
+        if len(getters) == 1:
+            get_key = getters[0]
+        else:
+            def get_key(record: Any) -> Optional[Tuple[Any, ...]]:
+                key = tuple(getter(record) for getter in getters)
+                # Keys with a NULL part never conflict
+                return None if None in key else key
+        get_order = self.field_getter(deduplicator.order_field) if deduplicator.order_field else None
+        
+        unique, duplicates = deduplicator.deduplicate(data, get_key, get_order)
+        if duplicates:
+            self.increment_stat("duplicates", len(duplicates))
+            self.logger.info("Dropped %d duplicate records", len(duplicates))
+        return unique
+    
+    def detect_changes(self, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Drop records whose content hash matches the one stored in the database.
+        
+        Unchanged records are counted in ``stats["unchanged"]`` and count as
+        saved for the incremental watermark, since they are already stored.
+        
+        Args:
+            data: Transformed records
+            
+        Returns:
+            New or changed records, each with its hash set
+        """
+        changed, unchanged = self.change_detector.filter_changed(data, self.columns)
+        self.increment_stat("unchanged", len(unchanged))
+        self.track_watermark(unchanged)
+        if unchanged:
+            self.logger.info("Skipping %d unchanged records", len(unchanged))
+        return changed
+    
+    def load_watermark(self) -> Optional[Any]:
+        """
+        Load the watermark of the last successful run.
+        
+        Returns:
+            Stored watermark, or None if this importer has not run before
+        """
+        return self.state_store.get(WATERMARK_NAMESPACE, self.state_key)
+    
+    def track_watermark(self, data: List[Dict[str, Any]]):
+        """
+        Remember the highest ``watermark_field`` value of successfully saved records.
+        
+        Args:
+            data: Saved records
+        """
+        if not self.incremental:
+            return
+        get_value = self.field_getter(self.watermark_field)
+        values = [value for value in map(get_value, data) if value is not None]
+        if not values:
+            return
+        highest = max(values)
+        with self._stats_lock:
+            # A watermark restored from a checkpoint may have been stored as a string
+            self.pending_watermark = later_watermark(self.pending_watermark, highest)
+    
+    def _commit_watermark(self):
+        """Persist the new watermark if the run finished without errors."""
+        if self.pending_watermark is None or self.pending_watermark == self.watermark:
+            return
+        if self.stats["errors"]:
+            self.logger.warning(
+                f"Import had {self.stats['errors']} errors, keeping watermark {self.watermark!r}"
+            )
+            return
+        self.state_store.set(WATERMARK_NAMESPACE, self.state_key, self.pending_watermark)
+        self.stats["watermark"] = self.pending_watermark
+        self.logger.info(f"Advanced watermark to {self.pending_watermark!r}")
+    
+    def plan_partitions(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Split the import into independent partitions for planner/worker runs.
+        
+        Override in importers whose source can be divided. Every partition
+        runs as an importer with the job's config updated by its overrides
+        (and its own ``state_key``), e.g. {"start_date": ..., "end_date": ...}.
+        
+        Returns:
+            Config overrides, one per partition, together covering all the
+            data; None if the import cannot be split
+        """
+        return None
+    
+    def on_success(self):
+        """
+        Called when a run imported all the data without errors.
+        
+        Override to persist state that is only valid for a complete import,
+        like the watermark is (e.g. HTTP cache validators).
+        """
+        pass
+    
     @abstractmethod
     def fetch_data(self) -> List[Dict[str, Any]]:
         """
@@ -104,6 +918,9 @@ class BaseImporter(ABC):
         This method should be implemented by subclasses to define how data
         is retrieved from the source (API, file, database, etc.).
         
+        In streaming mode this may also be a generator yielding single
+        records or lists of records.
+        
         Returns:
             List of dictionaries containing raw data
         """
@@ -163,10 +980,51 @@ class BaseImporter(ABC):
         Get result dictionary with statistics.
         
         Returns:
-            Dictionary with import statistics
+            Dictionary with import statistics; a run stopped before the
+            deadline has status "incomplete" and a "checkpoint" entry
         """
-        return {
-            "status": "success" if self.stats["errors"] == 0 else "partial",
+        self.stats["metrics"] = self.metrics.as_dict(self.stats["saved"], self.stats.get("bytes_fetched"))
+        if self.stats["errors"]:
+            status = "partial"
+        elif self.stopped_early:
+            status = "incomplete"
+        else:
+            status = "success"
+        result = {
+            "status": status,
             "stats": self.stats.copy(),
             "importer": self.__class__.__name__
         }
+        if self.stopped_early:
+            # Pass back as the "checkpoint" config entry to continue the import
+            result["checkpoint"] = self.checkpoint
+        if self.emit_metrics:
+            self._emit_metrics(result)
+        return result
+    
+    def _emit_metrics(self, result: Dict[str, Any]):
+        """
+        Write the run's metrics as a CloudWatch Embedded Metric Format line.
+        
+        Args:
+            result: Result from ``_get_result``
+        """
+        metrics = result["stats"]["metrics"]
+        values = {
+            "RecordsFetched": (self.stats["fetched"], "Count"),
+            "RecordsSaved": (self.stats["saved"], "Count"),
+            "ImportErrors": (self.stats["errors"], "Count"),
+            "RecordsPerSecond": (metrics["records_per_sec"], "Count/Second"),
+            "ImportSeconds": (metrics["seconds"], "Seconds"),
+            "CpuSeconds": (metrics["cpu_seconds"], "Seconds"),
+            "PeakRssMb": (metrics["peak_rss_mb"], "Megabytes"),
+            "BytesFetched": (metrics["bytes_fetched"], "Bytes"),
+            "DbRoundTrips": (metrics["db"]["round_trips"], "Count"),
+            "DbCheckoutWaitMs": (metrics["db"]["checkout_wait_ms"], "Milliseconds"),
+        }
+        for name, stage in metrics["stages"].items():
+            values[f"{name.capitalize()}Seconds"] = (stage["wall_seconds"], "Seconds")
+        try:
+            emit_emf({"Importer": self.__class__.__name__}, values)
+        except Exception as e:
+            self.logger.warning(f"Could not emit metrics: {str(e)}")
@@ -0,0 +1,177 @@
+"""
+Content-hash change detection for importers.
+
+Each transformed record gets a stable hash of its content. Before saving,
+the hashes already stored in the target table are fetched in bulk by key and
+records whose hash did not change are dropped, so unchanged rows are never
+rewritten.
+"""
+import hashlib
+import json
+from itertools import islice
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from psycopg2 import sql
+from app.services.database import DatabaseManager, db_manager, table_identifier
+from app.logger_config import get_logger
+
+logger = get_logger(__name__)
+
+# Keys per lookup query
+LOOKUP_PAGE_SIZE = 5000
+
+
+def record_hash(record: Dict[str, Any], fields: Optional[Sequence[str]] = None) -> str:
+    """
+    Compute a stable content hash of a record.
+    
+    The hash does not depend on key order; values that are not JSON types
+    (dates, decimals) are hashed by their string form.
+    
+    Args:
+        record: Record dictionary
+        fields: Fields to include (default: all fields)
+        
+    Returns:
+        32-character hex digest
+    """
+    values = {field: record.get(field) for field in fields} if fields else record
+    payload = json.dumps(values, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ChangeDetector:
+    """
+    Drops records whose content hash matches the hash stored in the target table.
+    
+    The target table needs a text column for the hash (``hash_column``) that
+    the importer writes together with the record.
+    
+    Usage:
+        detector = ChangeDetector("imported_data", key_field="external_id")
+        changed, unchanged = detector.filter_changed(records)
+        # every record now has a "row_hash" value to save
+    """
+    
+    def __init__(
+        self,
+        table: str,
+        key_field: str = "external_id",
+        key_column: Optional[str] = None,
+        hash_column: str = "row_hash",
+        fields: Optional[Sequence[str]] = None,
+        database: Optional[DatabaseManager] = None,
+    ):
+        """
+        Initialize the detector.
+        
+        Args:
+            table: Target table holding the stored hashes
+            key_field: Record field identifying a row
+            key_column: Table column matching ``key_field`` (defaults to ``key_field``)
+            hash_column: Table column (and record field) holding the hash
+            fields: Record fields included in the hash (default: all except the hash)
+            database: Database manager (defaults to the global ``db_manager``)
+        """
+        self.table = table
+        self.key_field = key_field
+        self.key_column = key_column or key_field
+        self.hash_column = hash_column
+        self.fields = fields
+        self.database = database or db_manager
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], table: str) -> "ChangeDetector":
+        """
+        Build a detector from an importer's "change_detection" config section.
+        
+        Args:
+            config: Section with optional "table", "key", "key_column",
+                "hash_column" and "fields" keys
+            table: Default target table
+            
+        Returns:
+            Change detector
+        """
+        return cls(
+            table=config.get("table", table),
+            key_field=config.get("key", "external_id"),
+            key_column=config.get("key_column"),
+            hash_column=config.get("hash_column", "row_hash"),
+            fields=config.get("fields"),
+        )
+    
+    def hash_record(self, record: Dict[str, Any]) -> str:
+        """Hash a record, ignoring a previously set hash field."""
+        if self.fields:
+            return record_hash(record, self.fields)
+        return record_hash({k: v for k, v in record.items() if k != self.hash_column})
+    
+    def fetch_hashes(self, keys: Iterable[Any]) -> Dict[str, str]:
+        """
+        Fetch the stored hashes of the given keys.
+        
+        Keys are passed with their Python types so the lookup can use the
+        key column's index; they must match the column type.
+        
+        Args:
+            keys: Row keys
+            
+        Returns:
+            Mapping of key (as string) to stored hash
+        """
+        query = sql.SQL(
+            "SELECT {key} AS key, {hash} AS hash FROM {table} WHERE {key} = ANY(%s)"
+        ).format(
+            key=sql.Identifier(self.key_column),
+            hash=sql.Identifier(self.hash_column),
+            table=table_identifier(self.table),
+        )
+        stored = {}
+        keys = iter(keys)
+        while True:
+            page = list(islice(keys, LOOKUP_PAGE_SIZE))
+            if not page:
+                return stored
+            for row in self.database.execute_query(query, (page,)):
+                stored[str(row["key"])] = row["hash"]
+    
+    def filter_changed(
+        self, records: List[Any], columns: Optional[Sequence[str]] = None
+    ) -> Tuple[List[Any], List[Any]]:
+        """
+        Split records into new/changed and unchanged ones.
+        
+        Sets ``record[hash_column]`` on every dictionary record. Tuple records
+        (when ``columns`` is given) are returned with the hash appended as
+        their last element.
+        
+        Args:
+            records: Transformed records (dictionaries, or tuples in ``columns`` order)
+            columns: Column names of tuple records
+            
+        Returns:
+            Tuple of (new or changed records, unchanged records)
+        """
+        if columns is None:
+            for record in records:
+                record[self.hash_column] = self.hash_record(record)
+            get_key = lambda record: record.get(self.key_field)
+            get_hash = itemgetter(self.hash_column)
+        else:
+            columns = list(columns)
+            records = [record + (self.hash_record(dict(zip(columns, record))),) for record in records]
+            get_key = itemgetter(columns.index(self.key_field))
+            get_hash = itemgetter(len(columns))
+        
+        keys = {key for key in map(get_key, records) if key is not None}
+        stored = self.fetch_hashes(keys)
+        
+        changed, unchanged = [], []
+        for record in records:
+            key = get_key(record)
+            if key is not None and stored.get(str(key)) == get_hash(record):
+                unchanged.append(record)
+            else:
+                changed.append(record)
+        return changed, unchanged
@@ -0,0 +1,184 @@
+"""
+Streaming CSV source with bounded memory.
+
+Reads a CSV file batch by batch as tuples plus a header index, instead of
+loading every row into a dictionary. Gzip and bzip2 compressed files are
+decompressed transparently, and reading can resume at a byte offset.
+"""
+import bz2
+import csv
+import gzip
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+from app.logger_config import get_logger
+
+logger = get_logger(__name__)
+
+# Default number of rows per batch
+DEFAULT_BATCH_SIZE = 1000
+
+# File signatures of supported compression formats
+GZIP_MAGIC = b"\x1f\x8b"
+BZIP2_MAGIC = b"BZh"
+
+
+def open_binary(path: str, compression: str = "auto") -> IO[bytes]:
+    """
+    Open a possibly compressed file for binary reading.
+    
+    Args:
+        path: File path
+        compression: "auto" (detect from the file signature), "gzip", "bz2" or "none"
+    
+    Returns:
+        Binary file object yielding decompressed bytes
+    """
+    if compression == "auto":
+        with open(path, "rb") as f:
+            signature = f.read(3)
+        if signature.startswith(GZIP_MAGIC):
+            compression = "gzip"
+        elif signature.startswith(BZIP2_MAGIC):
+            compression = "bz2"
+        else:
+            compression = "none"
+    
+    if compression == "gzip":
+        return gzip.open(path, "rb")
+    if compression == "bz2":
+        return bz2.open(path, "rb")
+    if compression == "none":
+        return open(path, "rb")
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+class CSVSource:
+    """
+    Batch-wise CSV reader.
+    
+    Rows are yielded as tuples in batches of ``batch_size``; ``header`` holds
+    the column names and ``index`` maps each name to its tuple position.
+    ``offset`` is the byte position (in the decompressed data) right after
+    the last row yielded, and can be passed as ``start_offset`` to a new
+    source to continue from there.
+    
+    Usage:
+        source = CSVSource("export.csv.gz", batch_size=5000)
+        for batch in source.iter_batches():
+            for row in batch:
+                email = row[source.index["email"]]
+        resume_at = source.offset
+    """
+    
+    def __init__(
+        self,
+        path: str,
+        delimiter: str = ",",
+        encoding: str = "utf-8",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        start_offset: int = 0,
+        compression: str = "auto",
+        end_offset: Optional[int] = None,
+    ):
+        """
+        Initialize the source.
+        
+        Args:
+            path: CSV file path (plain, .gz or .bz2)
+            delimiter: Field delimiter
+            encoding: Text encoding (must be ASCII compatible, e.g. utf-8 or latin-1)
+            batch_size: Number of rows per batch
+            start_offset: Byte offset of the first row to read (0 = after the header)
+            compression: "auto", "gzip", "bz2" or "none"
+            end_offset: Byte offset of a record boundary to stop at (None = end of file)
+        """
+        self.path = path
+        self.delimiter = delimiter
+        self.encoding = encoding
+        self.batch_size = batch_size
+        self.start_offset = start_offset
+        self.compression = compression
+        self.end_offset = end_offset
+        self.header: Tuple[str, ...] = ()
+        self.index: Dict[str, int] = {}
+        self.offset = start_offset
+        self.rows_read = 0
+        self._consumed = 0
+    
+    def _lines(self, f: IO[bytes]) -> Iterator[str]:
+        """Yield decoded lines while counting the bytes consumed."""
+        for line in f:
+            self._consumed += len(line)
+            yield line.decode(self.encoding)
+    
+    def iter_batches(self) -> Iterator[List[Tuple[str, ...]]]:
+        """
+        Read the file batch by batch.
+        
+        Yields:
+            Lists of up to ``batch_size`` row tuples
+        """
+        with open_binary(self.path, self.compression) as f:
+            self._consumed = 0
+            lines = self._lines(f)
+            reader = csv.reader(lines, delimiter=self.delimiter)
+            
+            header = next(reader, None)
+            if header is None:
+                return
+            if header and header[0].startswith("\ufeff"):
+                header[0] = header[0][1:]
+            self.set_header(tuple(column.strip() for column in header))
+            
+            if self.start_offset > self._consumed:
+                # Compressed streams emulate seek() by decompressing up to the offset
+                f.seek(self.start_offset)
+                self._consumed = self.start_offset
+                reader = csv.reader(self._lines(f), delimiter=self.delimiter)
+                logger.info(f"Resuming {self.path} at byte offset {self.start_offset}")
+            self.offset = self._consumed
+            
+            batch: List[Tuple[str, ...]] = []
+            # Start of the next row
+            position = self._consumed
+            for row in reader:
+                if self.end_offset is not None and position >= self.end_offset:
+                    break
+                position = self._consumed
+                if not row:
+                    continue
+                batch.append(tuple(row))
+                if len(batch) >= self.batch_size:
+                    self.rows_read += len(batch)
+                    self.offset = position
+                    yield batch
+                    batch = []
+            
+            if batch:
+                self.rows_read += len(batch)
+                self.offset = position
+                yield batch
+    
+    def set_header(self, header: Tuple[str, ...]):
+        """
+        Use a header read elsewhere (e.g. by a parallel reader).
+        
+        Args:
+            header: Column names
+        """
+        self.header = tuple(header)
+        self.index = {column: position for position, column in enumerate(self.header)}
+    
+    def column(self, *names: str) -> Optional[int]:
+        """
+        Get the position of the first of ``names`` present in the header.
+        
+        Args:
+            names: Candidate column names, e.g. ("ID", "id")
+        
+        Returns:
+            Tuple position, or None if no candidate is present
+        """
+        for name in names:
+            if name in self.index:
+                return self.index[name]
+        return None
@@ -3,16 +3,146 @@ Database connection and utility functions.
 
 This module provides database connection management for the data importer.
 """
+import json
+import threading
+from contextvars import ContextVar
+import time
+import uuid
 import psycopg2
-from psycopg2 import pool
-from psycopg2.extras import RealDictCursor
-from typing import Optional, List, Dict, Any
+from datetime import date, datetime
+from itertools import islice
+from psycopg2 import extensions, pool, sql
+from psycopg2.extras import RealDictCursor, execute_values
+from typing import Optional, List, Dict, Any, Callable, Iterable, Iterator, Sequence
 from contextlib import contextmanager
-from app.config import DB_HOST, DB_NAME, DB_USER, DB_PASSWORD, DB_PORT
+from app.config import (
+    DB_HOST, DB_NAME, DB_USER, DB_PASSWORD, DB_PORT,
+    DB_CONNECT_TIMEOUT, DB_HEALTHCHECK_INTERVAL,
+    DB_POOL_MIN_CONN, DB_POOL_MAX_CONN, DB_POOL_TIMEOUT,
+)
 from app.logger_config import get_logger
 
 logger = get_logger(__name__)
 
+# Bytes handed to COPY per read() call
+COPY_BUFFER_SIZE = 64 * 1024
+
+# Rows per multi-row VALUES statement in upsert_many()
+DEFAULT_PAGE_SIZE = 500
+
+# Rows fetched per round trip by stream_query()
+DEFAULT_ITERSIZE = 2000
+
+# Receiver of database counters (see collect_db_stats); a context variable
+# is per thread and also follows asyncio tasks
+_collector: ContextVar[Optional[Callable[[str, float], None]]] = ContextVar("db_stats_collector", default=None)
+
+
+@contextmanager
+def collect_db_stats(record: Callable[[str, float], None]):
+    """
+    Report the database activity of the current thread (or asyncio task) while the block runs.
+    
+    ``record(name, value)`` is called with "round_trips" (statements, COPYs
+    and commits sent), "checkouts" and "checkout_wait_ms" (time spent waiting
+    for a pooled connection). Blocks can be nested; the innermost receives
+    the counters.
+    
+    Usage:
+        with collect_db_stats(lambda name, value: totals.update({name: totals.get(name, 0) + value})):
+            db_manager.upsert_many(...)
+    
+    Args:
+        record: Function called for every counter increment
+    """
+    token = _collector.set(record)
+    try:
+        yield
+    finally:
+        _collector.reset(token)
+
+
+def _record_db(name: str, value: float = 1):
+    """Pass a counter increment to the current collector, if any."""
+    record = _collector.get()
+    if record is not None:
+        record(name, value)
+
+
+class _CountingCursor(RealDictCursor):
+    """Dictionary cursor that counts the statements it sends."""
+    
+    def execute(self, query, vars=None):
+        _record_db("round_trips")
+        return super().execute(query, vars)
+    
+    def executemany(self, query, vars_list):
+        _record_db("round_trips")
+        return super().executemany(query, vars_list)
+    
+    def copy_expert(self, sql, file, size=8192):
+        _record_db("round_trips")
+        return super().copy_expert(sql, file, size)
+
+
+def table_identifier(name: str) -> sql.Composable:
+    """
+    Quote a (optionally schema-qualified) table name.
+    
+    Args:
+        name: Table name, e.g. "imported_data" or "public.imported_data"
+        
+    Returns:
+        Safely quoted SQL identifier
+    """
+    return sql.Identifier(*name.split("."))
+
+
+def _copy_csv_value(value: Any) -> str:
+    """Encode a single value as a COPY CSV field (unquoted empty field is NULL)."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        text = "t" if value else "f"
+    elif isinstance(value, (datetime, date)):
+        text = value.isoformat()
+    elif isinstance(value, (dict, list)):
+        text = json.dumps(value, default=str)
+    else:
+        text = str(value)
+    return '"' + text.replace('"', '""') + '"'
+
+
+class _CopyStream:
+    """
+    File-like adapter that encodes an iterator of tuples as COPY CSV input.
+    
+    Rows are pulled from the iterator only when PostgreSQL asks for more data,
+    so the full row set is never materialised in memory.
+    """
+    
+    def __init__(self, rows: Iterable[Sequence[Any]]):
+        self._rows = iter(rows)
+        self._buffer = ""
+        self.row_count = 0
+    
+    def read(self, size: int = -1) -> str:
+        if size is None or size < 0:
+            size = COPY_BUFFER_SIZE
+        parts = [self._buffer]
+        length = len(self._buffer)
+        while length < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            line = ",".join(_copy_csv_value(value) for value in row) + "\n"
+            parts.append(line)
+            length += len(line)
+            self.row_count += 1
+        data = "".join(parts)
+        self._buffer = data[size:]
+        return data[:size]
+
 
 class DatabaseManager:
     """
@@ -20,34 +150,127 @@ class DatabaseManager:
     
     This class manages database connections and provides utility methods
     for common database operations.
+    
+    The pool is created lazily on the first ``get_connection()`` call, so
+    importing this module never touches the database. The pool then lives as
+    long as the process, which lets warm Lambda invocations reuse it.
+    Connections that were idle longer than ``healthcheck_interval`` seconds
+    (e.g. across a Lambda freeze/thaw) are validated before being handed out
+    and replaced if they are dead.
+    
+    The manager is shared by importers running in parallel threads. When all
+    ``max_conn`` connections are checked out, ``get_connection()`` waits up
+    to ``pool_timeout`` seconds for one to be returned instead of failing
+    immediately.
+    
+    By default the manager connects with the DB_* settings; pass
+    ``connection`` to read from another database, e.g. the source of a
+    database-to-database import.
     """
     
     _connection_pool: Optional[pool.ThreadedConnectionPool] = None
     
-    def __init__(self):
-        """Initialize database manager."""
-        self.min_conn = 1
-        self.max_conn = 5
-        self._create_pool()
+    def __init__(
+        self,
+        healthcheck_interval: float = DB_HEALTHCHECK_INTERVAL,
+        min_conn: int = DB_POOL_MIN_CONN,
+        max_conn: int = DB_POOL_MAX_CONN,
+        pool_timeout: float = DB_POOL_TIMEOUT,
+        connection: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Initialize database manager.
+        
+        Args:
+            healthcheck_interval: Idle seconds after which a pooled connection
+                is validated with a lightweight query before use
+            min_conn: Connections opened when the pool is created
+            max_conn: Maximum number of open connections
+            pool_timeout: Seconds to wait for a free connection when all are in use
+            connection: psycopg2 connection parameters replacing the DB_* settings,
+                e.g. {"dsn": "postgresql://..."} or {"host": ..., "dbname": ...}
+        """
+        self.connection = dict(connection or {})
+        self.min_conn = min_conn
+        self.max_conn = max_conn
+        self.pool_timeout = pool_timeout
+        self.healthcheck_interval = healthcheck_interval
+        self._connection_pool = None
+        self._pool_lock = threading.Lock()
+        # One slot per pooled connection; ThreadedConnectionPool itself fails when exhausted
+        self._slots = threading.BoundedSemaphore(max_conn)
+        self._last_used: Dict[int, float] = {}
+        self.timings: Dict[str, Optional[float]] = {
+            "connect_ms": None,
+            "first_query_ms": None
+        }
     
     def _create_pool(self):
         """Create connection pool."""
         try:
+            params: Dict[str, Any] = {"connect_timeout": DB_CONNECT_TIMEOUT, "keepalives": 1}
+            if not self.connection:
+                params.update(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASSWORD, port=DB_PORT)
+            params.update(self.connection)
+            started = time.perf_counter()
             self._connection_pool = pool.ThreadedConnectionPool(
                 minconn=self.min_conn,
                 maxconn=self.max_conn,
-                host=DB_HOST,
-                database=DB_NAME,
-                user=DB_USER,
-                password=DB_PASSWORD,
-                port=DB_PORT,
-                cursor_factory=RealDictCursor
+                cursor_factory=_CountingCursor,
+                **params
             )
-            logger.info("Database connection pool created successfully")
+            self.timings["connect_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            logger.info(f"Database connection pool created successfully in {self.timings['connect_ms']} ms")
         except Exception as e:
             logger.error(f"Error creating database connection pool: {str(e)}")
             raise
     
+    def _get_pool(self) -> pool.ThreadedConnectionPool:
+        """Return the connection pool, creating it on first use (thread-safe)."""
+        if self._connection_pool is None:
+            with self._pool_lock:
+                if self._connection_pool is None:
+                    self._create_pool()
+        return self._connection_pool
+    
+    def _is_healthy(self, conn) -> bool:
+        """
+        Check whether a pooled connection can still be used.
+        
+        Recently used connections are trusted; idle ones are probed with ``SELECT 1``.
+        """
+        if conn.closed:
+            return False
+        last_used = self._last_used.get(id(conn))
+        if last_used is not None and time.monotonic() - last_used < self.healthcheck_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error as e:
+            logger.warning(f"Discarding stale database connection: {str(e)}")
+            return False
+    
+    def _checkout(self):
+        """
+        Take a healthy connection from the pool, replacing stale ones.
+        
+        Returns:
+            Tuple of (pool, connection); the connection goes back to that pool
+            even if ``close_pool()`` runs meanwhile
+        """
+        connection_pool = self._get_pool()
+        # Every pooled connection may have died during a freeze; try each once
+        for _ in range(self.max_conn + 1):
+            conn = connection_pool.getconn()
+            if self._is_healthy(conn):
+                return connection_pool, conn
+            self._last_used.pop(id(conn), None)
+            connection_pool.putconn(conn, close=True)
+        raise psycopg2.OperationalError("Could not obtain a healthy database connection")
+    
     @contextmanager
     def get_connection(self):
         """
@@ -59,19 +282,47 @@ class DatabaseManager:
                     cur.execute("SELECT * FROM table")
                     result = cur.fetchall()
         """
-        if self._connection_pool is None:
-            self._create_pool()
-        
-        conn = self._connection_pool.getconn()
+        waiting = time.perf_counter()
+        if not self._slots.acquire(timeout=self.pool_timeout):
+            raise pool.PoolError(f"No database connection available within {self.pool_timeout}s")
+        try:
+            connection_pool, conn = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+        _record_db("checkouts")
+        _record_db("checkout_wait_ms", (time.perf_counter() - waiting) * 1000)
+        first_use = self.timings["first_query_ms"] is None
+        started = time.perf_counter()
         try:
             yield conn
             conn.commit()
+            _record_db("round_trips")
+            if first_use:
+                self.timings["first_query_ms"] = round((time.perf_counter() - started) * 1000, 2)
         except Exception as e:
-            conn.rollback()
+            if not conn.closed:
+                conn.rollback()
             logger.error(f"Database error: {str(e)}")
             raise
         finally:
-            self._connection_pool.putconn(conn)
+            self._last_used[id(conn)] = time.monotonic()
+            try:
+                connection_pool.putconn(conn, close=bool(conn.closed))
+            except pool.PoolError:
+                # close_pool() ran meanwhile
+                conn.close()
+            self._slots.release()
+    
+    def get_timings(self) -> Dict[str, Optional[float]]:
+        """
+        Get cold-start timings.
+        
+        Returns:
+            Dictionary with "connect_ms" (pool creation) and "first_query_ms"
+            (first connection checkout to commit); None until measured
+        """
+        return dict(self.timings)
     
     def execute_query(self, query: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
         """
@@ -89,6 +340,50 @@ class DatabaseManager:
                 cur.execute(query, params)
                 return cur.fetchall()
     
+    def stream_query(
+        self,
+        query: Any,
+        params: Optional[Sequence[Any]] = None,
+        itersize: int = DEFAULT_ITERSIZE,
+        tuples: bool = False,
+    ) -> Iterator[List[Any]]:
+        """
+        Run a SELECT query with a server-side (named) cursor, yielding its rows in batches.
+        
+        Only ``itersize`` rows are held in memory at a time, however large the
+        result. The connection and its transaction stay open until the
+        generator is exhausted or closed, so consume it promptly.
+        
+        Usage:
+            for rows in db_manager.stream_query("SELECT * FROM big_table", itersize=5000, tuples=True):
+                process(rows)
+        
+        Args:
+            query: SQL query string or ``psycopg2.sql`` composable
+            params: Optional query parameters
+            itersize: Rows fetched per round trip (and per yielded list)
+            tuples: Return rows as tuples instead of dictionaries (less memory and CPU)
+            
+        Yields:
+            Lists of at most ``itersize`` rows
+        """
+        if itersize < 1:
+            raise ValueError("itersize must be a positive integer")
+        cursor_factory = extensions.cursor if tuples else RealDictCursor
+        with self.get_connection() as conn:
+            with conn.cursor(name=f"stream_{uuid.uuid4().hex}", cursor_factory=cursor_factory) as cur:
+                cur.itersize = itersize
+                cur.execute(query, params)
+                _record_db("round_trips")
+                while True:
+                    rows = cur.fetchmany(itersize)
+                    _record_db("round_trips")
+                    if rows:
+                        yield rows
+                    # A short batch is the last one: no need for an empty FETCH
+                    if len(rows) < itersize:
+                        break
+    
     def execute_update(self, query: str, params: Optional[tuple] = None) -> int:
         """
         Execute an INSERT/UPDATE/DELETE query.
@@ -109,12 +404,16 @@ class DatabaseManager:
         """
         Execute a batch insert/update.
         
+        Note: psycopg2 sends the statements in pages, so the returned row count
+        only covers the last page. Use ``upsert_many()`` when accurate counts
+        are needed.
+        
         Args:
             query: SQL query string with placeholders
             data: List of tuples containing data for each row
             
         Returns:
-            Number of affected rows
+            Number of affected rows (last page only)
         """
         with self.get_connection() as conn:
             with conn.cursor() as cur:
@@ -122,12 +421,208 @@ class DatabaseManager:
                 execute_batch(cur, query, data)
                 return cur.rowcount
     
+    def upsert_many(
+        self,
+        table: str,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        conflict_columns: Sequence[str] = ("external_id",),
+        update_columns: Optional[Sequence[str]] = None,
+        update_expressions: Optional[Dict[str, str]] = None,
+        update_where: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        template: Optional[str] = None,
+    ) -> Dict[str, int]:
+        """
+        Upsert rows with multi-row ``INSERT ... VALUES`` statements.
+        
+        Each page of ``page_size`` rows is sent as a single statement ending in
+        ``RETURNING (xmax = 0)``, which tells inserted rows apart from updated
+        ones. Counts are summed over all pages. All pages run in one transaction.
+        
+        Usage:
+            result = db_manager.upsert_many(
+                "imported_data",
+                ["external_id", "name", "metadata"],
+                rows,
+                update_columns=["name"],
+                update_expressions={"updated_at": "NOW()"},
+                template="(%s, %s, %s::jsonb)",
+            )
+            # {"inserted": 10, "updated": 90, "skipped": 0}
+        
+        Args:
+            table: Target table name
+            columns: Target columns, in the same order as the row values
+            rows: Iterable of tuples (consumed one page at a time)
+            conflict_columns: Columns of the unique constraint used for ON CONFLICT
+            update_columns: Columns to overwrite on conflict (default: all
+                non-conflict columns). Empty means DO NOTHING on conflict.
+            update_expressions: Extra SET assignments as raw SQL, e.g. {"updated_at": "NOW()"}
+            update_where: Optional raw SQL condition for DO UPDATE, e.g.
+                "imported_data.row_hash IS DISTINCT FROM EXCLUDED.row_hash"; conflicting
+                rows that fail it are left untouched
+            page_size: Number of rows per statement
+            template: Optional row template with casts, e.g. "(%s, %s::jsonb)"
+            
+        Returns:
+            Dictionary with "inserted", "updated" and "skipped" (conflicting rows
+            that were not updated) counts
+        """
+        if update_columns is None:
+            update_columns = [column for column in columns if column not in conflict_columns]
+        if page_size < 1:
+            raise ValueError("page_size must be a positive integer")
+        
+        query = sql.SQL(
+            "INSERT INTO {table} ({columns}) VALUES %s {on_conflict} RETURNING (xmax = 0)"
+        ).format(
+            table=table_identifier(table),
+            columns=sql.SQL(", ").join(sql.Identifier(column) for column in columns),
+            on_conflict=self._on_conflict_clause(
+                conflict_columns, update_columns, update_expressions, update_where
+            ),
+        )
+        
+        result = {"inserted": 0, "updated": 0, "skipped": 0}
+        rows = iter(rows)
+        with self.get_connection() as conn:
+            # Plain tuple cursor: only the (xmax = 0) flag is returned
+            with conn.cursor(cursor_factory=extensions.cursor) as cur:
+                while True:
+                    page = list(islice(rows, page_size))
+                    if not page:
+                        break
+                    returned = execute_values(
+                        cur, query, page, template=template, page_size=len(page), fetch=True
+                    )
+                    inserted = sum(1 for (is_insert,) in returned if is_insert)
+                    result["inserted"] += inserted
+                    result["updated"] += len(returned) - inserted
+                    result["skipped"] += len(page) - len(returned)
+        
+        logger.info(
+            f"Upsert into {table}: {result['inserted']} inserted, "
+            f"{result['updated']} updated, {result['skipped']} skipped"
+        )
+        return result
+    
+    def copy_upsert(
+        self,
+        table: str,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        conflict_columns: Sequence[str] = ("external_id",),
+        update_columns: Optional[Sequence[str]] = None,
+        update_expressions: Optional[Dict[str, str]] = None,
+        update_where: Optional[str] = None,
+    ) -> int:
+        """
+        Bulk upsert rows using COPY into a staging table.
+        
+        Rows are streamed with ``COPY ... FROM STDIN`` (CSV format) into a
+        temporary table that has the same column types as the target, and then
+        merged with a single ``INSERT ... SELECT ... ON CONFLICT`` statement.
+        Everything runs in one transaction.
+        
+        Usage:
+            db_manager.copy_upsert(
+                "imported_data",
+                ["external_id", "name", "email"],
+                rows,  # any iterable of tuples, e.g. a generator
+                update_columns=["name", "email"],
+                update_expressions={"updated_at": "NOW()"},
+            )
+        
+        Args:
+            table: Target table name
+            columns: Target columns, in the same order as the row values
+            rows: Iterable of tuples (consumed lazily)
+            conflict_columns: Columns of the unique constraint used for ON CONFLICT
+            update_columns: Columns to overwrite on conflict (default: all
+                non-conflict columns). Empty means DO NOTHING on conflict.
+            update_expressions: Extra SET assignments as raw SQL, e.g. {"updated_at": "NOW()"}
+            update_where: Optional raw SQL condition for DO UPDATE, e.g.
+                "imported_data.row_hash IS DISTINCT FROM EXCLUDED.row_hash"; conflicting
+                rows that fail it are left untouched
+            
+        Returns:
+            Number of rows inserted or updated in the target table
+        """
+        if update_columns is None:
+            update_columns = [column for column in columns if column not in conflict_columns]
+        
+        staging = sql.Identifier(f"_staging_{table.replace('.', '_')}")
+        column_list = sql.SQL(", ").join(sql.Identifier(column) for column in columns)
+        
+        create_staging = sql.SQL(
+            "CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+            "SELECT {columns} FROM {table} WITH NO DATA"
+        ).format(staging=staging, columns=column_list, table=table_identifier(table))
+        copy_into_staging = sql.SQL(
+            "COPY {staging} ({columns}) FROM STDIN WITH (FORMAT csv)"
+        ).format(staging=staging, columns=column_list)
+        merge = sql.SQL(
+            "INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} {on_conflict}"
+        ).format(
+            table=table_identifier(table),
+            columns=column_list,
+            staging=staging,
+            on_conflict=self._on_conflict_clause(
+                conflict_columns, update_columns, update_expressions, update_where
+            ),
+        )
+        
+        stream = _CopyStream(rows)
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(create_staging)
+                cur.copy_expert(copy_into_staging.as_string(conn), stream, size=COPY_BUFFER_SIZE)
+                cur.execute(merge)
+                rows_affected = cur.rowcount
+        
+        logger.info(f"COPY upsert into {table}: staged {stream.row_count} rows, {rows_affected} affected")
+        return rows_affected
+    
+    @staticmethod
+    def _on_conflict_clause(
+        conflict_columns: Sequence[str],
+        update_columns: Sequence[str],
+        update_expressions: Optional[Dict[str, str]] = None,
+        update_where: Optional[str] = None,
+    ) -> sql.Composable:
+        """Build an ``ON CONFLICT (...) DO UPDATE SET ... [WHERE ...]`` (or DO NOTHING) clause."""
+        conflict = sql.SQL(", ").join(sql.Identifier(column) for column in conflict_columns)
+        assignments = [
+            sql.SQL("{column} = EXCLUDED.{column}").format(column=sql.Identifier(column))
+            for column in update_columns
+        ]
+        assignments.extend(
+            sql.SQL("{column} = {expression}").format(
+                column=sql.Identifier(column), expression=sql.SQL(expression)
+            )
+            for column, expression in (update_expressions or {}).items()
+        )
+        if not assignments:
+            return sql.SQL("ON CONFLICT ({conflict}) DO NOTHING").format(conflict=conflict)
+        clause = sql.SQL("ON CONFLICT ({conflict}) DO UPDATE SET {assignments}").format(
+            conflict=conflict, assignments=sql.SQL(", ").join(assignments)
+        )
+        if update_where:
+            clause = sql.SQL("{clause} WHERE {condition}").format(
+                clause=clause, condition=sql.SQL(update_where)
+            )
+        return clause
+    
     def close_pool(self):
         """Close all connections in the pool."""
-        if self._connection_pool:
-            self._connection_pool.closeall()
-            logger.info("Database connection pool closed")
+        with self._pool_lock:
+            if self._connection_pool:
+                self._connection_pool.closeall()
+                self._connection_pool = None
+                self._last_used.clear()
+                logger.info("Database connection pool closed")
 
 
-# Global database manager instance
+# Global database manager instance (the pool is created on first use)
 db_manager = DatabaseManager()
@@ -0,0 +1,147 @@
+"""
+Deduplication of transformed records by key before they are saved.
+
+A multi-row ``INSERT ... ON CONFLICT DO UPDATE`` fails with "ON CONFLICT DO
+UPDATE command cannot affect row a second time" when one statement holds
+the same key twice, and the whole chunk rolls back. ``Deduplicator`` keeps
+one record per key in every chunk, found through a hash index (a dict from
+key to position) in a single pass.
+
+Which record is kept:
+- "last": the last one (what successive upserts would leave behind)
+- "first": the first one
+- "latest": the one with the highest ``order_field`` value (ties: the last)
+
+With "first" and "latest" the keys of earlier chunks are remembered too, up
+to ``window`` keys (least recently seen ones are forgotten first), so a
+streamed import does not overwrite a kept record with a later chunk's
+duplicate while memory stays bounded. "last" needs no memory across chunks:
+later chunks are saved later and win anyway.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# Which duplicate is kept
+KEEP_LAST = "last"
+KEEP_FIRST = "first"
+KEEP_LATEST = "latest"
+
+# Keys of earlier chunks remembered by "first" and "latest"
+DEFAULT_WINDOW = 100000
+
+
+class Deduplicator:
+    """
+    Keeps one record per key.
+    
+    Usage:
+        dedup = Deduplicator(["customer_id", "date"], keep="latest", order_field="updated_at")
+        records, duplicates = dedup.deduplicate(records, get_key, get_order)
+    """
+    
+    def __init__(
+        self,
+        key: Union[str, Sequence[str]] = "external_id",
+        keep: str = KEEP_LAST,
+        order_field: Optional[str] = None,
+        window: int = DEFAULT_WINDOW,
+    ):
+        """
+        Initialize the deduplicator.
+        
+        Args:
+            key: Record field, or fields, identifying a row (the upsert's conflict columns)
+            keep: "last", "first" or "latest"
+            order_field: Field compared by "latest", e.g. "updated_at"
+            window: Keys of earlier chunks remembered by "first" and "latest" (0: none)
+        """
+        if keep not in (KEEP_LAST, KEEP_FIRST, KEEP_LATEST):
+            raise ValueError(f"Unknown dedup keep mode: {keep}")
+        if keep == KEEP_LATEST and not order_field:
+            raise ValueError('Dedup keep mode "latest" needs an order_field')
+        self.key_fields: Tuple[str, ...] = (key,) if isinstance(key, str) else tuple(key)
+        self.keep = keep
+        self.order_field = order_field
+        self.window = window
+        # Key -> order value of the record kept for it in an earlier chunk
+        self._seen: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "Deduplicator":
+        """
+        Build a deduplicator from an importer's "dedup" config section.
+        
+        Args:
+            config: Section with optional "key", "keep", "order_field" and "window" keys
+        
+        Returns:
+            Deduplicator
+        """
+        return cls(
+            key=config.get("key", "external_id"),
+            keep=config.get("keep", KEEP_LAST),
+            order_field=config.get("order_field"),
+            window=int(config.get("window", DEFAULT_WINDOW)),
+        )
+    
+    def deduplicate(
+        self,
+        records: List[Any],
+        get_key: Callable[[Any], Any],
+        get_order: Optional[Callable[[Any], Any]] = None,
+    ) -> Tuple[List[Any], List[Any]]:
+        """
+        Keep one record per key.
+        
+        Records without a key (None) are all kept: they cannot conflict.
+        
+        Args:
+            records: Transformed records of a chunk
+            get_key: Function returning a record's key (hashable)
+            get_order: Function returning a record's ``order_field`` value ("latest" only)
+        
+        Returns:
+            Tuple of (kept records in their original order, dropped duplicates)
+        """
+        kept: List[Any] = []
+        dropped: List[Any] = []
+        index: Dict[Any, int] = {}
+        latest = self.keep == KEEP_LATEST
+        with self._lock:
+            seen = self._seen
+            for record in records:
+                key = get_key(record)
+                if key is None:
+                    kept.append(record)
+                    continue
+                position = index.get(key)
+                if position is None:
+                    if key in seen and not (latest and self._newer(get_order(record), seen[key])):
+                        dropped.append(record)
+                        continue
+                    index[key] = len(kept)
+                    kept.append(record)
+                elif self.keep == KEEP_LAST or (latest and self._newer(get_order(record), get_order(kept[position]))):
+                    dropped.append(kept[position])
+                    kept[position] = record
+                else:
+                    dropped.append(record)
+            if self.keep != KEEP_LAST and self.window > 0:
+                self._remember(index, kept, get_order)
+        return kept, dropped
+    
+    @staticmethod
+    def _newer(value: Any, kept: Any) -> bool:
+        """Check whether an order value replaces the kept one ("latest"; missing values never win)."""
+        return value is not None and (kept is None or value >= kept)
+    
+    def _remember(self, index: Dict[Any, int], kept: List[Any], get_order: Optional[Callable[[Any], Any]]):
+        """Add a chunk's keys to the window of seen keys, forgetting the oldest beyond it."""
+        seen = self._seen
+        for key, position in index.items():
+            seen[key] = get_order(kept[position]) if self.keep == KEEP_LATEST else None
+            seen.move_to_end(key)
+        while len(seen) > self.window:
+            seen.popitem(last=False)
@@ -0,0 +1,306 @@
+"""
+Planner/worker (fan-out) runs: one import spread over many invocations.
+
+A single invocation has at most 15 minutes on one instance. In fan-out
+mode a planner invocation splits each import job into partitions
+(``BaseImporter.plan_partitions``: date ranges, key ranges, file byte
+ranges, ...) and writes them to a work queue (app/services/work_queue.py).
+Worker invocations claim and import one partition at a time until the queue
+is empty, so throughput grows with the number of workers.
+
+Events:
+    {"fanout": "plan", "importers": [...]}   # job specs, as for the orchestrator
+    {"fanout": "work", "importers": ["ads_backfill"]}   # job names
+
+Each partition runs as its own importer job with its own ``state_key``, so
+checkpoints are kept per partition: a partition stopped at a worker's
+deadline goes back to the queue with its checkpoint and another worker
+continues it. Failed partitions are retried by later claims (see
+``WorkQueue.max_attempts``).
+
+Outside Lambda, ``run_workers`` starts local worker processes that play
+the role of the worker invocations.
+"""
+import importlib
+import os
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from app.config import IMPORT_TIME_MARGIN_MS
+from app.services.orchestrator import ImportJob, Orchestrator, jobs_from_event
+from app.services.registry import get_importer
+from app.services.work_queue import FAILED, PENDING, RUNNING, Partition, WorkQueue, get_work_queue
+from app.logger_config import get_logger
+
+logger = get_logger(__name__)
+
+# Fan-out event modes
+PLAN = "plan"
+WORK = "work"
+
+
+def partition_specs(job: ImportJob) -> List[Dict[str, Any]]:
+    """
+    Split an import job into partition job specs.
+    
+    Args:
+        job: Import job
+    
+    Returns:
+        Job specs, one per partition; an importer that cannot be split gives
+        a single partition importing everything
+    """
+    config = job.to_spec()["config"]
+    importer = get_importer(job.importer)(config=config)
+    overrides = importer.plan_partitions()
+    if overrides is None:
+        logger.info(f"Importer '{job.name}' cannot be split, queueing it as one partition")
+        overrides = [{}]
+    return [
+        {
+            "name": f"{job.name}#{index}",
+            "importer": job.importer,
+            "config": {**config, **override, "state_key": f"{importer.state_key}#{index}"},
+        }
+        for index, override in enumerate(overrides)
+    ]
+
+
+def plan(jobs: List[ImportJob], queue: WorkQueue) -> Dict[str, Any]:
+    """
+    Queue the partitions of import jobs, replacing earlier plans of the same jobs.
+    
+    Args:
+        jobs: Import jobs
+        queue: Work queue
+    
+    Returns:
+        Dictionary with the overall "status", per-job "results" with the
+        number of "partitions" and a "summary"
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    for job in jobs:
+        try:
+            partitions = queue.enqueue(job.name, partition_specs(job))
+            results[job.name] = {"status": "success", "partitions": partitions, "importer": job.importer}
+            logger.info(f"Queued {partitions} partitions of '{job.name}'")
+        except Exception as e:
+            logger.error(f"Planning '{job.name}' failed: {str(e)}", exc_info=True)
+            results[job.name] = {"status": "failed", "error": str(e), "importer": job.importer}
+    
+    failed = sum(result["status"] == "failed" for result in results.values())
+    return {
+        "status": "failed" if failed == len(results) and results else ("partial" if failed else "success"),
+        "results": results,
+        "summary": {
+            "jobs": len(results),
+            "partitions": sum(result.get("partitions", 0) for result in results.values()),
+            "failed": failed,
+        },
+        "continuation": None,
+    }
+
+
+class Worker:
+    """
+    Claims and imports partitions until the queue is empty or time runs out.
+    
+    Usage:
+        worker = Worker(get_work_queue(), remaining_ms=context.get_remaining_time_in_millis)
+        result = worker.run(["ads_backfill"])
+    """
+    
+    def __init__(
+        self,
+        queue: WorkQueue,
+        name: Optional[str] = None,
+        remaining_ms: Optional[Callable[[], int]] = None,
+        time_margin_ms: int = IMPORT_TIME_MARGIN_MS,
+    ):
+        """
+        Initialize the worker.
+        
+        Args:
+            queue: Work queue
+            name: Worker name recorded with its claims (default: host and process ID)
+            remaining_ms: Function returning the remaining invocation time in
+                milliseconds; None means no time limit
+            time_margin_ms: No partition is claimed once less than this much time is left
+        """
+        self.queue = queue
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.remaining_ms = remaining_ms
+        self.time_margin_ms = time_margin_ms
+        self.orchestrator = Orchestrator(concurrency=1, remaining_ms=remaining_ms, time_margin_ms=time_margin_ms)
+    
+    def _out_of_time(self) -> bool:
+        """Check whether there is too little time left to claim another partition."""
+        return self.remaining_ms is not None and self.remaining_ms() <= self.time_margin_ms
+    
+    def run(self, jobs: Sequence[str]) -> Dict[str, Any]:
+        """
+        Import the partitions of the jobs, one job after another.
+        
+        Args:
+            jobs: Job names
+        
+        Returns:
+            Dictionary with the overall "status", per-partition "results", a
+            "summary" with the queue counts per job, and the "continuation":
+            the names of the jobs with partitions left when time ran out
+        """
+        started = time.perf_counter()
+        results: Dict[str, Dict[str, Any]] = {}
+        stopped = False
+        for job in jobs:
+            while not stopped:
+                if self._out_of_time():
+                    stopped = True
+                    break
+                partition = self.queue.claim(job, self.name)
+                if partition is None:
+                    break
+                result = self._process(partition)
+                results[partition.spec["name"]] = result
+                if result["status"] in ("incomplete", "skipped", "running"):
+                    # The importer stopped at the deadline: no time for another partition
+                    stopped = True
+        
+        queue = {job: self.queue.counts(job) for job in jobs}
+        left = [job for job, counts in queue.items() if counts[PENDING] or counts[RUNNING]]
+        outcomes = [result["status"] for result in results.values()]
+        summary: Dict[str, Any] = {"partitions": len(results), "seconds": round(time.perf_counter() - started, 3)}
+        for outcome in outcomes:
+            summary[outcome] = summary.get(outcome, 0) + 1
+        summary["queue"] = queue
+        
+        if any(outcome in ("failed", "partial") for outcome in outcomes):
+            status = "partial"
+        elif stopped and left:
+            status = "incomplete"
+        else:
+            status = "success"
+        logger.info(f"Worker {self.name} processed {len(results)} partitions: {status}")
+        return {
+            "status": status,
+            "results": results,
+            "summary": summary,
+            "continuation": left if stopped and left else None,
+        }
+    
+    def _process(self, partition: Partition) -> Dict[str, Any]:
+        """
+        Import one partition and record the outcome in the queue.
+        
+        Returns:
+            Summary of the partition's importer result
+        """
+        job = ImportJob.from_spec(partition.spec)
+        logger.info(f"Worker {self.name} importing {job.name} (attempt {partition.attempts})")
+        outcome = self.orchestrator.run([job])
+        result = outcome["results"][job.name]
+        stats = result.get("stats", {})
+        summary = {
+            "status": result["status"],
+            "seconds": result.get("seconds"),
+            "fetched": stats.get("fetched", 0),
+            "saved": stats.get("saved", 0),
+            "errors": stats.get("errors", 0),
+        }
+        
+        if result["status"] == "success":
+            recorded = self.queue.complete(partition, summary)
+        elif result["status"] in ("incomplete", "skipped"):
+            # Continues from its checkpoint in the next claim
+            recorded = self.queue.release(partition, outcome["continuation"][0])
+        elif result["status"] == "running":
+            # Still writing: the partition is claimed again only after its lease expires
+            return summary
+        else:
+            error = result.get("error") or f"importer finished with status {result['status']}"
+            recorded = self.queue.fail(partition, error)
+            if recorded and partition.attempts >= self.queue.max_attempts:
+                summary["status"] = FAILED
+        if not recorded:
+            # Another worker claimed the partition after this claim's lease expired
+            summary["stale"] = True
+        return summary
+
+
+def run_fanout(
+    event: Dict[str, Any],
+    remaining_ms: Optional[Callable[[], int]] = None,
+    queue: Optional[WorkQueue] = None,
+) -> Dict[str, Any]:
+    """
+    Run the planner or worker side of a fan-out event.
+    
+    Args:
+        event: Event with "fanout" ("plan" or "work") and "importers"; a
+            worker may also get a "worker" name
+        remaining_ms: Function returning the remaining invocation time in milliseconds
+        queue: Work queue (defaults to the configured one)
+    
+    Returns:
+        Result of ``plan`` or ``Worker.run``
+    """
+    queue = queue or get_work_queue()
+    jobs = jobs_from_event(event)
+    if event["fanout"] == PLAN:
+        return plan(jobs, queue)
+    if event["fanout"] == WORK:
+        return Worker(queue, event.get("worker"), remaining_ms).run([job.name for job in jobs])
+    raise ValueError(f"Unknown fan-out mode: {event['fanout']}")
+
+
+def _work(
+    queue: WorkQueue, jobs: Sequence[str], modules: Sequence[str], name: str, budget_s: Optional[float]
+) -> Dict[str, Any]:
+    """Entry point of a local worker process."""
+    for module in modules:
+        importlib.import_module(module)
+    if budget_s is None:
+        return Worker(queue, name).run(jobs)
+    
+    deadline = time.monotonic() + budget_s
+    
+    def remaining_ms() -> int:
+        return max(0, int((deadline - time.monotonic()) * 1000))
+    return Worker(queue, name, remaining_ms).run(jobs)
+
+
+def run_workers(
+    jobs: Sequence[str],
+    workers: int,
+    queue: Optional[WorkQueue] = None,
+    modules: Sequence[str] = (),
+    budget_s: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Work on planned jobs with local worker processes, like worker invocations would.
+    
+    Every process has its own database pool and claims partitions from the
+    shared queue (a Postgres queue, or a file queue on this host). Process
+    pools are not available inside AWS Lambda; use this for local and
+    non-Lambda runs.
+    
+    Args:
+        jobs: Job names, planned with ``plan``
+        workers: Number of worker processes
+        queue: Work queue (defaults to the configured one)
+        modules: Modules to import in every process so their importers are registered
+        budget_s: Time budget of every worker in seconds (None: until the queue is empty)
+    
+    Returns:
+        Worker results, one per process
+    """
+    queue = queue or get_work_queue()
+    # Fresh interpreters: no database connections or threads are inherited
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as executor:
+        futures = [
+            executor.submit(_work, queue, list(jobs), list(modules), f"{socket.gethostname()}-worker{index}", budget_s)
+            for index in range(workers)
+        ]
+        return [future.result() for future in futures]
@@ -0,0 +1,479 @@
+"""
+Google Ads report importer, sharded by customer account and date range.
+
+A report over many customer accounts and a long date range is split into
+independent shards: one per account and window of ``shard_days`` days. The
+shards run in parallel threads; each one pages through its own report
+(POST requests of the Google Ads ``search`` method, the next page selected
+by the ``pageToken`` body field), saves every page as it arrives and is
+retried on its own when it fails.
+
+The outcome of every shard is kept in the state store (namespace "shards",
+key ``state_key``). Running the same backfill again only runs the shards
+that failed or were not started; once every shard is done the progress is
+deleted, so the next run imports everything again.
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import date, timedelta
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from app.services.base_importer import BaseImporter, MODE_STREAMING
+from app.services.database import db_manager
+from app.services.dedup import Deduplicator
+from app.services.http_client import HttpClient
+from app.services.registry import register_importer
+from app.services.transform import Column, ColumnMapping
+from app.logger_config import get_logger, rate_limited
+
+logger = get_logger(__name__)
+
+# State store namespace of the per-shard progress of an import
+SHARD_NAMESPACE = "shards"
+
+# Sharding and retry defaults
+DEFAULT_SHARD_DAYS = 7
+DEFAULT_SHARD_WORKERS = 4
+DEFAULT_SHARD_RETRIES = 2
+DEFAULT_SHARD_BACKOFF = 5  # seconds, doubled per retry
+DEFAULT_DAYS_BACK = 30
+
+# Per-chunk counters taken back when a failed shard is retried
+SHARD_CHUNK_COUNTERS = ("fetched", "transformed", "duplicates", "unchanged", "saved", "errors", "inserted", "updated")
+
+# Daily campaign statistics; "{start_date}" and "{end_date}" are replaced per shard
+DEFAULT_QUERY = (
+    "SELECT customer.id, campaign.id, campaign.name, segments.date, "
+    "metrics.impressions, metrics.clicks, metrics.cost_micros "
+    "FROM campaign WHERE segments.date BETWEEN '{start_date}' AND '{end_date}'"
+)
+
+
+def field(*path: str) -> Callable[[Dict[str, Any]], Any]:
+    """
+    Get a function reading a nested field of a report row.
+    
+    Usage:
+        Column("clicks", func=field("metrics", "clicks"), ops=("int",))
+    
+    Args:
+        path: Keys from the row down to the value
+    
+    Returns:
+        Function returning the value (None if any key is missing)
+    """
+    def get(row: Dict[str, Any]) -> Any:
+        for key in path:
+            if not isinstance(row, dict):
+                return None
+            row = row.get(key)
+        return row
+    return get
+
+
+class Shard:
+    """One customer account over one date window (both dates inclusive)."""
+    
+    def __init__(self, customer_id: str, start: date, end: date):
+        self.customer_id = customer_id
+        self.start = start
+        self.end = end
+    
+    @property
+    def id(self) -> str:
+        """Stable identifier, e.g. "1234567890:2024-01-01:2024-01-07"."""
+        return f"{self.customer_id}:{self.start.isoformat()}:{self.end.isoformat()}"
+    
+    def __repr__(self) -> str:
+        return f"Shard({self.id})"
+
+
+def plan_shards(
+    customer_ids: Sequence[Union[str, int]], start: date, end: date, days: int = DEFAULT_SHARD_DAYS
+) -> List[Shard]:
+    """
+    Split accounts and a date range into shards.
+    
+    Args:
+        customer_ids: Customer account IDs (dashes are removed)
+        start: First date of the range
+        end: Last date of the range
+        days: Maximum number of days per shard
+    
+    Returns:
+        Shards ordered by account, then date
+    """
+    if days < 1:
+        raise ValueError("shard days must be a positive integer")
+    if end < start:
+        raise ValueError(f"End date {end} is before start date {start}")
+    
+    shards = []
+    for customer_id in customer_ids:
+        customer_id = str(customer_id).replace("-", "")
+        window_start = start
+        while window_start <= end:
+            window_end = min(end, window_start + timedelta(days=days - 1))
+            shards.append(Shard(customer_id, window_start, window_end))
+            window_start = window_end + timedelta(days=1)
+    return shards
+
+
+def _to_date(value: Union[str, date]) -> date:
+    """Parse an ISO date config value."""
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+@register_importer("google_ads")
+class GoogleAdsReportImporter(BaseImporter):
+    """
+    Importer for Google Ads reports, one shard per account and date window.
+    
+    Each shard POSTs the report query for its window to ``report_url`` (with
+    its customer ID filled in) as the JSON body {"query": ...} and pages
+    through the results: every response holds its rows under "results" and
+    the "nextPageToken" sent as "pageToken" for the next page. Up to
+    "shard_workers" shards run at once; every page is transformed and saved
+    by the shard's own thread, so rows reach the database while other shards
+    still download. A shard whose request or save fails is retried from its
+    first page after a backoff; pages saved before the failure are upserted
+    again, so the counters of the failed attempt are taken back and each
+    attempt deduplicates with a fresh window (shards never share rows). A
+    shard that still fails, or has too little time left for the backoff, is
+    recorded as failed and counts as an error; the other shards carry on.
+    
+    With a "deadline", no new shard is started once less than ``stop_margin``
+    plus the duration of the slowest shard so far is left. The run then ends
+    with status "incomplete" and the next run starts the remaining shards.
+    
+    Config:
+        report_url: Report endpoint with a "{customer_id}" placeholder
+        customer_ids: Customer account IDs (without any, nothing is imported)
+        start_date, end_date: Date range as ISO dates, both inclusive
+            (default: the "days_back" days, default 30, up to yesterday)
+        query: Report query sent as the "query" body field (default: daily
+            campaign statistics); "{start_date}" and "{end_date}" are
+            replaced by the shard's window
+        body: Extra request body fields, e.g. {"summaryRowSetting": "NO_SUMMARY_ROW"}
+        shard_days: Days per shard (default 7)
+        shard_workers: Shards running at once (default 4)
+        shard_retries: Retries of a failed shard (default 2)
+        shard_backoff: Seconds before the first retry, doubled per retry (default 5)
+        developer_token, login_customer_id, access_token: Google Ads API credentials
+        table_name: Target table (default "google_ads_campaign_stats")
+        use_copy: Upsert with COPY (default True) instead of multi-row INSERTs
+    
+    HttpClient settings ("max_retries", "rate_limit", ...) apply to every
+    request; the rate limit is shared by all shards. Per-shard outcomes are
+    reported in ``stats["shards"]``.
+    """
+    
+    # Target columns of the default query's rows
+    MAPPING = ColumnMapping([
+        Column("customer_id", func=field("customer", "id"), ops=("int",)),
+        Column("campaign_id", func=field("campaign", "id"), ops=("int",)),
+        Column("campaign_name", func=field("campaign", "name"), default=""),
+        Column("date", func=field("segments", "date")),
+        Column("impressions", func=field("metrics", "impressions"), ops=("int",), default=0),
+        Column("clicks", func=field("metrics", "clicks"), ops=("int",), default=0),
+        Column("cost_micros", func=field("metrics", "costMicros"), ops=("int",), default=0),
+    ], name="CampaignStats")
+    
+    # Unique key of the target table
+    CONFLICT_COLUMNS = ("customer_id", "campaign_id", "date")
+    
+    def __init__(self, config: Dict[str, Any] = None):
+        super().__init__(config)
+        self.report_url = self.config.get("report_url")
+        if self.config.get("customer_ids") and not self.report_url:
+            raise ValueError("report_url is required to import customer accounts")
+        self.query = self.config.get("query", DEFAULT_QUERY)
+        self.table_name = self.config.get("table_name", "google_ads_campaign_stats")
+        self.use_copy = self.config.get("use_copy", True)
+        self.columns = self.MAPPING.names
+        self.shard_workers = max(1, int(self.config.get("shard_workers", DEFAULT_SHARD_WORKERS)))
+        self.shard_retries = int(self.config.get("shard_retries", DEFAULT_SHARD_RETRIES))
+        self.shard_backoff = float(self.config.get("shard_backoff", DEFAULT_SHARD_BACKOFF))
+        if "mode" not in self.config:
+            self.mode = MODE_STREAMING
+        
+        if self.config.get("end_date"):
+            end = _to_date(self.config["end_date"])
+        else:
+            end = date.today() - timedelta(days=1)
+        if self.config.get("start_date"):
+            start = _to_date(self.config["start_date"])
+        else:
+            start = end - timedelta(days=int(self.config.get("days_back", DEFAULT_DAYS_BACK)) - 1)
+        self.shards = plan_shards(
+            self.config.get("customer_ids", []), start, end, int(self.config.get("shard_days", DEFAULT_SHARD_DAYS))
+        )
+        self.shard_state: Dict[str, Dict[str, Any]] = {}
+        self._chunk_index = 0
+        # Deduplicator and chunk statistics of the shard attempt running in the current thread
+        self._shard_local = threading.local()
+        
+        headers = {}
+        if self.config.get("access_token"):
+            headers["Authorization"] = f"Bearer {self.config['access_token']}"
+        if self.config.get("developer_token"):
+            headers["developer-token"] = self.config["developer_token"]
+        if self.config.get("login_customer_id"):
+            headers["login-customer-id"] = str(self.config["login_customer_id"]).replace("-", "")
+        self.client = HttpClient.from_config(self.config, headers=headers)
+    
+    def shard_body(self, shard: Shard) -> Dict[str, Any]:
+        """
+        JSON body of a shard's first report request.
+        """
+        dates = {"start_date": shard.start.isoformat(), "end_date": shard.end.isoformat()}
+        return {**(self.config.get("body") or {}), "query": self.query.format(**dates)}
+    
+    def fetch_shard(self, shard: Shard) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Fetch the report rows of one shard, one list per page.
+        """
+        url = self.report_url.format(customer_id=shard.customer_id)
+        body = self.shard_body(shard)
+        pages = 0
+        while True:
+            payload = self.client.post_json(url, body)
+            pages += 1
+            rows = payload.get("results") or []
+            if rows:
+                yield rows
+            page_token = payload.get("nextPageToken")
+            if not page_token:
+                break
+            body = {**body, "pageToken": page_token}
+        logger.debug("Fetched %d pages of shard %s", pages, shard.id)
+    
+    def fetch_data(self) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Fetch all shards one after another.
+        
+        Only used in batch and pipeline mode, which have no per-shard retries
+        or progress; streaming mode (the default) runs the shards in parallel.
+        """
+        for shard in self.shards:
+            yield from self.fetch_shard(shard)
+    
+    def plan_partitions(self) -> List[Dict[str, Any]]:
+        """
+        One fan-out partition per shard.
+        """
+        return [
+            {"customer_ids": [shard.customer_id], "start_date": shard.start.isoformat(), "end_date": shard.end.isoformat()}
+            for shard in self.shards
+        ]
+    
+    def load_shard_state(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Load the outcome of the shards of earlier, unfinished runs.
+        
+        Returns:
+            Shard ID -> {"status": "done" or "failed", ...}
+        """
+        return self.state_store.get(SHARD_NAMESPACE, self.state_key) or {}
+    
+    def _record_shard(self, shard: Shard, outcome: Dict[str, Any]):
+        """Store the outcome of a finished shard."""
+        self.shard_state[shard.id] = outcome
+        self.stats["shards"][outcome["status"]] += 1
+        self.state_store.set(SHARD_NAMESPACE, self.state_key, self.shard_state)
+    
+    def _run_streaming(self):
+        """
+        Run the shards not done yet in parallel threads.
+        """
+        self.stats["chunks"] = 0
+        self.stats["chunk_stats"] = []
+        self.shard_state = self.load_shard_state()
+        pending = [shard for shard in self.shards if self.shard_state.get(shard.id, {}).get("status") != "done"]
+        self.stats["shards"] = {
+            "total": len(self.shards),
+            "skipped": len(self.shards) - len(pending),
+            "done": 0,
+            "failed": 0,
+        }
+        if not self.shards:
+            logger.warning("No customer accounts configured, nothing to import")
+            return
+        logger.info(
+            f"Importing {len(pending)} of {len(self.shards)} shards with {self.shard_workers} workers"
+        )
+        
+        running: Dict[Future, Shard] = {}
+        with ThreadPoolExecutor(max_workers=self.shard_workers, thread_name_prefix="shard") as executor:
+            while pending or running:
+                while pending and len(running) < self.shard_workers and not self._out_of_time():
+                    shard = pending.pop(0)
+                    running[executor.submit(self._run_shard, shard)] = shard
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    shard = running.pop(future)
+                    outcome = future.result()
+                    self._chunk_seconds = max(self._chunk_seconds, outcome["seconds"])
+                    self._record_shard(shard, outcome)
+        
+        if pending:
+            self.stopped_early = True
+            self.stats["stopped_early"] = True
+            logger.info(f"Stopping before the deadline ({self.time_left():.1f}s left), {len(pending)} shards not started")
+        elif all(self.shard_state.get(shard.id, {}).get("status") == "done" for shard in self.shards):
+            self.state_store.delete(SHARD_NAMESPACE, self.state_key)
+        
+        logger.info(
+            f"Imported {self.stats['shards']['done']} shards ({self.stats['shards']['failed']} failed), "
+            f"saved {self.stats['saved']} records"
+        )
+    
+    @property
+    def deduplicator(self) -> Optional[Deduplicator]:
+        """Deduplicator of the shard attempt running in this thread (the shared one outside shards)."""
+        return getattr(self._shard_local, "deduplicator", None) or super().deduplicator
+    
+    def _out_of_time(self) -> bool:
+        """Check whether there is too little time left to start another shard."""
+        time_left = self.time_left()
+        return time_left is not None and time_left < self.stop_margin + self._chunk_seconds
+    
+    def _run_shard(self, shard: Shard) -> Dict[str, Any]:
+        """
+        Import a shard, retrying it when it fails.
+        
+        Returns:
+            The shard's outcome: "status" ("done" or "failed"), "rows" saved or
+            the "error", "attempts" and "seconds"
+        """
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            chunks: List[Dict[str, Any]] = []
+            try:
+                rows = self.import_shard(shard, chunks)
+            except Exception as e:
+                delay = self.shard_backoff * 2 ** (attempt - 1)
+                time_left = self.time_left()
+                if attempt > self.shard_retries or (time_left is not None and time_left < self.stop_margin + delay):
+                    logger.error(f"Shard {shard.id} failed after {attempt} attempts: {str(e)}")
+                    self.increment_stat("errors")
+                    outcome = {"status": "failed", "error": str(e)}
+                    break
+                self._discard_chunks(chunks)
+                logger.warning(
+                    "Shard %s failed (%s), retrying in %.1fs", shard.id, e, delay,
+                    extra=rate_limited("shard_retry")
+                )
+                self.increment_stat("shard_retries")
+                time.sleep(delay)
+            else:
+                outcome = {"status": "done", "rows": rows}
+                break
+        
+        outcome.update(attempts=attempt, seconds=round(time.monotonic() - started, 3))
+        return outcome
+    
+    def _discard_chunks(self, chunks: List[Dict[str, Any]]):
+        """Take the chunks of a failed shard attempt out of the statistics before it is retried."""
+        with self._stats_lock:
+            for chunk_stats in chunks:
+                self.stats["chunks"] -= 1
+                for name in SHARD_CHUNK_COUNTERS:
+                    if chunk_stats.get(name):
+                        self.stats[name] -= chunk_stats[name]
+                self.stats["chunk_stats"].remove(chunk_stats)
+    
+    def import_shard(self, shard: Shard, chunks: Optional[List[Dict[str, Any]]] = None) -> int:
+        """
+        Fetch, transform and save the pages of one shard.
+        
+        Args:
+            shard: Shard to import
+            chunks: List the statistics entry of every chunk is appended to
+        
+        Returns:
+            Number of records saved
+        
+        Raises:
+            Exception: If a page cannot be fetched or saved
+        """
+        saved = 0
+        chunks = chunks if chunks is not None else []
+        self._shard_local.deduplicator = Deduplicator.from_config(self.dedup) if self.dedup else None
+        pages = self._fetch_chunks(partial(self.fetch_shard, shard))
+        try:
+            for chunk in pages:
+                with self._stats_lock:
+                    index, self._chunk_index = self._chunk_index, self._chunk_index + 1
+                chunk_stats = self._start_chunk(index, len(chunk))
+                chunk_stats["shard"] = shard.id
+                chunks.append(chunk_stats)
+                data = self._transform_chunk(chunk, chunk_stats)
+                if not data:
+                    continue
+                
+                self._shard_local.chunk_stats = chunk_stats
+                with self._stage("save", len(data)):
+                    if not self.save_data(data):
+                        raise RuntimeError(f"Failed to save chunk {index}")
+                chunk_stats["saved"] = len(data)
+                self.increment_stat("saved", len(data))
+                self.track_watermark(data)
+                saved += len(data)
+        finally:
+            pages.close()
+            self._shard_local.deduplicator = None
+            self._shard_local.chunk_stats = None
+        
+        logger.debug("Shard %s: saved %d records", shard.id, saved)
+        return saved
+    
+    def _get_result(self) -> Dict[str, Any]:
+        """
+        Get result dictionary with statistics, including HTTP request counters.
+        """
+        self.stats["http"] = self.client.get_stats()
+        self.stats["bytes_fetched"] = self.stats["http"]["bytes"]
+        return super()._get_result()
+    
+    def transform_data(self, data: List[Dict[str, Any]]) -> List[Tuple[Any, ...]]:
+        """
+        Transform report rows to CampaignStats tuples in MAPPING column order.
+        """
+        return self.map_records(self.MAPPING, data)
+    
+    def save_data(self, data: List[Tuple[Any, ...]]) -> bool:
+        """
+        Upsert rows into the target table.
+        """
+        if not self.validate_data(data):
+            return False
+        
+        try:
+            if self.use_copy:
+                rows_affected = db_manager.copy_upsert(
+                    self.table_name, self.columns, data, conflict_columns=self.CONFLICT_COLUMNS
+                )
+                logger.info("Saved %d records to %s", rows_affected, self.table_name)
+                return True
+            
+            result = db_manager.upsert_many(
+                self.table_name, self.columns, data, conflict_columns=self.CONFLICT_COLUMNS
+            )
+            self.increment_stat("inserted", result["inserted"])
+            self.increment_stat("updated", result["updated"])
+            chunk_stats = getattr(self._shard_local, "chunk_stats", None)
+            if chunk_stats is not None:
+                # Taken back with the chunk if its shard is retried
+                chunk_stats["inserted"] = result["inserted"]
+                chunk_stats["updated"] = result["updated"]
+            return True
+        
+        except Exception as e:
+            logger.error(f"Error saving data: {str(e)}", exc_info=True)
+            return False
@@ -0,0 +1,339 @@
+"""
+Conditional-request cache for HTTP sources.
+
+Responses with an ``ETag`` or ``Last-Modified`` header are stored with
+their body. The next request for the same URL, parameters and headers is
+sent with ``If-None-Match`` / ``If-Modified-Since``; a 304 answer means the
+data did not change since it was imported, so importers can skip it.
+
+Entries only become usable for conditional requests once committed, which
+importers do after a run finished without errors: a response whose records
+were never saved must not turn into a 304 next time. Two backends:
+- FileHttpCache: files on local disk (/tmp in AWS Lambda)
+- PostgresHttpCache: a cache table accessed through ``db_manager``
+Expired entries, then the oldest ones beyond the size limit, are evicted
+when entries are committed.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Optional, Union
+from psycopg2 import sql
+from app.config import HTTP_CACHE_DIR, HTTP_CACHE_MAX_MB, HTTP_CACHE_TABLE, HTTP_CACHE_TTL
+from app.services.database import DatabaseManager, db_manager, table_identifier
+from app.logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class CachedResponse:
+    """A cached response body with its validators."""
+    
+    def __init__(
+        self,
+        body: bytes,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        stored_at: Optional[float] = None,
+        committed: bool = False,
+    ):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = time.time() if stored_at is None else stored_at
+        self.committed = committed
+    
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers asking the server to answer 304 if the resource did not change."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HttpCache(ABC):
+    """
+    Base class for HTTP response caches.
+    
+    Args:
+        ttl: Seconds an entry stays valid after it was stored or last confirmed
+        max_bytes: Total body size kept; the oldest entries are evicted beyond it
+    """
+    
+    def __init__(self, ttl: float = HTTP_CACHE_TTL, max_bytes: int = int(HTTP_CACHE_MAX_MB * 1024 * 1024)):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+    
+    @staticmethod
+    def key(url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None) -> str:
+        """
+        Cache key of a request.
+        
+        Headers are part of the key (hashed, so credentials are not stored):
+        another API key may see other data.
+        """
+        request = json.dumps([url, params or {}, headers or {}], sort_keys=True, default=str)
+        return hashlib.sha256(request.encode("utf-8")).hexdigest()
+    
+    def is_expired(self, entry: CachedResponse) -> bool:
+        return time.time() - entry.stored_at > self.ttl
+    
+    @abstractmethod
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """
+        Get an entry.
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            The entry, or None if there is none or it expired
+        """
+        pass
+    
+    @abstractmethod
+    def put(self, key: str, entry: CachedResponse):
+        """
+        Store an uncommitted entry, replacing any previous one.
+        
+        Args:
+            key: Cache key
+            entry: Response to store
+        """
+        pass
+    
+    @abstractmethod
+    def commit(self, keys: Iterable[str]):
+        """
+        Mark entries as usable for conditional requests and restart their TTL,
+        then evict expired and excess entries.
+        
+        Args:
+            keys: Keys of the entries whose data was imported
+        """
+        pass
+
+
+class FileHttpCache(HttpCache):
+    """
+    HTTP cache on local disk: a body file and a JSON metadata file per entry.
+    
+    In AWS Lambda relative directories are moved to /tmp, the only writable
+    location; the cache then lasts as long as the execution environment.
+    """
+    
+    def __init__(self, directory: str = HTTP_CACHE_DIR, **kwargs):
+        super().__init__(**kwargs)
+        if os.getenv("AWS_LAMBDA_FUNCTION_NAME") and not directory.startswith("/tmp/"):
+            directory = os.path.join("/tmp", os.path.basename(directory))
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+    
+    def _paths(self, key: str):
+        base = os.path.join(self.directory, key)
+        return f"{base}.body", f"{base}.json"
+    
+    def _read_meta(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+    
+    def _write_meta(self, path: str, meta: Dict[str, Any]):
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(temp_path, path)
+    
+    def _remove(self, key: str):
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    
+    def get(self, key: str) -> Optional[CachedResponse]:
+        body_path, meta_path = self._paths(key)
+        meta = self._read_meta(meta_path)
+        if meta is None:
+            return None
+        try:
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except FileNotFoundError:
+            return None
+        entry = CachedResponse(body, meta.get("etag"), meta.get("last_modified"), meta["stored_at"], meta["committed"])
+        return None if self.is_expired(entry) else entry
+    
+    def put(self, key: str, entry: CachedResponse):
+        body_path, meta_path = self._paths(key)
+        with self._lock:
+            # Metadata last: an entry is only visible once its body is complete
+            self._remove(key)
+            temp_path = f"{body_path}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(entry.body)
+            os.replace(temp_path, body_path)
+            self._write_meta(meta_path, {
+                "etag": entry.etag,
+                "last_modified": entry.last_modified,
+                "stored_at": entry.stored_at,
+                "committed": False,
+                "size": len(entry.body),
+            })
+    
+    def commit(self, keys: Iterable[str]):
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                meta_path = self._paths(key)[1]
+                meta = self._read_meta(meta_path)
+                if meta is not None:
+                    meta.update(committed=True, stored_at=now)
+                    self._write_meta(meta_path, meta)
+            self._evict(now)
+    
+    def _evict(self, now: float):
+        """Remove expired entries, then the oldest ones until the total size fits."""
+        entries = []
+        names = set(os.listdir(self.directory))
+        for name in names:
+            # Bodies without metadata are left over from an interrupted put
+            if name.endswith(".body") and f"{name[:-len('.body')]}.json" not in names:
+                self._remove(name[:-len(".body")])
+            if not name.endswith(".json"):
+                continue
+            key = name[:-len(".json")]
+            meta = self._read_meta(os.path.join(self.directory, name))
+            if meta is None or now - meta["stored_at"] > self.ttl:
+                self._remove(key)
+            else:
+                entries.append((meta["stored_at"], meta["size"], key))
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(key)
+            total -= size
+
+
+class PostgresHttpCache(HttpCache):
+    """
+    HTTP cache in a Postgres table, shared by all Lambda execution environments.
+    
+    The table is created on first use:
+        (key TEXT, etag TEXT, last_modified TEXT, body BYTEA, size INTEGER,
+         stored_at DOUBLE PRECISION, committed BOOLEAN)
+    """
+    
+    def __init__(self, table: str = HTTP_CACHE_TABLE, database: Optional[DatabaseManager] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.table = table
+        self.database = database or db_manager
+        self._table_ready = False
+        self._lock = threading.Lock()
+    
+    def _ensure_table(self):
+        """Create the cache table if it does not exist yet."""
+        if self._table_ready:
+            return
+        with self._lock:
+            if not self._table_ready:
+                self.database.execute_update(sql.SQL("""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        key TEXT PRIMARY KEY,
+                        etag TEXT,
+                        last_modified TEXT,
+                        body BYTEA NOT NULL,
+                        size INTEGER NOT NULL,
+                        stored_at DOUBLE PRECISION NOT NULL,
+                        committed BOOLEAN NOT NULL DEFAULT FALSE
+                    )
+                """).format(table=table_identifier(self.table)))
+                self._table_ready = True
+    
+    def get(self, key: str) -> Optional[CachedResponse]:
+        self._ensure_table()
+        rows = self.database.execute_query(
+            sql.SQL(
+                "SELECT body, etag, last_modified, stored_at, committed FROM {table} WHERE key = %s"
+            ).format(table=table_identifier(self.table)),
+            (key,)
+        )
+        if not rows:
+            return None
+        row = rows[0]
+        entry = CachedResponse(
+            bytes(row["body"]), row["etag"], row["last_modified"], row["stored_at"], row["committed"]
+        )
+        return None if self.is_expired(entry) else entry
+    
+    def put(self, key: str, entry: CachedResponse):
+        self._ensure_table()
+        self.database.execute_update(
+            sql.SQL("""
+                INSERT INTO {table} (key, etag, last_modified, body, size, stored_at, committed)
+                VALUES (%s, %s, %s, %s, %s, %s, FALSE)
+                ON CONFLICT (key) DO UPDATE SET
+                    etag = EXCLUDED.etag,
+                    last_modified = EXCLUDED.last_modified,
+                    body = EXCLUDED.body,
+                    size = EXCLUDED.size,
+                    stored_at = EXCLUDED.stored_at,
+                    committed = FALSE
+            """).format(table=table_identifier(self.table)),
+            (key, entry.etag, entry.last_modified, entry.body, len(entry.body), entry.stored_at)
+        )
+    
+    def commit(self, keys: Iterable[str]):
+        self._ensure_table()
+        now = time.time()
+        table = table_identifier(self.table)
+        with self.database.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    sql.SQL("UPDATE {table} SET committed = TRUE, stored_at = %s WHERE key = ANY(%s)").format(
+                        table=table
+                    ),
+                    (now, list(keys))
+                )
+                cur.execute(sql.SQL("DELETE FROM {table} WHERE stored_at < %s").format(table=table), (now - self.ttl,))
+                cur.execute(
+                    sql.SQL("""
+                        DELETE FROM {table} WHERE key IN (
+                            SELECT key FROM (
+                                SELECT key, SUM(size) OVER (ORDER BY stored_at DESC, key) AS running FROM {table}
+                            ) AS sized WHERE running > %s
+                        )
+                    """).format(table=table),
+                    (self.max_bytes,)
+                )
+
+
+def get_http_cache(config: Union[str, Dict[str, Any]]) -> HttpCache:
+    """
+    Create an HTTP cache from an importer's "http_cache" config.
+    
+    Args:
+        config: "file" or "postgres", or a dict with "backend" and optional
+            "ttl" (seconds), "max_mb", "directory" (file) and "table" (postgres)
+    
+    Returns:
+        HTTP cache instance
+    """
+    options = {"backend": config} if isinstance(config, str) else dict(config)
+    backend = options.pop("backend", "file")
+    kwargs: Dict[str, Any] = {"ttl": options.get("ttl", HTTP_CACHE_TTL)}
+    kwargs["max_bytes"] = int(options.get("max_mb", HTTP_CACHE_MAX_MB) * 1024 * 1024)
+    if backend == "file":
+        return FileHttpCache(options.get("directory", HTTP_CACHE_DIR), **kwargs)
+    if backend == "postgres":
+        return PostgresHttpCache(options.get("table", HTTP_CACHE_TABLE), **kwargs)
+    raise ValueError(f"Unknown HTTP cache backend: {backend}")
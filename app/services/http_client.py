@@ -0,0 +1,524 @@
+"""
+HTTP client utilities for API importers.
+
+This module provides a shared, pooled ``requests`` session so that importers
+reuse keep-alive connections within a run and across warm Lambda invocations,
+and an ``HttpClient`` that retries transient failures with exponential backoff,
+honours ``Retry-After`` and can share a token-bucket rate limiter between
+concurrent workers.
+"""
+import json
+import random
+import threading
+import time
+import requests
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from app.logger_config import get_logger, rate_limited
+from app.services.http_cache import CachedResponse, HttpCache, get_http_cache
+from app.services.json_stream import DEFAULT_BATCH_SIZE, FORMAT_AUTO, FORMAT_NDJSON, JSONStream, is_ndjson
+
+logger = get_logger(__name__)
+
+# Default request timeout in seconds
+DEFAULT_TIMEOUT = 30
+
+# Default number of pooled connections per host
+DEFAULT_POOL_SIZE = 10
+
+# Bytes read per chunk of a streamed response body
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Retry defaults
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 0.5  # seconds
+DEFAULT_BACKOFF_MAX = 30  # seconds
+MAX_RETRY_AFTER = 120  # seconds; longer Retry-After values are capped
+
+# HTTP statuses that are worth retrying
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """
+    Get the shared HTTP session, creating it on first use.
+    
+    The session keeps connections alive and is safe to share between the
+    threads of a concurrent fetch.
+    
+    Args:
+        pool_size: Maximum number of pooled connections per host (first call only)
+    
+    Returns:
+        Shared requests session
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+                logger.debug(f"Created shared HTTP session with pool size {pool_size}")
+    return _session
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a ``Retry-After`` header value.
+    
+    Args:
+        value: Header value, either delay seconds or an HTTP date
+        
+    Returns:
+        Seconds to wait, or None if the value is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter.
+    
+    Share one instance between all workers that call the same provider so that
+    their combined request rate stays under its quota.
+    
+    Usage:
+        limiter = TokenBucket(rate=10, capacity=20)  # 10 req/s, bursts of 20
+        limiter.acquire()  # blocks until a token is available
+    """
+    
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Initialize the bucket.
+        
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of stored tokens (defaults to ``rate``)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> float:
+        """
+        Take one token, waiting until one is available.
+        
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+    
+    def pause(self, seconds: float):
+        """
+        Stop handing out tokens for ``seconds`` (e.g. after a 429 with Retry-After).
+        
+        Args:
+            seconds: Pause duration
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+
+
+class HttpClient:
+    """
+    HTTP client used by importers.
+    
+    Wraps the shared session with default headers and timeout, and retries
+    connection errors, timeouts and 429/5xx responses with exponential backoff
+    and full jitter. A ``Retry-After`` header overrides the backoff delay and,
+    when a rate limiter is configured, pauses it for every worker sharing it.
+    
+    Counters (requests, retries, failures, throttled responses and latency)
+    are available from ``get_stats()``; the client is safe to share between threads.
+    
+    With a ``cache`` (see app/services/http_cache.py), ``get_json`` sends
+    conditional requests and serves 304 answers from the cache;
+    ``get_json_cached`` also tells whether the data changed. Entries stored
+    during a run are used for conditional requests only after ``commit_cache()``.
+    
+    Usage:
+        client = HttpClient(
+            headers={"Authorization": "Bearer token"},
+            rate_limiter=TokenBucket(rate=10),
+        )
+        payload = client.get_json("https://api.example.com/data", params={"page": 1})
+    """
+    
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        session: Optional[requests.Session] = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+        rate_limiter: Optional[TokenBucket] = None,
+        cache: Optional[HttpCache] = None,
+    ):
+        """
+        Initialize the client.
+        
+        Args:
+            headers: Headers sent with every request
+            timeout: Request timeout in seconds
+            session: Session to use (defaults to the shared session)
+            max_retries: Number of retries after the first attempt
+            backoff_base: Backoff delay of the first retry in seconds (doubled per retry)
+            backoff_max: Upper bound for a single backoff delay in seconds
+            rate_limiter: Optional token bucket shared by concurrent workers
+            cache: Optional conditional-request cache of JSON responses
+        """
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.session = session or get_session()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self._pending_cache_keys: Set[str] = set()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "retries": 0,
+            "failures": 0,
+            "throttled": 0,
+            "rate_limit_wait_ms": 0.0,
+            "latency_ms_total": 0.0,
+            "latency_ms_max": 0.0,
+            "bytes": 0,
+            "cache_hits": 0,
+            "cache_misses": 0
+        }
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> "HttpClient":
+        """
+        Build a client from importer config keys.
+        
+        Recognised keys: "timeout", "max_retries", "backoff_base", "backoff_max",
+        "rate_limit" (requests per second), "rate_limit_burst" and "http_cache"
+        (see ``get_http_cache``).
+        
+        Args:
+            config: Importer configuration dictionary
+            headers: Headers sent with every request
+            
+        Returns:
+            Configured client
+        """
+        rate_limiter = None
+        if config.get("rate_limit"):
+            rate_limiter = TokenBucket(config["rate_limit"], config.get("rate_limit_burst"))
+        return cls(
+            headers=headers,
+            timeout=config.get("timeout", DEFAULT_TIMEOUT),
+            max_retries=config.get("max_retries", DEFAULT_MAX_RETRIES),
+            backoff_base=config.get("backoff_base", DEFAULT_BACKOFF_BASE),
+            backoff_max=config.get("backoff_max", DEFAULT_BACKOFF_MAX),
+            rate_limiter=rate_limiter,
+            cache=get_http_cache(config["http_cache"]) if config.get("http_cache") else None,
+        )
+    
+    def _record(self, **counters):
+        """Add request counters to the client statistics."""
+        with self._stats_lock:
+            for name, value in counters.items():
+                self._stats[name] += value
+    
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter for the given retry attempt (0-based)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get request statistics.
+        
+        Returns:
+            Dictionary with request, retry, failure and latency counters, the
+            response "bytes" read by ``get_json`` and ``stream_json``, and
+            "cache_hits" (304 answers) and "cache_misses"
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["latency_ms_avg"] = round(stats["latency_ms_total"] / stats["requests"], 2) if stats["requests"] else 0.0
+        stats["latency_ms_total"] = round(stats["latency_ms_total"], 2)
+        stats["latency_ms_max"] = round(stats["latency_ms_max"], 2)
+        stats["rate_limit_wait_ms"] = round(stats["rate_limit_wait_ms"], 2)
+        return stats
+    
+    def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        stream: bool = False,
+    ) -> requests.Response:
+        """
+        Send a GET request, retrying transient failures (see ``request``).
+        """
+        return self.request("GET", url, params=params, headers=headers, stream=stream)
+    
+    def request(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        stream: bool = False,
+        json_body: Any = None,
+    ) -> requests.Response:
+        """
+        Send a request, retrying transient failures.
+        
+        Args:
+            method: HTTP method, e.g. "GET" or "POST"
+            url: Request URL
+            params: Optional query parameters
+            headers: Optional headers merged over the default headers
+            stream: Return before the body is read (close the response when done)
+            json_body: Optional body sent as JSON
+        
+        Returns:
+            Response object
+        
+        Raises:
+            requests.exceptions.RequestException: If the request still fails
+                after all retries, or fails with a non-retryable status
+        """
+        request_headers = {**self.headers, **(headers or {})}
+        attempt = 0
+        while True:
+            if self.rate_limiter:
+                self._record(rate_limit_wait_ms=self.rate_limiter.acquire() * 1000)
+            
+            started = time.perf_counter()
+            try:
+                response = self.session.request(
+                    method, url, params=params, json=json_body, headers=request_headers,
+                    timeout=self.timeout, stream=stream
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self._record_latency(started)
+                if attempt >= self.max_retries:
+                    self._record(failures=1)
+                    raise
+                delay = self._backoff_delay(attempt)
+                logger.warning(
+                    "Request to %s failed (%s), retrying in %.2fs", url, e.__class__.__name__, delay,
+                    extra=rate_limited("http_retry")
+                )
+            else:
+                self._record_latency(started)
+                if response.status_code not in RETRY_STATUSES:
+                    if not response.ok:
+                        self._record(failures=1)
+                    response.raise_for_status()
+                    return response
+                
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if response.status_code == 429:
+                    self._record(throttled=1)
+                    if retry_after is not None and self.rate_limiter:
+                        self.rate_limiter.pause(min(retry_after, MAX_RETRY_AFTER))
+                if attempt >= self.max_retries:
+                    self._record(failures=1)
+                    response.raise_for_status()
+                
+                delay = min(retry_after, MAX_RETRY_AFTER) if retry_after is not None else self._backoff_delay(attempt)
+                logger.warning(
+                    "Request to %s returned %d, retrying in %.2fs", url, response.status_code, delay,
+                    extra=rate_limited("http_retry")
+                )
+                response.close()
+            
+            self._record(retries=1)
+            attempt += 1
+            time.sleep(delay)
+    
+    def _record_latency(self, started: float):
+        """Record the latency of one request attempt."""
+        latency_ms = (time.perf_counter() - started) * 1000
+        with self._stats_lock:
+            self._stats["requests"] += 1
+            self._stats["latency_ms_total"] += latency_ms
+            self._stats["latency_ms_max"] = max(self._stats["latency_ms_max"], latency_ms)
+    
+    def get_json(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Any:
+        """
+        Send a GET request and decode the JSON body.
+        
+        Args:
+            url: Request URL
+            params: Optional query parameters
+            headers: Optional headers merged over the default headers
+        
+        Returns:
+            Decoded JSON payload
+        """
+        if self.cache is not None:
+            return self.get_json_cached(url, params=params, headers=headers)[0]
+        response = self.get(url, params=params, headers=headers)
+        self._record(bytes=len(response.content))
+        return response.json()
+    
+    def post_json(
+        self,
+        url: str,
+        body: Any,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Any:
+        """
+        Send a POST request with a JSON body and decode the JSON response.
+        
+        Args:
+            url: Request URL
+            body: Request body, sent as JSON
+            params: Optional query parameters
+            headers: Optional headers merged over the default headers
+        
+        Returns:
+            Decoded JSON payload
+        """
+        response = self.request("POST", url, params=params, headers=headers, json_body=body)
+        self._record(bytes=len(response.content))
+        return response.json()
+    
+    def stream_json(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        records_key: Optional[str] = "data",
+        json_format: str = FORMAT_AUTO,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> Iterator[List[Any]]:
+        """
+        Send a GET request and parse the records of the JSON body while it downloads.
+        
+        Only the unparsed part of the body and one batch are held in memory
+        (see app/services/json_stream.py). Failures before the body starts are
+        retried like ``get``; a connection lost mid-body raises.
+        
+        Args:
+            url: Request URL
+            params: Optional query parameters
+            headers: Optional headers merged over the default headers
+            records_key: Key of the record array in an object body
+            json_format: "auto", "json" or "ndjson"; "auto" also follows an
+                NDJSON Content-Type
+            batch_size: Records per yielded list
+        
+        Yields:
+            Lists of at most ``batch_size`` records
+        """
+        response = self.get(url, params=params, headers=headers, stream=True)
+        with response:
+            if json_format == FORMAT_AUTO and is_ndjson(response.headers.get("Content-Type")):
+                json_format = FORMAT_NDJSON
+            chunks = self._counted(response.iter_content(STREAM_CHUNK_SIZE))
+            yield from JSONStream(chunks, records_key, json_format).iter_batches(batch_size)
+    
+    def _counted(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Pass body chunks through, adding their size to the "bytes" counter."""
+        for chunk in chunks:
+            self._record(bytes=len(chunk))
+            yield chunk
+    
+    def get_json_cached(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[Any, bool]:
+        """
+        Send a conditional GET request and decode the JSON body.
+        
+        A 304 answer is served from the cache. Without a cache this is a plain
+        ``get_json`` and the payload always counts as modified.
+        
+        Args:
+            url: Request URL
+            params: Optional query parameters
+            headers: Optional headers merged over the default headers
+        
+        Returns:
+            (payload, modified): modified is False if the server confirmed the
+            cached payload, which was imported by an earlier successful run
+        """
+        if self.cache is None:
+            return self.get_json(url, params=params, headers=headers), True
+        
+        key = self.cache.key(url, params, {**self.headers, **(headers or {})})
+        entry = self.cache.get(key)
+        conditional = entry.conditional_headers() if entry is not None and entry.committed else {}
+        response = self.get(url, params=params, headers={**(headers or {}), **conditional})
+        if response.status_code == 304 and conditional:
+            self._record(cache_hits=1)
+            with self._stats_lock:
+                self._pending_cache_keys.add(key)
+            return json.loads(entry.body), False
+        
+        body = response.content
+        self._record(bytes=len(body), cache_misses=1)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            try:
+                self.cache.put(key, CachedResponse(body, etag, last_modified))
+                with self._stats_lock:
+                    self._pending_cache_keys.add(key)
+            except Exception as e:
+                logger.warning(f"Could not cache the response of {url}: {str(e)}")
+        return response.json(), True
+    
+    def commit_cache(self):
+        """
+        Make the responses of this run usable for conditional requests.
+        
+        Call once their records were imported successfully.
+        """
+        if self.cache is None:
+            return
+        with self._stats_lock:
+            keys, self._pending_cache_keys = self._pending_cache_keys, set()
+        self.cache.commit(keys)
@@ -4,14 +4,17 @@ Example Intaker Importer implementation.
 This is an example implementation of the BaseImporter class.
 Replace this with your actual data import logic.
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from app.services.base_importer import BaseImporter
 from app.services.database import db_manager
+from app.services.registry import register_importer
+from app.services.transform import Column, ColumnMapping
 from app.logger_config import get_logger
 
 logger = get_logger(__name__)
 
 
+@register_importer("intaker")
 class IntakerImporter(BaseImporter):
     """
     Example importer for Intaker data.
@@ -20,6 +23,18 @@ class IntakerImporter(BaseImporter):
     Customize the methods below to match your specific data source and requirements.
     """
     
+    # Target columns and how to compute them from a raw record
+    # TODO: Replace with your actual column mapping
+    MAPPING = ColumnMapping([
+        Column("id"),
+        Column("name", ops=("strip",), default=""),
+        Column("email", ops=("lower",), default=""),
+        Column("created_at"),
+        # Add more columns as needed, e.g.
+        # Column("amount", source=("Amount", "amount"), ops=("float",), default=0.0),
+        # Column("full_name", func=lambda record: f"{record['first']} {record['last']}"),
+    ], name="IntakerRecord")
+    
     def __init__(self, config: Dict[str, Any] = None):
         """
         Initialize the Intaker importer.
@@ -29,6 +44,7 @@ class IntakerImporter(BaseImporter):
         """
         super().__init__(config)
         self.table_name = self.config.get("table_name", "intaker_data")
+        self.columns = self.MAPPING.names
     
     def fetch_data(self) -> List[Dict[str, Any]]:
         """
@@ -49,55 +65,40 @@ class IntakerImporter(BaseImporter):
         # Example:
         # response = requests.get("https://api.example.com/data")
         # return response.json()
+        #
+        # With "incremental": True in the config, only fetch what changed since
+        # the last successful run:
+        # params = {"updated_since": self.watermark} if self.watermark else {}
+        # response = requests.get("https://api.example.com/data", params=params)
         
         # For now, return empty list as template
         return []
     
-    def transform_data(self, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def transform_data(self, data: List[Dict[str, Any]]) -> List[Tuple[Any, ...]]:
         """
         Transform raw data into the target format.
         
-        This method should:
-        - Clean and normalize data
-        - Map fields to database columns
-        - Handle data type conversions
-        - Add default values if needed
+        The MAPPING columns define how data is cleaned and normalized, mapped
+        to database columns, converted and defaulted. It runs one column at a
+        time over the whole batch and produces tuples in column order.
         
         Args:
             data: List of raw data dictionaries
             
         Returns:
-            List of transformed data dictionaries
+            List of row tuples in ``self.columns`` order
         """
         logger.info(f"Transforming {len(data)} records...")
-        
-        transformed = []
-        for record in data:
-            try:
-                # TODO: Replace with actual transformation logic
-                # Example transformation:
-                transformed_record = {
-                    "id": record.get("id"),
-                    "name": record.get("name", "").strip(),
-                    "email": record.get("email", "").lower(),
-                    "created_at": record.get("created_at"),
-                    # Add more fields as needed
-                }
-                transformed.append(transformed_record)
-            except Exception as e:
-                logger.error(f"Error transforming record: {str(e)}")
-                self.stats["errors"] += 1
-        
-        return transformed
+        return self.map_records(self.MAPPING, data)
     
-    def save_data(self, data: List[Dict[str, Any]]) -> bool:
+    def save_data(self, data: List[Tuple[Any, ...]]) -> bool:
         """
         Save transformed data to the database.
         
         This method handles the actual database insertion/update logic.
         
         Args:
-            data: List of transformed data dictionaries
+            data: List of row tuples in ``self.columns`` order
             
         Returns:
             True if save was successful, False otherwise
@@ -120,12 +121,7 @@ class IntakerImporter(BaseImporter):
             #         updated_at = NOW()
             # """
             # 
-            # data_tuples = [
-            #     (record["id"], record["name"], record["email"], record["created_at"])
-            #     for record in data
-            # ]
-            # 
-            # rows_affected = db_manager.execute_batch(query, data_tuples)
+            # rows_affected = db_manager.execute_batch(query, data)
             # logger.info(f"Saved {rows_affected} records")
             # return rows_affected > 0
             
@@ -137,12 +133,12 @@ class IntakerImporter(BaseImporter):
             logger.error(f"Error saving data: {str(e)}", exc_info=True)
             return False
     
-    def validate_data(self, data: List[Dict[str, Any]]) -> bool:
+    def validate_data(self, data: List[Tuple[Any, ...]]) -> bool:
         """
         Validate data before saving.
         
         Args:
-            data: List of data dictionaries to validate
+            data: List of row tuples to validate
             
         Returns:
             True if data is valid, False otherwise
@@ -152,8 +148,9 @@ class IntakerImporter(BaseImporter):
         
         # Add custom validation logic here
         # Example:
+        # get_id = self.field_getter("id")
         # for record in data:
-        #     if not record.get("id"):
+        #     if not get_id(record):
         #         logger.warning("Record missing required field: id")
         #         return False
         
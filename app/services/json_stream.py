@@ -0,0 +1,226 @@
+"""
+Incremental JSON parsing of large response bodies.
+
+``response.json()`` needs the whole body in memory, then builds the whole
+object tree, before the first record can be imported; a large report takes
+several times its size in memory. ``JSONStream`` parses records while the
+body is read, keeping only the unparsed text and the current batch:
+- a top-level array: [record, record, ...]
+- an object with the records under a key: {"data": [record, ...], ...}
+- NDJSON (JSON lines): one record per line
+
+Records are decoded with the standard library's C decoder, one at a time.
+"""
+import codecs
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Default number of records per batch
+DEFAULT_BATCH_SIZE = 1000
+
+# Body formats
+FORMAT_AUTO = "auto"
+FORMAT_JSON = "json"
+FORMAT_NDJSON = "ndjson"
+
+# Content types of line-delimited JSON
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+# Insignificant whitespace between JSON tokens
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def is_ndjson(content_type: Optional[str]) -> bool:
+    """Check whether a Content-Type header announces line-delimited JSON."""
+    return bool(content_type) and content_type.split(";")[0].strip().lower() in NDJSON_CONTENT_TYPES
+
+
+class JSONStream:
+    """
+    Parses the records of a JSON body from an iterable of byte chunks.
+    
+    Usage:
+        stream = JSONStream(response.iter_content(65536), records_key="data")
+        for batch in stream.iter_batches(1000):
+            process(batch)
+    
+    In "auto" format the body's shape decides: a top-level array is a list of
+    records, an object holds them under ``records_key`` (an object without
+    it has none), and several top-level values are NDJSON records.
+    """
+    
+    def __init__(
+        self,
+        chunks: Iterable[bytes],
+        records_key: Optional[str] = "data",
+        format: str = FORMAT_AUTO,
+        encoding: str = "utf-8",
+    ):
+        """
+        Initialize the stream.
+        
+        Args:
+            chunks: Body as byte chunks, e.g. ``response.iter_content(65536)``
+            records_key: Key of the record array in an object body
+            format: "auto", "json" or "ndjson"
+            encoding: Text encoding of the body
+        """
+        if format not in (FORMAT_AUTO, FORMAT_JSON, FORMAT_NDJSON):
+            raise ValueError(f"Unknown JSON format: {format}")
+        self.chunks = iter(chunks)
+        self.records_key = records_key
+        self.format = format
+        self.decoder = codecs.getincrementaldecoder(encoding)()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self._raw_decode = json.JSONDecoder().raw_decode
+    
+    def iter_batches(self, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Any]]:
+        """
+        Parse the body, yielding lists of at most ``batch_size`` records.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
+        batch: List[Any] = []
+        for record in self.iter_records():
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    def iter_records(self) -> Iterator[Any]:
+        """
+        Parse the body, yielding one record at a time.
+        """
+        first = self._peek()
+        if first is None:
+            return
+        if self.format == FORMAT_NDJSON:
+            yield from self._values()
+        elif first == "[":
+            yield from self._array()
+            self._check_end()
+        elif first == "{":
+            leftover = yield from self._object()
+            if self._peek() is not None and self.format == FORMAT_AUTO:
+                # More top-level values: the body is NDJSON and the object its first record
+                if leftover is not None:
+                    yield leftover
+                yield from self._values()
+            else:
+                self._check_end()
+        else:
+            # A lone scalar holds no records
+            self._value()
+            self._check_end()
+    
+    def _read(self) -> bool:
+        """Append the next chunk to the buffer; False at the end of the body."""
+        if self.eof:
+            return False
+        # Drop the parsed text first so the buffer stays small
+        if self.pos:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        for chunk in self.chunks:
+            if chunk:
+                self.buffer += self.decoder.decode(chunk)
+                return True
+        self.buffer += self.decoder.decode(b"", final=True)
+        self.eof = True
+        return False
+    
+    def _peek(self) -> Optional[str]:
+        """Skip whitespace and return the next character, None at the end."""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._read():
+                return None
+    
+    def _expect(self, characters: str) -> str:
+        """Consume the next character, which must be one of ``characters``."""
+        character = self._peek()
+        if character is None or character not in characters:
+            found = "end of data" if character is None else repr(character)
+            raise ValueError(f"Invalid JSON: expected one of {characters!r}, found {found}")
+        self.pos += 1
+        return character
+    
+    def _value(self) -> Any:
+        """
+        Decode the next complete value.
+        
+        A value ending at the end of the buffer (e.g. a number) may continue
+        in the next chunk, so it is only taken once more text or the end of
+        the body follows it.
+        """
+        self._peek()
+        while True:
+            try:
+                value, end = self._raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                end = None
+            if end is not None and (end < len(self.buffer) or self.eof):
+                self.pos = end
+                return value
+            # Incomplete: read until the unparsed text doubled, so a large value is not re-parsed per chunk
+            wanted = 2 * (len(self.buffer) - self.pos)
+            while self._read() and len(self.buffer) - self.pos < wanted:
+                pass
+    
+    def _array(self) -> Iterator[Any]:
+        """Yield the elements of the array at the current position."""
+        self._expect("[")
+        if self._peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._expect(",]") == "]":
+                return
+    
+    def _object(self) -> Iterator[Any]:
+        """
+        Yield the records of the object at the current position.
+        
+        Returns:
+            The object itself if it has no ``records_key`` array (it may be
+            the first NDJSON record), else None
+        """
+        self._expect("{")
+        fields: Dict[str, Any] = {}
+        has_records = False
+        if self._peek() == "}":
+            self.pos += 1
+            return fields
+        while True:
+            if self._peek() != '"':
+                raise ValueError("Invalid JSON: expected an object key")
+            key = self._value()
+            self._expect(":")
+            if key == self.records_key and self._peek() == "[":
+                has_records = True
+                yield from self._array()
+            else:
+                fields[key] = self._value()
+            if self._expect(",}") == "}":
+                break
+        return None if has_records else fields
+    
+    def _values(self) -> Iterator[Any]:
+        """Yield the remaining top-level values (NDJSON records)."""
+        while self._peek() is not None:
+            yield self._value()
+    
+    def _check_end(self):
+        """Reject data after the top-level value, like ``json.loads``."""
+        if self._peek() is not None:
+            raise ValueError("Invalid JSON: extra data after the top-level value")
@@ -0,0 +1,187 @@
+"""
+Import run instrumentation.
+
+``ImportMetrics`` measures the wall and CPU time and the record counts of
+each stage (fetch, transform, save) plus the database activity of an
+importer run. ``emit_emf`` writes metrics as a CloudWatch Embedded Metric
+Format (EMF) log line: in AWS Lambda, CloudWatch turns such stdout lines
+into metrics without any API calls, so alarms can watch import throughput.
+"""
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, TextIO, Tuple
+from app.config import METRICS_NAMESPACE
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Get the peak resident memory of this process.
+    
+    Returns:
+        Peak RSS in megabytes, or None where it cannot be measured
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class ImportMetrics:
+    """
+    Per-stage timing and database counters of one import run.
+    
+    Stages may run in different threads (pipeline mode): CPU time is measured
+    with the thread CPU clock around each stage call, and all updates are
+    thread-safe.
+    
+    Usage:
+        metrics = ImportMetrics()
+        with metrics.stage("save", records=len(rows)):
+            save(rows)
+        metrics.as_dict(records=len(rows))
+    """
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.db: Dict[str, float] = {}
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def stage(self, name: str, records: int = 0):
+        """
+        Add the wall and CPU time of the block to a stage.
+        
+        Args:
+            name: Stage name, e.g. "fetch"
+            records: Number of records processed in the block
+        """
+        wall_started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            yield
+        finally:
+            self.add(
+                name,
+                wall_seconds=time.perf_counter() - wall_started,
+                cpu_seconds=time.thread_time() - cpu_started,
+                records=records,
+            )
+    
+    def add(self, name: str, **counters: float):
+        """
+        Add to the counters of a stage ("wall_seconds", "cpu_seconds", "records").
+        
+        Args:
+            name: Stage name
+            counters: Values to add
+        """
+        with self._lock:
+            stage = self.stages.setdefault(name, {"wall_seconds": 0.0, "cpu_seconds": 0.0, "records": 0})
+            for counter, value in counters.items():
+                stage[counter] += value
+    
+    def record_db(self, name: str, value: float = 1):
+        """
+        Add to a database counter (used with ``collect_db_stats``).
+        
+        Args:
+            name: Counter name, e.g. "round_trips"
+            value: Value to add
+        """
+        with self._lock:
+            self.db[name] = self.db.get(name, 0) + value
+    
+    def as_dict(self, records: int = 0, bytes_fetched: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Get the metrics of the run so far.
+        
+        Args:
+            records: Records imported by the run, for the overall records/sec
+            bytes_fetched: Bytes read from the source, if the importer knows
+        
+        Returns:
+            Dictionary with the run's wall and CPU time, records/sec (None
+            without records, so empty runs do not drag down throughput), peak RSS,
+            bytes fetched, per-stage "stages" and database "db" counters
+        """
+        seconds = time.perf_counter() - self.started
+        with self._lock:
+            stages = {
+                name: {
+                    "wall_seconds": round(stage["wall_seconds"], 3),
+                    "cpu_seconds": round(stage["cpu_seconds"], 3),
+                    "records": stage["records"],
+                    "records_per_sec": round(stage["records"] / stage["wall_seconds"], 1)
+                    if stage["wall_seconds"] else None,
+                }
+                for name, stage in self.stages.items()
+            }
+            db = {
+                "round_trips": int(self.db.get("round_trips", 0)),
+                "checkouts": int(self.db.get("checkouts", 0)),
+                "checkout_wait_ms": round(self.db.get("checkout_wait_ms", 0.0), 2),
+            }
+        return {
+            "seconds": round(seconds, 3),
+            "cpu_seconds": round(time.process_time() - self.cpu_started, 3),
+            "records_per_sec": round(records / seconds, 1) if records and seconds else None,
+            "peak_rss_mb": peak_rss_mb(),
+            "bytes_fetched": bytes_fetched,
+            "stages": stages,
+            "db": db,
+        }
+
+
+def emit_emf(
+    dimensions: Dict[str, str],
+    values: Dict[str, Tuple[Optional[float], str]],
+    namespace: str = METRICS_NAMESPACE,
+    stream: Optional[TextIO] = None,
+) -> Dict[str, Any]:
+    """
+    Write metrics as one CloudWatch Embedded Metric Format log line.
+    
+    Every metric is published both per dimension set and without dimensions,
+    so alarms can watch the total without listing every importer.
+    
+    Usage:
+        emit_emf({"Importer": "CSVImporter"}, {"RecordsPerSecond": (1250.0, "Count/Second")})
+    
+    Args:
+        dimensions: Dimension names and values
+        values: Metric name -> (value, CloudWatch unit); None values are left out
+        namespace: CloudWatch namespace
+        stream: Output stream (default stdout, which Lambda sends to CloudWatch Logs)
+    
+    Returns:
+        The EMF document that was written
+    """
+    values = {name: value for name, value in values.items() if value[0] is not None}
+    document: Dict[str, Any] = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": namespace,
+                "Dimensions": [list(dimensions), []],
+                "Metrics": [{"Name": name, "Unit": unit} for name, (_, unit) in values.items()],
+            }],
+        },
+        **dimensions,
+        **{name: value for name, (value, _) in values.items()},
+    }
+    # Not through the logger: EMF lines must be bare JSON
+    stream = stream or sys.stdout
+    stream.write(json.dumps(document) + "\n")
+    stream.flush()
+    return document
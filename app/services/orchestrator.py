@@ -0,0 +1,277 @@
+"""
+Runs several importers per invocation.
+
+The Lambda event selects which registered importers run and with which
+config; they run in parallel threads (sharing the one database pool) up to
+a concurrency limit, no new importer is started when the remaining Lambda
+time is too short, and the per-importer results are aggregated.
+
+Event format:
+    {
+        "importers": [
+            "intaker",                                    # registry name
+            {"name": "ads_123", "importer": "api", "config": {...}},
+        ],
+        "concurrency": 4
+    }
+
+Without "importers" the IMPORTERS setting is used (default: "intaker"), so a
+scheduled event such as ``{}`` runs only the configured importers.
+
+Resumable importers get a "deadline" shortly before the invocation ends and
+stop there (see the checkpoints section of BaseImporter); importers still
+running at the deadline are waited for until just before the invocation
+ends. The jobs that stopped or were skipped are returned as
+``result["continuation"]``: job specs for the next invocation, carrying each
+importer's checkpoint. Importers still running then (threads cannot be
+stopped) are reported with status "running" and are not continued, so no
+second run of the same import starts while they are still writing.
+"""
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+from app.config import IMPORTERS, IMPORT_CONCURRENCY, IMPORT_TIME_MARGIN_MS
+from app.services.registry import get_importer
+from app.logger_config import get_logger
+
+logger = get_logger(__name__)
+
+# Time kept for returning the result after waiting for running importers
+RETURN_MARGIN_MS = 1000
+
+
+class ImportJob:
+    """One importer run: a result name, the registered importer and its config."""
+    
+    def __init__(self, name: str, importer: Optional[str] = None, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the job.
+        
+        Args:
+            name: Name the result is reported under
+            importer: Registry name of the importer class (defaults to ``name``)
+            config: Importer configuration
+        """
+        self.name = name
+        self.importer = importer or name
+        self.config = config or {}
+    
+    @classmethod
+    def from_spec(cls, spec: Any) -> "ImportJob":
+        """
+        Build a job from an event entry.
+        
+        Args:
+            spec: Registry name, or a dict with "name" and optional "importer" and "config"
+        
+        Returns:
+            Import job
+        """
+        if isinstance(spec, str):
+            return cls(spec)
+        if isinstance(spec, dict) and spec.get("name"):
+            return cls(spec["name"], spec.get("importer"), spec.get("config"))
+        raise ValueError(f"Invalid importer spec: {spec!r}")
+    
+    def to_spec(self, checkpoint: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Get the event entry of this job, e.g. to continue it in another invocation.
+        
+        Args:
+            checkpoint: Checkpoint to resume from (stored in the config)
+        
+        Returns:
+            Dict with "name", "importer" and "config"
+        """
+        config = {key: value for key, value in self.config.items() if key not in ("checkpoint", "deadline")}
+        if checkpoint is not None:
+            config["checkpoint"] = checkpoint
+        return {"name": self.name, "importer": self.importer, "config": config}
+
+
+def jobs_from_event(event: Optional[Dict[str, Any]]) -> List[ImportJob]:
+    """
+    Select the import jobs of an invocation.
+    
+    Args:
+        event: Lambda event
+    
+    Returns:
+        Jobs from the event's "importers" list, else from the IMPORTERS setting
+    """
+    specs = (event or {}).get("importers") if isinstance(event, dict) else None
+    if specs is None:
+        specs = IMPORTERS
+    if isinstance(specs, str):
+        specs = [specs]
+    jobs = [ImportJob.from_spec(spec) for spec in specs]
+    
+    names = [job.name for job in jobs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate importer job names: {', '.join(duplicates)}")
+    return jobs
+
+
+class Orchestrator:
+    """
+    Runs import jobs in parallel within a time budget.
+    
+    Usage:
+        orchestrator = Orchestrator(concurrency=4, remaining_ms=context.get_remaining_time_in_millis)
+        result = orchestrator.run(jobs_from_event(event))
+    """
+    
+    def __init__(
+        self,
+        concurrency: int = IMPORT_CONCURRENCY,
+        remaining_ms: Optional[Callable[[], int]] = None,
+        time_margin_ms: int = IMPORT_TIME_MARGIN_MS,
+        return_margin_ms: int = RETURN_MARGIN_MS,
+    ):
+        """
+        Initialize the orchestrator.
+        
+        Args:
+            concurrency: Maximum number of importers running at once
+            remaining_ms: Function returning the remaining invocation time in
+                milliseconds (e.g. ``context.get_remaining_time_in_millis``);
+                None means no time limit
+            time_margin_ms: Importers are not started once less than this
+                much time is left; it is their deadline
+            return_margin_ms: Running importers are waited for until this
+                much time is left
+        """
+        self.concurrency = max(1, concurrency)
+        self.remaining_ms = remaining_ms
+        self.time_margin_ms = time_margin_ms
+        self.return_margin_ms = return_margin_ms
+    
+    def _time_left_ms(self) -> Optional[float]:
+        """Milliseconds left before the margin, or None without a time limit."""
+        if self.remaining_ms is None:
+            return None
+        return self.remaining_ms() - self.time_margin_ms
+    
+    def _job_config(self, job: ImportJob) -> Dict[str, Any]:
+        """Config of a job, with the invocation deadline as the importer "deadline"."""
+        time_left = self._time_left_ms()
+        if time_left is None:
+            return job.config
+        deadline = time.time() + time_left / 1000
+        if job.config.get("deadline") is not None:
+            deadline = min(deadline, job.config["deadline"])
+        return {**job.config, "deadline": deadline}
+    
+    def _run_job(self, job: ImportJob) -> Dict[str, Any]:
+        """Run one importer and return its result, turning exceptions into a failed result."""
+        started = time.perf_counter()
+        try:
+            importer = get_importer(job.importer)(config=self._job_config(job))
+            result = importer.run()
+        except Exception as e:
+            logger.error(f"Importer '{job.name}' failed: {str(e)}", exc_info=True)
+            result = {"status": "failed", "error": str(e), "importer": job.importer}
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        logger.info(f"Importer '{job.name}' finished with status {result['status']} in {result['seconds']}s")
+        return result
+    
+    def run(self, jobs: List[ImportJob]) -> Dict[str, Any]:
+        """
+        Run the jobs and aggregate their results.
+        
+        Args:
+            jobs: Import jobs, started in list order
+        
+        Returns:
+            Dictionary with the overall "status", per-job "results", a
+            "summary" and the "continuation" job specs (None if every job ran
+            to the end)
+        """
+        started = time.perf_counter()
+        results: Dict[str, Dict[str, Any]] = {}
+        pending = list(jobs)
+        running: Dict[Future, ImportJob] = {}
+        logger.info(f"Running {len(jobs)} importers with concurrency {self.concurrency}")
+        
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="importer")
+        try:
+            while pending or running:
+                time_left = self._time_left_ms()
+                if time_left is not None and time_left <= 0:
+                    break
+                
+                while pending and len(running) < self.concurrency:
+                    job = pending.pop(0)
+                    running[executor.submit(self._run_job, job)] = job
+                
+                timeout = time_left / 1000 if time_left is not None else None
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = running.pop(future)
+                    results[job.name] = future.result()
+            
+            if running:
+                # Past the deadline: resumable importers stop after their current chunk
+                logger.info(f"Waiting for {len(running)} importers to stop")
+                timeout = max(0, self.remaining_ms() - self.return_margin_ms) / 1000
+                done, _ = wait(running, timeout=timeout)
+                for future in done:
+                    job = running.pop(future)
+                    results[job.name] = future.result()
+        finally:
+            # Do not block the invocation on importers that did not stop
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        for job in pending:
+            logger.warning(f"Importer '{job.name}' skipped: not enough time left")
+            results[job.name] = {"status": "skipped", "reason": "not enough time left", "importer": job.importer}
+        for job in running.values():
+            logger.warning(f"Importer '{job.name}' still running at the end of the invocation")
+            results[job.name] = {"status": "running", "reason": "still running at the deadline", "importer": job.importer}
+        
+        ordered = {job.name: results[job.name] for job in jobs}
+        return {
+            "status": self._overall_status(ordered),
+            "results": ordered,
+            "summary": self._summary(ordered, time.perf_counter() - started),
+            "continuation": self._continuation(jobs, ordered),
+        }
+    
+    @staticmethod
+    def _continuation(jobs: List[ImportJob], results: Dict[str, Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """Job specs continuing the jobs that stopped early or were skipped (not the ones still running)."""
+        specs = []
+        for job in jobs:
+            result = results[job.name]
+            if "checkpoint" in result:
+                specs.append(job.to_spec(result["checkpoint"]))
+            elif result["status"] == "skipped":
+                # Resumable importers continue from their stored checkpoint
+                specs.append(job.to_spec())
+        return specs or None
+    
+    @staticmethod
+    def _overall_status(results: Dict[str, Dict[str, Any]]) -> str:
+        """
+        "success" if every importer succeeded, "incomplete" if the others
+        stopped early, "failed" if none got anywhere, else "partial".
+        """
+        statuses = [result["status"] for result in results.values()]
+        if all(status == "success" for status in statuses):
+            return "success"
+        if all(status in ("success", "incomplete") for status in statuses):
+            return "incomplete"
+        if not any(status in ("success", "partial", "incomplete") for status in statuses):
+            return "failed"
+        return "partial"
+    
+    @staticmethod
+    def _summary(results: Dict[str, Dict[str, Any]], seconds: float) -> Dict[str, Any]:
+        """Count importers by status and add up their record counters."""
+        summary: Dict[str, Any] = {"importers": len(results), "seconds": round(seconds, 3)}
+        for result in results.values():
+            summary[result["status"]] = summary.get(result["status"], 0) + 1
+            for counter in ("fetched", "saved", "errors"):
+                summary[counter] = summary.get(counter, 0) + result.get("stats", {}).get(counter, 0)
+        return summary
@@ -0,0 +1,396 @@
+"""
+Pagination strategies and concurrent page fetching for API importers.
+
+Supported strategies:
+- PageNumberPagination: ``?page=1``, ``?page=2``, ...
+- OffsetPagination: ``?offset=0&limit=100``, ``?offset=100&limit=100``, ...
+- CursorPagination: a cursor or next-page link taken from each response
+
+Page-number and offset pages are independent, so ``fetch_pages`` requests
+several of them at once on a bounded thread pool. Cursor pages depend on the
+previous response and are fetched one after another, but the next page is
+requested before the current one is handed to the caller.
+
+``fetch_pages`` can report its resume position (the first page index not yet
+handed out in order, or the next cursor request) and start from one, so an
+interrupted import can continue where it stopped.
+"""
+from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from app.services.http_client import HttpClient
+from app.logger_config import get_logger
+
+logger = get_logger(__name__)
+
+# Default number of pages fetched concurrently
+DEFAULT_MAX_WORKERS = 4
+
+
+class PaginationStrategy(ABC):
+    """
+    Base class for pagination strategies.
+    
+    Args:
+        records_key: Key of the record list in a response object. Responses that
+            are plain lists are used as-is.
+    """
+    
+    def __init__(self, records_key: str = "data"):
+        self.records_key = records_key
+    
+    def extract_records(self, payload: Any) -> List[Dict[str, Any]]:
+        """
+        Get the records contained in a response payload.
+        
+        Args:
+            payload: Decoded JSON response
+        
+        Returns:
+            List of records (empty if none were found)
+        """
+        if isinstance(payload, list):
+            return payload
+        if isinstance(payload, dict) and isinstance(payload.get(self.records_key), list):
+            return payload[self.records_key]
+        return []
+
+
+class IndexedPagination(PaginationStrategy):
+    """
+    Base class for strategies where page N can be requested without page N-1.
+    
+    Args:
+        page_size: Expected number of records per page. A shorter page marks
+            the end of the data.
+        total_key: Optional response key holding the total number of pages
+            (page-number) or records (offset)
+        records_key: Key of the record list in a response object
+    """
+    
+    def __init__(self, page_size: int = 100, total_key: Optional[str] = None, records_key: str = "data"):
+        super().__init__(records_key)
+        self.page_size = page_size
+        self.total_key = total_key
+    
+    @abstractmethod
+    def params_for(self, index: int) -> Dict[str, Any]:
+        """
+        Get the query parameters of a page.
+        
+        Args:
+            index: Zero-based page index
+        
+        Returns:
+            Query parameters for the page
+        """
+        pass
+    
+    @abstractmethod
+    def last_index(self, payload: Any) -> Optional[int]:
+        """
+        Get the index of the last page from a response, if the API reports it.
+        
+        Args:
+            payload: Decoded JSON response
+        
+        Returns:
+            Zero-based index of the last page, or None if unknown
+        """
+        pass
+
+
+class PageNumberPagination(IndexedPagination):
+    """
+    Page-number pagination, e.g. ``?page=1&per_page=100``.
+    
+    Args:
+        page_param: Name of the page-number parameter
+        size_param: Name of the page-size parameter (None to omit it)
+        first_page: Number of the first page
+    """
+    
+    def __init__(
+        self,
+        page_param: str = "page",
+        size_param: Optional[str] = "per_page",
+        first_page: int = 1,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.page_param = page_param
+        self.size_param = size_param
+        self.first_page = first_page
+    
+    def params_for(self, index: int) -> Dict[str, Any]:
+        params = {self.page_param: self.first_page + index}
+        if self.size_param:
+            params[self.size_param] = self.page_size
+        return params
+    
+    def last_index(self, payload: Any) -> Optional[int]:
+        if self.total_key and isinstance(payload, dict) and payload.get(self.total_key) is not None:
+            return int(payload[self.total_key]) - 1
+        return None
+
+
+class OffsetPagination(IndexedPagination):
+    """
+    Offset/limit pagination, e.g. ``?offset=200&limit=100``.
+    
+    Args:
+        offset_param: Name of the offset parameter
+        limit_param: Name of the limit parameter
+    """
+    
+    def __init__(self, offset_param: str = "offset", limit_param: str = "limit", **kwargs):
+        super().__init__(**kwargs)
+        self.offset_param = offset_param
+        self.limit_param = limit_param
+    
+    def params_for(self, index: int) -> Dict[str, Any]:
+        return {self.offset_param: index * self.page_size, self.limit_param: self.page_size}
+    
+    def last_index(self, payload: Any) -> Optional[int]:
+        if self.total_key and isinstance(payload, dict) and payload.get(self.total_key) is not None:
+            total_records = int(payload[self.total_key])
+            return max(0, (total_records + self.page_size - 1) // self.page_size - 1)
+        return None
+
+
+class CursorPagination(PaginationStrategy):
+    """
+    Cursor or next-link pagination.
+    
+    Args:
+        cursor_param: Query parameter that carries the cursor
+        cursor_key: Response key holding the next cursor
+        next_url_key: Response key holding a full next-page URL. When set it
+            takes precedence over ``cursor_key``.
+    """
+    
+    def __init__(
+        self,
+        cursor_param: str = "cursor",
+        cursor_key: str = "next_cursor",
+        next_url_key: Optional[str] = None,
+        records_key: str = "data",
+    ):
+        super().__init__(records_key)
+        self.cursor_param = cursor_param
+        self.cursor_key = cursor_key
+        self.next_url_key = next_url_key
+    
+    def next_request(
+        self, payload: Any, url: str, params: Dict[str, Any]
+    ) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Get the URL and parameters of the page after ``payload``.
+        
+        Args:
+            payload: Decoded JSON response of the current page
+            url: URL of the current page
+            params: Query parameters of the current page
+        
+        Returns:
+            (url, params) of the next page, or None on the last page
+        """
+        if not isinstance(payload, dict):
+            return None
+        if self.next_url_key:
+            next_url = payload.get(self.next_url_key)
+            # A next link already carries all its query parameters
+            return (next_url, {}) if next_url else None
+        cursor = payload.get(self.cursor_key)
+        if not cursor:
+            return None
+        return url, {**params, self.cursor_param: cursor}
+
+
+PAGINATION_TYPES = {
+    "page": PageNumberPagination,
+    "offset": OffsetPagination,
+    "cursor": CursorPagination,
+}
+
+
+def pagination_from_config(config: Dict[str, Any]) -> PaginationStrategy:
+    """
+    Build a pagination strategy from an importer config section.
+    
+    Usage:
+        pagination_from_config({"type": "page", "page_size": 500, "total_key": "total_pages"})
+    
+    Args:
+        config: Dictionary with a "type" key ("page", "offset" or "cursor") and
+            the strategy's keyword arguments
+    
+    Returns:
+        Pagination strategy instance
+    """
+    options = dict(config)
+    pagination_type = options.pop("type", "page")
+    if pagination_type not in PAGINATION_TYPES:
+        raise ValueError(f"Unknown pagination type: {pagination_type}")
+    return PAGINATION_TYPES[pagination_type](**options)
+
+
+def fetch_pages(
+    client: HttpClient,
+    url: str,
+    pagination: PaginationStrategy,
+    params: Optional[Dict[str, Any]] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    start: Optional[Dict[str, Any]] = None,
+    progress: Optional[Dict[str, Any]] = None,
+    skip_unchanged: bool = False,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Fetch all pages of a paginated endpoint.
+    
+    Pages are yielded as soon as they arrive (for indexed strategies this is
+    completion order, not page order), while further requests keep running in
+    the background, so the caller can save one page while the next ones download.
+    
+    A page counts as processed once the caller asks for the next one. After
+    that, ``progress`` holds the position to resume from: {"page": index} of
+    the first page not processed yet (pages processed out of order after it
+    are fetched again), or {"url": ..., "params": ...} of the next cursor
+    request ("url" is None after the last page).
+    
+    Args:
+        client: HTTP client used for the requests
+        url: Endpoint URL
+        pagination: Pagination strategy
+        params: Extra query parameters sent with every request
+        max_workers: Maximum number of concurrent requests
+        start: Position to resume from, as previously reported in ``progress``
+        progress: Dictionary updated in place with the resume position
+        skip_unchanged: Leave out the records of pages the server confirmed as
+            unchanged (HTTP 304, see ``HttpClient.get_json_cached``); they were
+            imported by an earlier successful run
+    
+    Yields:
+        Lists of records, one per page
+    """
+    params = params or {}
+    progress = progress if progress is not None else {}
+    get_page = _page_getter(client, skip_unchanged)
+    if isinstance(pagination, IndexedPagination):
+        start_index = int((start or {}).get("page", 0))
+        yield from _fetch_indexed(get_page, url, pagination, params, max(1, max_workers), start_index, progress)
+    elif isinstance(pagination, CursorPagination):
+        request = (start["url"], start.get("params") or {}) if start else (url, params)
+        if request[0] is None:
+            logger.info(f"Nothing left to fetch from {url}")
+            return
+        yield from _fetch_cursor(get_page, request, pagination, progress)
+    else:
+        raise TypeError(f"Unsupported pagination strategy: {type(pagination).__name__}")
+
+
+def _page_getter(client: HttpClient, skip_unchanged: bool) -> Callable[..., Tuple[Any, bool]]:
+    """Function fetching a page as (payload, modified)."""
+    if skip_unchanged:
+        return client.get_json_cached
+    return lambda url, params: (client.get_json(url, params), True)
+
+
+def _fetch_indexed(
+    get_page: Callable[..., Tuple[Any, bool]],
+    url: str,
+    pagination: IndexedPagination,
+    params: Dict[str, Any],
+    max_workers: int,
+    start_index: int,
+    progress: Dict[str, Any],
+) -> Iterator[List[Dict[str, Any]]]:
+    """Fetch independent pages concurrently, stopping at the first short page."""
+    last_index: Optional[int] = None
+    next_index = start_index
+    in_flight: Dict[Future, int] = {}
+    processed = set()
+    progress["page"] = start_index
+    
+    def mark_processed(index: int):
+        processed.add(index)
+        while progress["page"] in processed:
+            processed.discard(progress["page"])
+            progress["page"] += 1
+    
+    def fill(executor: ThreadPoolExecutor):
+        nonlocal next_index
+        while len(in_flight) < max_workers and (last_index is None or next_index <= last_index):
+            page_params = {**params, **pagination.params_for(next_index)}
+            in_flight[executor.submit(get_page, url, page_params)] = next_index
+            next_index += 1
+    
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="page-fetch") as executor:
+        try:
+            fill(executor)
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                pages = []
+                for future in done:
+                    index = in_flight.pop(future)
+                    payload, modified = future.result()
+                    if last_index is not None and index > last_index:
+                        mark_processed(index)
+                        continue
+                    
+                    reported_last = pagination.last_index(payload)
+                    records = pagination.extract_records(payload)
+                    if reported_last is None and len(records) < pagination.page_size:
+                        reported_last = index
+                    if reported_last is not None:
+                        last_index = reported_last if last_index is None else min(last_index, reported_last)
+                    
+                    if records and modified:
+                        pages.append((index, records))
+                    else:
+                        mark_processed(index)
+                
+                # Keep the pool busy while the caller processes these pages
+                fill(executor)
+                for index, records in pages:
+                    yield records
+                    mark_processed(index)
+        finally:
+            for future in in_flight:
+                future.cancel()
+    
+    logger.debug("Fetched %d pages from %s", next_index - start_index, url)
+
+
+def _fetch_cursor(
+    get_page: Callable[..., Tuple[Any, bool]],
+    request: Tuple[str, Dict[str, Any]],
+    pagination: CursorPagination,
+    progress: Dict[str, Any],
+) -> Iterator[List[Dict[str, Any]]]:
+    """Fetch cursor pages sequentially, prefetching the next page in the background."""
+    url = request[0]
+    page_count = 0
+    progress.update(url=request[0], params=request[1])
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="page-fetch") as executor:
+        future = executor.submit(get_page, *request)
+        try:
+            while future is not None:
+                payload, modified = future.result()
+                page_count += 1
+                next_request = pagination.next_request(payload, *request)
+                future = None
+                if next_request:
+                    request = next_request
+                    future = executor.submit(get_page, *next_request)
+                
+                records = pagination.extract_records(payload)
+                if records and modified:
+                    yield records
+                next_url, next_params = next_request or (None, {})
+                progress.update(url=next_url, params=next_params)
+        finally:
+            if future is not None:
+                future.cancel()
+    
+    logger.debug("Fetched %d pages from %s", page_count, url)
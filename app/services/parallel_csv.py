@@ -0,0 +1,307 @@
+"""
+Parallel multi-process CSV parsing for large files.
+
+The file is split into byte ranges that start and end on record boundaries
+(quoted fields containing newlines are respected). Each range is parsed and
+transformed in a process pool; the results come back to the calling process,
+which is the single writer to the database.
+
+Note: process pools need POSIX semaphores (/dev/shm), which AWS Lambda does
+not provide. Use this for backfills run locally or on a regular host; inside
+Lambda use the streaming CSV mode instead.
+"""
+import csv
+import io
+import mmap
+import os
+from functools import partial
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+from app.services.csv_source import BZIP2_MAGIC, GZIP_MAGIC
+from app.services.records import define_record
+from app.logger_config import get_logger
+
+logger = get_logger(__name__)
+
+# Target size of a single byte range
+DEFAULT_RANGE_SIZE = 8 * 1024 * 1024
+
+# Bytes scanned at once when counting quotes
+_SCAN_BLOCK = 16 * 1024 * 1024
+
+# Importer instances created inside worker processes, keyed by (class, config)
+_worker_importers: Dict[Tuple[Type, str], Any] = {}
+
+
+def _count_quotes(mm: mmap.mmap, start: int, end: int) -> int:
+    """Count quote characters in ``mm[start:end]`` without copying it at once."""
+    count = 0
+    for block_start in range(start, end, _SCAN_BLOCK):
+        count += mm[block_start:min(end, block_start + _SCAN_BLOCK)].count(b'"')
+    return count
+
+
+def _next_record_start(mm: mmap.mmap, position: int, in_quotes: bool) -> Tuple[int, bool]:
+    """
+    Find the first record start at or after ``position``.
+    
+    Args:
+        mm: Memory-mapped file
+        position: Byte position to search from
+        in_quotes: Whether ``position`` lies inside a quoted field
+    
+    Returns:
+        Tuple of (record start position, quote state at that position)
+    """
+    while True:
+        newline = mm.find(b"\n", position)
+        if newline == -1:
+            return len(mm), False
+        if _count_quotes(mm, position, newline) % 2:
+            in_quotes = not in_quotes
+        position = newline + 1
+        if not in_quotes:
+            return position, False
+
+
+def split_ranges(
+    path: str, range_size: int = DEFAULT_RANGE_SIZE, start_offset: int = 0
+) -> Tuple[int, List[Tuple[int, int]]]:
+    """
+    Split a CSV file into byte ranges aligned on record boundaries.
+    
+    Quote state is tracked by quote parity from the start of the file, so a
+    newline inside a quoted field is never used as a split point. This relies
+    on quotes only appearing in quoted fields (RFC 4180), as written by the
+    csv module and most exporters.
+    
+    Args:
+        path: Uncompressed CSV file path
+        range_size: Approximate size of each range in bytes
+        start_offset: Record boundary to start from (e.g. a saved resume offset);
+            0 starts right after the header
+    
+    Returns:
+        Tuple of (end of the header line, list of (start, end) ranges of data rows)
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return 0, []
+    
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm[:3].startswith(GZIP_MAGIC) or mm[:3].startswith(BZIP2_MAGIC):
+            raise ValueError(f"Compressed files cannot be split into ranges: {path}")
+        
+        header_end, _ = _next_record_start(mm, 0, False)
+        ranges = []
+        start = max(header_end, start_offset)
+        in_quotes = False
+        while start < size:
+            target = min(size, start + range_size)
+            if target >= size:
+                ranges.append((start, size))
+                break
+            if _count_quotes(mm, start, target) % 2:
+                in_quotes = not in_quotes
+            end, in_quotes = _next_record_start(mm, target, in_quotes)
+            ranges.append((start, end))
+            start = end
+    
+    return header_end, ranges
+
+
+def read_header(path: str, delimiter: str = ",", encoding: str = "utf-8") -> Tuple[str, ...]:
+    """
+    Read the header row of a CSV file.
+    
+    Args:
+        path: CSV file path
+        delimiter: Field delimiter
+        encoding: Text encoding
+    
+    Returns:
+        Tuple of column names
+    """
+    with open(path, "r", encoding=encoding, newline="") as f:
+        header = next(csv.reader(f, delimiter=delimiter), [])
+    if header and header[0].startswith("\ufeff"):
+        header[0] = header[0][1:]
+    return tuple(column.strip() for column in header)
+
+
+def parse_range(
+    path: str, start: int, end: int, delimiter: str = ",", encoding: str = "utf-8"
+) -> List[Tuple[str, ...]]:
+    """
+    Parse the rows of one byte range.
+    
+    Args:
+        path: CSV file path
+        start: Range start (a record boundary)
+        end: Range end (a record boundary)
+        delimiter: Field delimiter
+        encoding: Text encoding
+    
+    Returns:
+        List of row tuples
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode(encoding)
+    return [tuple(row) for row in csv.reader(io.StringIO(text, newline=""), delimiter=delimiter) if row]
+
+
+def _process_range(
+    importer_class: Type, config: Dict[str, Any], header: Tuple[str, ...], path: str, start: int, end: int
+) -> Tuple[int, List[Any], int, Optional[Tuple[str, Tuple[str, ...]]]]:
+    """
+    Worker: parse a range and run the importer's ``transform_data`` on it.
+    
+    Returns:
+        Tuple of (rows parsed, transformed records, transformation errors,
+        record schema if the records were sent as plain tuples)
+    """
+    key = (importer_class, repr(sorted(config.items())))
+    importer = _worker_importers.get(key)
+    if importer is None:
+        importer = importer_class(config)
+        _worker_importers[key] = importer
+    importer.source.set_header(header)
+    
+    rows = parse_range(path, start, end, importer.delimiter, importer.encoding)
+    errors_before = importer.stats["errors"]
+    transformed = importer.transform_data(rows) or []
+    errors = importer.stats["errors"] - errors_before
+    
+    schema = None
+    record_type = type(transformed[0]) if transformed else None
+    if record_type is not None and hasattr(record_type, "_fields"):
+        # Named tuples pickle record by record; plain tuples plus the schema are much cheaper
+        schema = (record_type.__name__, tuple(record_type._fields))
+        transformed = list(map(tuple, transformed))
+    return len(rows), transformed, errors, schema
+
+
+def _unpack_result(
+    result: Tuple[int, List[Any], int, Optional[Tuple[str, Tuple[str, ...]]]]
+) -> Tuple[int, List[Any], int]:
+    """Restore the record type of a worker result."""
+    rows, transformed, errors, schema = result
+    if schema is not None:
+        make_record = partial(tuple.__new__, define_record(*schema))
+        transformed = list(map(make_record, transformed))
+    return rows, transformed, errors
+
+
+class ParallelCSVReader:
+    """
+    Parses and transforms a CSV file in a process pool.
+    
+    Each worker builds its own importer from ``importer_class(config)`` and
+    runs its ``transform_data`` on the rows of a range. The importer must
+    expose ``source`` (a CSVSource), ``delimiter`` and ``encoding``, like the
+    example CSVImporter.
+    
+    Results are yielded in file order when ``ordered`` is True, otherwise as
+    soon as a range is done. At most ``2 * workers`` ranges are in flight, which
+    bounds memory use.
+    
+    Usage:
+        reader = ParallelCSVReader("big.csv", CSVImporter, config, workers=4)
+        for index, end, rows, transformed, errors in reader.iter_results():
+            save(transformed)
+    """
+    
+    def __init__(
+        self,
+        path: str,
+        importer_class: Type,
+        config: Dict[str, Any],
+        workers: int = 2,
+        ordered: bool = True,
+        range_size: int = DEFAULT_RANGE_SIZE,
+        start_offset: int = 0,
+    ):
+        """
+        Initialize the reader.
+        
+        Args:
+            path: Uncompressed CSV file path
+            importer_class: Importer class used for transformation in the workers
+            config: Importer configuration (must be picklable)
+            workers: Number of worker processes
+            ordered: Yield results in file order
+            range_size: Approximate bytes per range
+            start_offset: Record boundary to start from (0 = after the header)
+        """
+        self.path = path
+        self.importer_class = importer_class
+        self.config = config
+        self.workers = max(1, workers)
+        self.ordered = ordered
+        self.range_size = range_size
+        self.start_offset = start_offset
+    
+    def iter_results(self) -> Iterator[Tuple[int, int, int, List[Any], int]]:
+        """
+        Parse and transform the file.
+        
+        Yields:
+            Tuples of (range index, range end offset, rows parsed, transformed
+            records, transformation errors)
+        """
+        delimiter = self.config.get("delimiter", ",")
+        encoding = self.config.get("encoding", "utf-8")
+        header = read_header(self.path, delimiter, encoding)
+        _, ranges = split_ranges(self.path, self.range_size, self.start_offset)
+        logger.info(f"Parsing {self.path} in {len(ranges)} ranges with {self.workers} workers")
+        
+        max_in_flight = self.workers * 2
+        next_range = 0
+        next_to_yield = 0
+        in_flight: Dict[Future, int] = {}
+        completed: Dict[int, Tuple[int, List[Any], int]] = {}
+        
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            try:
+                while next_range < len(ranges) or in_flight or completed:
+                    while next_range < len(ranges) and len(in_flight) + len(completed) < max_in_flight:
+                        start, end = ranges[next_range]
+                        future = executor.submit(
+                            _process_range, self.importer_class, self.config, header, self.path, start, end
+                        )
+                        in_flight[future] = next_range
+                        next_range += 1
+                    
+                    if in_flight:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            completed[in_flight.pop(future)] = _unpack_result(future.result())
+                    
+                    if self.ordered:
+                        while next_to_yield in completed:
+                            yield (next_to_yield, ranges[next_to_yield][1], *completed.pop(next_to_yield))
+                            next_to_yield += 1
+                    else:
+                        for index in sorted(completed):
+                            yield (index, ranges[index][1], *completed.pop(index))
+            finally:
+                for future in in_flight:
+                    future.cancel()
+    
+    @staticmethod
+    def supports(path: str) -> Optional[str]:
+        """
+        Check whether a file can be split into ranges.
+        
+        Args:
+            path: File path
+        
+        Returns:
+            None if it can, otherwise the reason it cannot
+        """
+        with open(path, "rb") as f:
+            signature = f.read(3)
+        if signature.startswith(GZIP_MAGIC) or signature.startswith(BZIP2_MAGIC):
+            return "compressed files cannot be split into byte ranges"
+        return None
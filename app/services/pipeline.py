@@ -0,0 +1,263 @@
+"""
+Bounded producer-consumer pipeline.
+
+Runs a source iterator and a chain of stage functions in separate threads,
+connected by bounded queues. A stage blocks when its output queue is full,
+so a slow writer throttles the fetcher instead of letting chunks pile up in
+memory. The first exception in any stage cancels the others and is raised
+from ``run()``.
+"""
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+from app.logger_config import get_logger
+
+logger = get_logger(__name__)
+
+# Default number of items buffered between two stages
+DEFAULT_QUEUE_SIZE = 2
+
+# How often blocked stages check for cancellation (seconds)
+_POLL_INTERVAL = 0.1
+
+# End-of-stream marker
+_DONE = object()
+
+
+def _default_size(item: Any) -> int:
+    """Number of records in an item: its length if it has one, otherwise 1."""
+    try:
+        return len(item)
+    except TypeError:
+        return 1
+
+
+class PipelineCancelled(Exception):
+    """Raised inside a stage thread when another stage failed."""
+
+
+class StageMetrics:
+    """Throughput and blocking counters of one pipeline stage."""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.records = 0
+        self.busy_seconds = 0.0
+        self.wait_input_seconds = 0.0
+        self.wait_output_seconds = 0.0
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """Metrics as a dictionary, with records/sec over the time spent working."""
+        return {
+            "items": self.items,
+            "records": self.records,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "wait_input_seconds": round(self.wait_input_seconds, 3),
+            "wait_output_seconds": round(self.wait_output_seconds, 3),
+            "records_per_sec": round(self.records / self.busy_seconds, 1) if self.busy_seconds else None,
+        }
+
+
+class _MeasuredQueue:
+    """Bounded queue that samples its depth on every put."""
+    
+    def __init__(self, name: str, maxsize: int):
+        self.name = name
+        self.maxsize = maxsize
+        self.queue: "queue.Queue[Any]" = queue.Queue(maxsize=maxsize)
+        self.puts = 0
+        self.depth_total = 0
+        self.depth_max = 0
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """Depth statistics as a dictionary."""
+        return {
+            "maxsize": self.maxsize,
+            "max_depth": self.depth_max,
+            "avg_depth": round(self.depth_total / self.puts, 2) if self.puts else 0.0,
+        }
+
+
+class Pipeline:
+    """
+    Runs a source and a chain of stages concurrently.
+    
+    Each stage is a ``(name, function)`` pair. The function receives one item
+    from the previous stage and returns the item for the next one; returning
+    None drops the item. The return value of the last stage is discarded.
+    
+    Usage:
+        pipeline = Pipeline(
+            ("fetch", fetch_chunks()),
+            [("transform", transform), ("save", save)],
+            queue_size=2,
+        )
+        metrics = pipeline.run()
+    """
+    
+    def __init__(
+        self,
+        source: Tuple[str, Iterable[Any]],
+        stages: Sequence[Tuple[str, Callable[[Any], Any]]],
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        size_of: Callable[[Any], int] = _default_size,
+    ):
+        """
+        Initialize the pipeline.
+        
+        Args:
+            source: ``(name, iterable)`` producing the items
+            stages: ``(name, function)`` pairs applied in order
+            queue_size: Maximum number of items waiting between two stages
+            size_of: Function returning the number of records in an item (for metrics)
+        """
+        if queue_size < 1:
+            raise ValueError("queue_size must be a positive integer")
+        self.source_name, self.source = source
+        self.stages = list(stages)
+        self.size_of = size_of
+        self.metrics = [StageMetrics(self.source_name)] + [StageMetrics(name) for name, _ in self.stages]
+        self.queues = [
+            _MeasuredQueue(f"{self.metrics[i].name}->{name}", queue_size) for i, (name, _) in enumerate(self.stages)
+        ]
+        self._cancelled = threading.Event()
+        self._errors: List[Tuple[str, BaseException]] = []
+        self._errors_lock = threading.Lock()
+    
+    def _fail(self, stage: str, error: BaseException):
+        """Record a stage failure and cancel the other stages."""
+        with self._errors_lock:
+            self._errors.append((stage, error))
+        self._cancelled.set()
+    
+    def _put(self, measured: _MeasuredQueue, item: Any, metrics: StageMetrics):
+        """Put an item, waiting while the queue is full unless the pipeline is cancelled."""
+        started = time.perf_counter()
+        while True:
+            if self._cancelled.is_set():
+                raise PipelineCancelled()
+            try:
+                measured.queue.put(item, timeout=_POLL_INTERVAL)
+                break
+            except queue.Full:
+                continue
+        metrics.wait_output_seconds += time.perf_counter() - started
+        depth = measured.queue.qsize()
+        measured.puts += 1
+        measured.depth_total += depth
+        measured.depth_max = max(measured.depth_max, depth)
+    
+    def _get(self, measured: _MeasuredQueue, metrics: StageMetrics) -> Any:
+        """Get an item, waiting while the queue is empty unless the pipeline is cancelled."""
+        started = time.perf_counter()
+        while True:
+            if self._cancelled.is_set():
+                raise PipelineCancelled()
+            try:
+                item = measured.queue.get(timeout=_POLL_INTERVAL)
+                break
+            except queue.Empty:
+                continue
+        metrics.wait_input_seconds += time.perf_counter() - started
+        return item
+    
+    def _run_source(self):
+        """Thread body of the source stage."""
+        metrics = self.metrics[0]
+        output = self.queues[0] if self.queues else None
+        iterator = iter(self.source)
+        try:
+            while True:
+                started = time.perf_counter()
+                item = next(iterator, _DONE)
+                metrics.busy_seconds += time.perf_counter() - started
+                if item is _DONE:
+                    break
+                metrics.items += 1
+                metrics.records += self.size_of(item)
+                if output is not None:
+                    self._put(output, item, metrics)
+            if output is not None:
+                self._put(output, _DONE, metrics)
+        except PipelineCancelled:
+            pass
+        except BaseException as e:
+            self._fail(metrics.name, e)
+        finally:
+            # Stop generators (and the workers they own) when the pipeline ends early
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except Exception as e:
+                    logger.warning(f"Error closing pipeline source: {str(e)}")
+    
+    def _run_stage(self, position: int):
+        """Thread body of the stage at ``position`` (1-based; 0 is the source)."""
+        metrics = self.metrics[position]
+        _, function = self.stages[position - 1]
+        source = self.queues[position - 1]
+        output = self.queues[position] if position < len(self.queues) else None
+        try:
+            while True:
+                item = self._get(source, metrics)
+                if item is _DONE:
+                    break
+                started = time.perf_counter()
+                result = function(item)
+                metrics.busy_seconds += time.perf_counter() - started
+                metrics.items += 1
+                metrics.records += self.size_of(item)
+                if output is not None and result is not None:
+                    self._put(output, result, metrics)
+            if output is not None:
+                self._put(output, _DONE, metrics)
+        except PipelineCancelled:
+            pass
+        except BaseException as e:
+            self._fail(metrics.name, e)
+    
+    def run(self) -> Dict[str, Any]:
+        """
+        Run all stages to completion.
+        
+        Returns:
+            Dictionary with per-stage metrics ("stages"), queue depth
+            statistics ("queues") and the total wall time ("seconds")
+        
+        Raises:
+            Exception: The first exception raised by any stage, after all
+                stages have stopped
+        """
+        started = time.perf_counter()
+        threads = [threading.Thread(target=self._run_source, name=f"pipeline-{self.source_name}", daemon=True)]
+        threads += [
+            threading.Thread(target=self._run_stage, args=(position,), name=f"pipeline-{name}", daemon=True)
+            for position, (name, _) in enumerate(self.stages, start=1)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        result = self.get_metrics()
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        if self._errors:
+            stage, error = self._errors[0]
+            logger.error(f"Pipeline stage '{stage}' failed: {str(error)}")
+            raise error
+        return result
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get the current stage and queue metrics.
+        
+        Returns:
+            Dictionary with "stages" and "queues" entries
+        """
+        return {
+            "stages": {metrics.name: metrics.as_dict() for metrics in self.metrics},
+            "queues": {measured.name: measured.as_dict() for measured in self.queues},
+        }
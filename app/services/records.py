@@ -0,0 +1,69 @@
+"""
+Compact, schema-defined record types.
+
+``define_record`` builds a named tuple class from a column list. Instances
+are plain tuples underneath (no per-instance dictionary), so they take a
+fraction of the memory of a ``dict`` per record and can be passed to
+``DatabaseManager.upsert_many`` / ``copy_upsert`` as rows without conversion.
+Fields are read by attribute (``record.email``), by position, or with
+``record.get("email")`` like a dictionary.
+"""
+from collections import namedtuple
+from functools import lru_cache
+from typing import Any, Sequence, Tuple, Type
+
+
+def _get(self, field: str, default: Any = None) -> Any:
+    """Read a field by name, like ``dict.get`` (tuple methods such as "count" are not fields)."""
+    if field in self._fields:
+        return self[self._fields.index(field)]
+    return default
+
+
+def _reduce(self):
+    """Pickle by schema so records created from a dynamic class can cross processes."""
+    return _rebuild_record, (type(self).__name__, self._fields, tuple(self))
+
+
+@lru_cache(maxsize=None)
+def _record_class(name: str, columns: Tuple[str, ...]) -> Type[tuple]:
+    """Create (once per name and columns) the record class."""
+    base = namedtuple(name, columns)
+    namespace = {
+        "__slots__": (),
+        "__doc__": f"{name}({', '.join(columns)})",
+        "__reduce__": _reduce,
+        "get": _get,
+    }
+    return type(name, (base,), namespace)
+
+
+def _rebuild_record(name: str, columns: Tuple[str, ...], values: Tuple[Any, ...]) -> tuple:
+    """Unpickle a record."""
+    return tuple.__new__(_record_class(name, columns), values)
+
+
+def define_record(name: str, columns: Sequence[str]) -> Type[tuple]:
+    """
+    Define a record type with the given columns.
+    
+    Calling it twice with the same name and columns returns the same class.
+    
+    Usage:
+        Customer = define_record("Customer", ["external_id", "name", "email"])
+        row = Customer("1", "Alice", "alice@example.com")
+        row.email, row[2], row.get("email")
+    
+    Args:
+        name: Class name
+        columns: Column names (valid Python identifiers, not "get")
+    
+    Returns:
+        Named tuple class with ``get()`` for dictionary-style access
+    
+    Raises:
+        ValueError: If a column is named "get", which would hide ``get()``
+    """
+    if "get" in columns:
+        raise ValueError(f'Record {name} cannot have a column named "get"')
+    return _record_class(name, tuple(columns))
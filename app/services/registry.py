@@ -0,0 +1,69 @@
+"""
+Importer registry.
+
+Importers register under a short name so that the Lambda event (or the
+IMPORTERS setting) can select which ones run.
+
+Usage:
+    @register_importer("google_ads")
+    class GoogleAdsImporter(BaseImporter):
+        ...
+    
+    importer_class = get_importer("google_ads")
+"""
+from typing import Dict, List, Optional, Type
+from app.logger_config import get_logger
+
+logger = get_logger(__name__)
+
+_registry: Dict[str, Type] = {}
+
+
+def register_importer(name: str, importer_class: Optional[Type] = None):
+    """
+    Register an importer class under ``name``.
+    
+    Can be used as a decorator (``@register_importer("name")``) or called
+    directly (``register_importer("name", MyImporter)``).
+    
+    Args:
+        name: Registry name
+        importer_class: Importer class (omit when used as a decorator)
+    
+    Returns:
+        The importer class, or a decorator registering it
+    """
+    def register(cls: Type) -> Type:
+        existing = _registry.get(name)
+        if existing is not None and existing is not cls:
+            logger.warning(f"Importer '{name}' re-registered: {existing.__name__} -> {cls.__name__}")
+        _registry[name] = cls
+        return cls
+    
+    if importer_class is not None:
+        return register(importer_class)
+    return register
+
+
+def get_importer(name: str) -> Type:
+    """
+    Get a registered importer class.
+    
+    Args:
+        name: Registry name
+    
+    Returns:
+        Importer class
+    
+    Raises:
+        KeyError: If no importer is registered under ``name``
+    """
+    try:
+        return _registry[name]
+    except KeyError:
+        raise KeyError(f"Unknown importer '{name}'; registered: {', '.join(sorted(_registry)) or 'none'}") from None
+
+
+def registered_importers() -> List[str]:
+    """Names of all registered importers, sorted."""
+    return sorted(_registry)
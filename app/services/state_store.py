@@ -0,0 +1,211 @@
+"""
+Persistent key-value state for importers.
+
+Importers use this to remember progress between runs, e.g. the watermark of
+the last successful incremental import. Two backends are available:
+- PostgresStateStore: a small state table accessed through ``db_manager``
+- FileStateStore: a JSON file, for local runs without a database
+"""
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from functools import partial
+from typing import Any, Dict, Optional
+from psycopg2 import sql
+from psycopg2.extras import Json
+from app.config import STATE_BACKEND, STATE_FILE_PATH, STATE_TABLE
+from app.services.database import DatabaseManager, db_manager, table_identifier
+from app.logger_config import get_logger
+
+logger = get_logger(__name__)
+
+# JSON encoder for state values (dates and datetimes are stored as ISO strings)
+_dumps = partial(json.dumps, default=str)
+
+
+class StateStore(ABC):
+    """
+    Base class for importer state stores.
+    
+    Values are grouped by namespace (e.g. "watermark") and key (usually the
+    importer's ``state_key``) and must be JSON serializable.
+    """
+    
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """
+        Get a stored value.
+        
+        Args:
+            namespace: State namespace
+            key: State key
+            
+        Returns:
+            Stored value, or None if nothing is stored
+        """
+        pass
+    
+    @abstractmethod
+    def set(self, namespace: str, key: str, value: Any):
+        """
+        Store a value, replacing any previous one.
+        
+        Args:
+            namespace: State namespace
+            key: State key
+            value: JSON serializable value
+        """
+        pass
+    
+    @abstractmethod
+    def delete(self, namespace: str, key: str):
+        """
+        Remove a stored value.
+        
+        Args:
+            namespace: State namespace
+            key: State key
+        """
+        pass
+
+
+class PostgresStateStore(StateStore):
+    """
+    State store backed by a Postgres table.
+    
+    The table is created on first use:
+        (namespace TEXT, key TEXT, value JSONB, updated_at TIMESTAMPTZ)
+    """
+    
+    def __init__(self, table: str = STATE_TABLE, database: Optional[DatabaseManager] = None):
+        """
+        Initialize the store.
+        
+        Args:
+            table: State table name
+            database: Database manager (defaults to the global ``db_manager``)
+        """
+        self.table = table
+        self.database = database or db_manager
+        self._table_ready = False
+        self._lock = threading.Lock()
+    
+    def _ensure_table(self):
+        """Create the state table if it does not exist yet."""
+        if self._table_ready:
+            return
+        with self._lock:
+            if not self._table_ready:
+                self.database.execute_update(sql.SQL("""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        namespace TEXT NOT NULL,
+                        key TEXT NOT NULL,
+                        value JSONB NOT NULL,
+                        updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                        PRIMARY KEY (namespace, key)
+                    )
+                """).format(table=table_identifier(self.table)))
+                self._table_ready = True
+    
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        self._ensure_table()
+        rows = self.database.execute_query(
+            sql.SQL("SELECT value FROM {table} WHERE namespace = %s AND key = %s").format(
+                table=table_identifier(self.table)
+            ),
+            (namespace, key)
+        )
+        return rows[0]["value"] if rows else None
+    
+    def set(self, namespace: str, key: str, value: Any):
+        self._ensure_table()
+        self.database.execute_update(
+            sql.SQL("""
+                INSERT INTO {table} (namespace, key, value)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (namespace, key) DO UPDATE SET
+                    value = EXCLUDED.value,
+                    updated_at = NOW()
+            """).format(table=table_identifier(self.table)),
+            (namespace, key, Json(value, dumps=_dumps))
+        )
+    
+    def delete(self, namespace: str, key: str):
+        self._ensure_table()
+        self.database.execute_update(
+            sql.SQL("DELETE FROM {table} WHERE namespace = %s AND key = %s").format(
+                table=table_identifier(self.table)
+            ),
+            (namespace, key)
+        )
+
+
+class FileStateStore(StateStore):
+    """
+    State store backed by a local JSON file.
+    
+    Intended for local runs. Writes replace the file atomically. In AWS Lambda
+    relative paths are moved to /tmp, the only writable location.
+    """
+    
+    def __init__(self, path: str = STATE_FILE_PATH):
+        """
+        Initialize the store.
+        
+        Args:
+            path: Path of the JSON state file
+        """
+        if os.getenv("AWS_LAMBDA_FUNCTION_NAME") and not path.startswith("/tmp/"):
+            path = os.path.join("/tmp", os.path.basename(path))
+        self.path = path
+        self._lock = threading.Lock()
+    
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Read the whole state file."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+    
+    def _save(self, state: Dict[str, Dict[str, Any]]):
+        """Write the whole state file atomically."""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(_dumps(state, indent=2, sort_keys=True))
+        os.replace(temp_path, self.path)
+    
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            return self._load().get(namespace, {}).get(key)
+    
+    def set(self, namespace: str, key: str, value: Any):
+        with self._lock:
+            state = self._load()
+            state.setdefault(namespace, {})[key] = json.loads(_dumps(value))
+            self._save(state)
+    
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            state = self._load()
+            if state.get(namespace, {}).pop(key, None) is not None:
+                self._save(state)
+
+
+def get_state_store(backend: Optional[str] = None) -> StateStore:
+    """
+    Create the configured state store.
+    
+    Args:
+        backend: "postgres" or "file" (defaults to the STATE_BACKEND setting)
+        
+    Returns:
+        State store instance
+    """
+    backend = backend or STATE_BACKEND
+    if backend == "postgres":
+        return PostgresStateStore()
+    if backend == "file":
+        return FileStateStore()
+    raise ValueError(f"Unknown state backend: {backend}")
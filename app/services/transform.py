@@ -0,0 +1,222 @@
+"""
+Declarative, column-at-a-time record transformation.
+
+A ``ColumnMapping`` lists target columns with their source fields and the
+operations to apply (strip, lower, int, ...). ``apply`` works on a whole
+batch: each target column is extracted into a list and every operation runs
+over that list, instead of building a dictionary per record. The result is
+one record per input in column order: an instance of the mapping's
+``record_type`` (a named tuple, see app/services/records.py), ready for the
+``DatabaseManager`` writers.
+
+Custom Python functions (``Column(func=...)``) receive the raw record and run
+per record; a value that fails to convert only drops its own record.
+"""
+import json
+from functools import partial
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type, Union
+from app.services.records import define_record
+
+
+def _to_bool(value: Any) -> bool:
+    """Interpret common textual booleans ("true", "1", "yes", ...)."""
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "t", "yes", "y")
+    return bool(value)
+
+
+# Named operations; each takes a single non-missing value
+OPERATIONS: Dict[str, Callable[[Any], Any]] = {
+    "strip": str.strip,
+    "lower": str.lower,
+    "upper": str.upper,
+    "str": str,
+    "int": int,
+    "float": float,
+    "bool": _to_bool,
+}
+
+
+# Compact JSON encoder for json/jsonb columns, e.g. Column("metadata", func=to_json);
+# created once, while json.dumps with options builds a new encoder per call
+to_json = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=str).encode
+
+
+# Operations that raise on None and "" or return "" unchanged, so they can run
+# over a whole column first and only fall back to skipping missing values on error
+_STRICT_OPERATIONS = {str.strip, str.lower, str.upper, int, float}
+
+
+def _has_missing(values: List[Any]) -> bool:
+    """Check a column for missing values (None or the empty string)."""
+    return None in values or "" in values
+
+
+class Column:
+    """
+    A target column and how to compute it.
+    
+    Usage:
+        Column("email", source=("Email", "email"), ops=("strip", "lower"), default="")
+        Column("metadata", func=to_json)  # func receives the whole record
+    """
+    
+    def __init__(
+        self,
+        target: str,
+        source: Union[str, Sequence[str], None] = None,
+        ops: Sequence[Union[str, Callable[[Any], Any]]] = (),
+        default: Any = None,
+        func: Optional[Callable[[Any], Any]] = None,
+    ):
+        """
+        Initialize the column.
+        
+        Args:
+            target: Target column name
+            source: Source field name, or candidate names (defaults to
+                ``target``); for dictionaries the first non-missing value
+                wins, for rows the first name present in the header
+            ops: Operations applied in order, by name (see ``OPERATIONS``) or
+                as callables; missing values (None, "") are passed through
+            default: Value used when the result is missing
+            func: Custom function computing the value from the raw record;
+                replaces ``source`` extraction
+        """
+        self.target = target
+        if source is None:
+            source = target
+        self.sources = (source,) if isinstance(source, str) else tuple(source)
+        self.ops = [OPERATIONS[op] if isinstance(op, str) else op for op in ops]
+        self.default = default
+        self.func = func
+
+
+class ColumnMapping:
+    """
+    Transforms batches of raw records into tuples, one column at a time.
+    
+    Records may be dictionaries or sequences (e.g. CSV rows) together with a
+    header index mapping field names to positions.
+    
+    Usage:
+        mapping = ColumnMapping([
+            Column("external_id", source="id"),
+            Column("name", ops=("strip",), default=""),
+            Column("status", default="active"),
+        ], name="Customer")
+        rows, failures = mapping.apply(records)
+        # rows: [Customer(external_id="1", name="Alice", status="active"), ...]
+    """
+    
+    def __init__(self, columns: Sequence[Column], name: str = "Record"):
+        """
+        Initialize the mapping.
+        
+        Args:
+            columns: Target columns in output order
+            name: Class name of the record type produced by ``apply``
+        """
+        self.columns = list(columns)
+        self.names: Tuple[str, ...] = tuple(column.target for column in self.columns)
+        self.record_type: Type[tuple] = define_record(name, self.names)
+        self._make_record = partial(tuple.__new__, self.record_type)
+    
+    def apply(
+        self, records: Sequence[Any], index: Optional[Dict[str, int]] = None
+    ) -> Tuple[List[tuple], List[Tuple[int, Exception]]]:
+        """
+        Transform a batch of records.
+        
+        Args:
+            records: Raw records (dictionaries, or sequences when ``index`` is given)
+            index: Field name -> position mapping for sequence records
+        
+        Returns:
+            Tuple of (``record_type`` instances for the records that transformed
+            cleanly, list of (record position, error) for the ones that did not)
+        """
+        failures: Dict[int, Exception] = {}
+        columns = [self._column_values(column, records, index, failures) for column in self.columns]
+        rows = list(map(self._make_record, zip(*columns))) if columns else [self._make_record(()) for _ in records]
+        if failures:
+            rows = [row for position, row in enumerate(rows) if position not in failures]
+        return rows, sorted(failures.items())
+    
+    def _column_values(
+        self, column: Column, records: Sequence[Any], index: Optional[Dict[str, int]], failures: Dict[int, Exception]
+    ) -> List[Any]:
+        """Compute one output column for the whole batch."""
+        if column.func is not None:
+            values = self._per_record(column.func, records, failures)
+        elif index is not None:
+            values = self._extract_positional(column.sources, records, index, failures)
+        else:
+            values = [record.get(column.sources[0]) for record in records]
+            for source in column.sources[1:]:
+                if _has_missing(values):
+                    values = [
+                        record.get(source) if value is None or value == "" else value
+                        for value, record in zip(values, records)
+                    ]
+        
+        # Lenient operations only need to skip missing values if there are any
+        may_be_missing = any(op not in _STRICT_OPERATIONS for op in column.ops) and _has_missing(values)
+        for op in column.ops:
+            values = self._apply_op(op, values, may_be_missing, failures)
+        
+        if column.default is not None:
+            default = column.default
+            values = [default if value is None or value == "" else value for value in values]
+        return values
+    
+    def _extract_positional(
+        self, sources: Sequence[str], records: Sequence[Any], index: Dict[str, int], failures: Dict[int, Exception]
+    ) -> List[Any]:
+        """Read the first source field present in the header from every record."""
+        position = next((index[source] for source in sources if source in index), None)
+        if position is None:
+            return [None] * len(records)
+        try:
+            return list(map(itemgetter(position), records))
+        except IndexError:
+            # Short rows: fall back to per-record extraction for this column
+            return self._per_record(itemgetter(position), records, failures)
+    
+    @staticmethod
+    def _apply_op(
+        op: Callable[[Any], Any], values: List[Any], may_be_missing: bool, failures: Dict[int, Exception]
+    ) -> List[Any]:
+        """Apply an operation to a column, skipping missing values."""
+        try:
+            if may_be_missing:
+                return [value if value is None or value == "" else op(value) for value in values]
+            return list(map(op, values))
+        except Exception:
+            pass
+        
+        # A value failed: redo the column value by value to find the culprits
+        result = []
+        for position, value in enumerate(values):
+            if value is None or value == "":
+                result.append(value)
+                continue
+            try:
+                result.append(op(value))
+            except Exception as e:
+                failures.setdefault(position, e)
+                result.append(None)
+        return result
+    
+    @staticmethod
+    def _per_record(func: Callable[[Any], Any], records: Sequence[Any], failures: Dict[int, Exception]) -> List[Any]:
+        """Run a function per record, recording the records it fails for."""
+        values = []
+        for position, record in enumerate(records):
+            try:
+                values.append(func(record))
+            except Exception as e:
+                failures.setdefault(position, e)
+                values.append(None)
+        return values
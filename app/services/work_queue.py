@@ -0,0 +1,441 @@
+"""
+Work queue of import partitions for planner/worker (fan-out) runs.
+
+A planner writes the partitions of an import job (e.g. date ranges, key
+ranges or file byte ranges) to the queue; workers claim one partition at a
+time until none is left. Two backends are available:
+- PostgresWorkQueue: a queue table claimed with ``FOR UPDATE SKIP LOCKED``,
+  so any number of Lambda invocations can work on it at once
+- FileWorkQueue: a JSON file guarded by a file lock, for local runs with
+  several processes on one host
+
+A claimed partition that is neither completed nor released within the
+lease (e.g. because its worker was killed at the Lambda timeout) is handed
+to the next worker. Outcomes are only recorded for the current claim: a
+worker whose lease expired and whose partition was claimed again cannot
+overwrite the new claim's status, result or attempts. Failed partitions are retried up to ``max_attempts``
+times in total; an expired claim counts as a failed attempt, so a partition
+that keeps killing its worker ends up failed instead of being retried forever.
+"""
+import fcntl
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Dict, Iterator, List, Optional
+from psycopg2 import sql
+from psycopg2.extras import Json
+from app.config import (
+    WORK_QUEUE_BACKEND,
+    WORK_QUEUE_FILE_PATH,
+    WORK_QUEUE_LEASE,
+    WORK_QUEUE_MAX_ATTEMPTS,
+    WORK_QUEUE_TABLE,
+)
+from app.services.database import DatabaseManager, db_manager, table_identifier
+from app.logger_config import get_logger
+
+logger = get_logger(__name__)
+
+# Result of a partition whose last allowed claim expired
+LEASE_EXPIRED_ERROR = "lease expired: the worker stopped without recording an outcome"
+
+# Partition statuses
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+STATUSES = (PENDING, RUNNING, DONE, FAILED)
+
+# JSON encoder for specs and results (dates and datetimes are stored as ISO strings)
+_dumps = partial(json.dumps, default=str)
+
+
+class Partition:
+    """A claimed partition: the job it belongs to and the importer job spec to run."""
+    
+    def __init__(self, job: str, id: int, spec: Dict[str, Any], attempts: int = 1, worker: Optional[str] = None):
+        """
+        Initialize the partition.
+        
+        Args:
+            job: Job name
+            id: Partition ID, unique within the queue
+            spec: Importer job spec: {"name", "importer", "config"}
+            attempts: Number of times the partition was claimed, including this one
+            worker: Name of the claiming worker
+        """
+        self.job = job
+        self.id = id
+        self.spec = spec
+        self.attempts = attempts
+        self.worker = worker
+    
+    def __repr__(self) -> str:
+        return f"Partition({self.job}#{self.id})"
+
+
+class WorkQueue(ABC):
+    """
+    Base class for partition queues.
+    
+    Args:
+        lease: Seconds after which a claimed partition may be claimed again
+        max_attempts: Claims of a partition before a failure is final
+    """
+    
+    def __init__(self, lease: float = WORK_QUEUE_LEASE, max_attempts: int = WORK_QUEUE_MAX_ATTEMPTS):
+        self.lease = lease
+        self.max_attempts = max_attempts
+    
+    @abstractmethod
+    def enqueue(self, job: str, specs: List[Dict[str, Any]]) -> int:
+        """
+        Replace the partitions of a job.
+        
+        Args:
+            job: Job name
+            specs: Importer job specs, one per partition
+        
+        Returns:
+            Number of partitions queued
+        """
+        pass
+    
+    @abstractmethod
+    def claim(self, job: str, worker: str) -> Optional[Partition]:
+        """
+        Claim the next pending partition of a job.
+        
+        Args:
+            job: Job name
+            worker: Name of the claiming worker (for diagnostics)
+        
+        Returns:
+            The claimed partition, or None if there is none left to claim
+        """
+        pass
+    
+    @abstractmethod
+    def complete(self, partition: Partition, result: Dict[str, Any]) -> bool:
+        """
+        Mark a partition as done.
+        
+        Args:
+            partition: Claimed partition
+            result: Summary of the importer result
+        
+        Returns:
+            False if the claim is no longer current and nothing was recorded
+        """
+        pass
+    
+    @abstractmethod
+    def fail(self, partition: Partition, error: str) -> bool:
+        """
+        Put a failed partition back in the queue, or mark it as failed once
+        it was attempted ``max_attempts`` times.
+        
+        Args:
+            partition: Claimed partition
+            error: Error message
+        
+        Returns:
+            False if the claim is no longer current and nothing was recorded
+        """
+        pass
+    
+    @abstractmethod
+    def release(self, partition: Partition, spec: Dict[str, Any]) -> bool:
+        """
+        Put an unfinished partition back in the queue without counting an attempt.
+        
+        Args:
+            partition: Claimed partition
+            spec: Job spec to continue with (e.g. carrying a checkpoint)
+        
+        Returns:
+            False if the claim is no longer current and nothing was recorded
+        """
+        pass
+    
+    @staticmethod
+    def _stale(partition: Partition, action: str) -> bool:
+        """Log an outcome dropped because the partition was claimed again; returns False."""
+        logger.warning(
+            f"Dropping the {action} of {partition} by {partition.worker} (attempt {partition.attempts}): "
+            f"its lease expired and the partition was claimed again"
+        )
+        return False
+    
+    @abstractmethod
+    def counts(self, job: str) -> Dict[str, int]:
+        """
+        Count the partitions of a job by status.
+        
+        Args:
+            job: Job name
+        
+        Returns:
+            Dictionary with a count for every status
+        """
+        pass
+
+
+class PostgresWorkQueue(WorkQueue):
+    """
+    Work queue backed by a Postgres table.
+    
+    The table is created on first use:
+        (id BIGSERIAL, job TEXT, spec JSONB, status TEXT, attempts INTEGER,
+         worker TEXT, result JSONB, claimed_at TIMESTAMPTZ, updated_at TIMESTAMPTZ)
+    
+    Workers in other processes use the global ``db_manager`` of their process.
+    """
+    
+    def __init__(self, table: str = WORK_QUEUE_TABLE, database: Optional[DatabaseManager] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.table = table
+        self.database = database or db_manager
+        self._table_ready = False
+        self._lock = threading.Lock()
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        # Connection pools and locks cannot cross processes
+        return {"table": self.table, "lease": self.lease, "max_attempts": self.max_attempts}
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__init__(**state)
+    
+    def _ensure_table(self):
+        """Create the queue table if it does not exist yet."""
+        if self._table_ready:
+            return
+        with self._lock:
+            if not self._table_ready:
+                table = table_identifier(self.table)
+                self.database.execute_update(sql.SQL("""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        id BIGSERIAL PRIMARY KEY,
+                        job TEXT NOT NULL,
+                        spec JSONB NOT NULL,
+                        status TEXT NOT NULL DEFAULT 'pending',
+                        attempts INTEGER NOT NULL DEFAULT 0,
+                        worker TEXT,
+                        result JSONB,
+                        claimed_at TIMESTAMPTZ,
+                        updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                    );
+                    CREATE INDEX IF NOT EXISTS {index} ON {table} (job, status, id)
+                """).format(table=table, index=sql.Identifier(f"{self.table.split('.')[-1]}_job_status_idx")))
+                self._table_ready = True
+    
+    def enqueue(self, job: str, specs: List[Dict[str, Any]]) -> int:
+        self._ensure_table()
+        table = table_identifier(self.table)
+        with self.database.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql.SQL("DELETE FROM {table} WHERE job = %s").format(table=table), (job,))
+                cur.executemany(
+                    sql.SQL("INSERT INTO {table} (job, spec) VALUES (%s, %s)").format(table=table),
+                    [(job, Json(spec, dumps=_dumps)) for spec in specs]
+                )
+        return len(specs)
+    
+    def claim(self, job: str, worker: str) -> Optional[Partition]:
+        self._ensure_table()
+        expired = self.database.execute_update(
+            sql.SQL("""
+                UPDATE {table} SET status = 'failed', result = %s, updated_at = NOW()
+                WHERE job = %s AND status = 'running' AND attempts >= %s
+                    AND claimed_at < NOW() - %s * INTERVAL '1 second'
+            """).format(table=table_identifier(self.table)),
+            (Json({"error": LEASE_EXPIRED_ERROR}, dumps=_dumps), job, self.max_attempts, self.lease)
+        )
+        if expired:
+            logger.warning(f"{expired} partitions of {job} failed: {LEASE_EXPIRED_ERROR}")
+        rows = self.database.execute_query(
+            sql.SQL("""
+                UPDATE {table} SET
+                    status = 'running',
+                    attempts = attempts + 1,
+                    worker = %s,
+                    claimed_at = NOW(),
+                    updated_at = NOW()
+                WHERE id = (
+                    SELECT id FROM {table}
+                    WHERE job = %s AND (
+                        status = 'pending'
+                        OR (status = 'running' AND attempts < %s
+                            AND claimed_at < NOW() - %s * INTERVAL '1 second')
+                    )
+                    ORDER BY id
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, spec, attempts
+            """).format(table=table_identifier(self.table)),
+            (worker, job, self.max_attempts, self.lease)
+        )
+        if not rows:
+            return None
+        return Partition(job, rows[0]["id"], rows[0]["spec"], rows[0]["attempts"], worker)
+    
+    # Matches the row only while it is still this claim of the partition
+    _CURRENT_CLAIM = "id = %s AND worker = %s AND attempts = %s AND status = 'running'"
+    
+    def _finish(self, partition: Partition, status: str, result: Dict[str, Any], action: str) -> bool:
+        """Record the outcome of a claimed partition."""
+        updated = self.database.execute_update(
+            sql.SQL(
+                "UPDATE {table} SET status = %s, result = %s, updated_at = NOW() WHERE " + self._CURRENT_CLAIM
+            ).format(table=table_identifier(self.table)),
+            (status, Json(result, dumps=_dumps), partition.id, partition.worker, partition.attempts)
+        )
+        return updated > 0 or self._stale(partition, action)
+    
+    def complete(self, partition: Partition, result: Dict[str, Any]) -> bool:
+        return self._finish(partition, DONE, result, "result")
+    
+    def fail(self, partition: Partition, error: str) -> bool:
+        status = FAILED if partition.attempts >= self.max_attempts else PENDING
+        return self._finish(partition, status, {"error": error}, "failure")
+    
+    def release(self, partition: Partition, spec: Dict[str, Any]) -> bool:
+        updated = self.database.execute_update(
+            sql.SQL(
+                "UPDATE {table} SET status = 'pending', spec = %s, attempts = attempts - 1, updated_at = NOW() "
+                "WHERE " + self._CURRENT_CLAIM
+            ).format(table=table_identifier(self.table)),
+            (Json(spec, dumps=_dumps), partition.id, partition.worker, partition.attempts)
+        )
+        return updated > 0 or self._stale(partition, "release")
+    
+    def counts(self, job: str) -> Dict[str, int]:
+        self._ensure_table()
+        rows = self.database.execute_query(
+            sql.SQL("SELECT status, COUNT(*) AS count FROM {table} WHERE job = %s GROUP BY status").format(
+                table=table_identifier(self.table)
+            ),
+            (job,)
+        )
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update({row["status"]: row["count"] for row in rows})
+        return counts
+
+
+class FileWorkQueue(WorkQueue):
+    """
+    Work queue backed by a local JSON file.
+    
+    Every operation holds an exclusive lock on "<path>.lock", so processes
+    on the same host can share the queue. In AWS Lambda relative paths are
+    moved to /tmp; use the Postgres queue to share work between invocations.
+    """
+    
+    def __init__(self, path: str = WORK_QUEUE_FILE_PATH, **kwargs):
+        super().__init__(**kwargs)
+        if os.getenv("AWS_LAMBDA_FUNCTION_NAME") and not path.startswith("/tmp/"):
+            path = os.path.join("/tmp", os.path.basename(path))
+        self.path = path
+    
+    @contextmanager
+    def _locked(self) -> Iterator[Dict[str, Any]]:
+        """Load the queue under the file lock and write it back afterwards."""
+        with open(f"{self.path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        state = json.load(f)
+                except FileNotFoundError:
+                    state = {"next_id": 1, "jobs": {}}
+                yield state
+                temp_path = f"{self.path}.tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    f.write(_dumps(state))
+                os.replace(temp_path, self.path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+    
+    @staticmethod
+    def _entry(state: Dict[str, Any], partition: Partition) -> Optional[Dict[str, Any]]:
+        """Queue entry of a partition while it is still this claim of it, else None."""
+        for entry in state["jobs"].get(partition.job, []):
+            if entry["id"] == partition.id:
+                current = (entry["status"], entry.get("worker"), entry["attempts"])
+                return entry if current == (RUNNING, partition.worker, partition.attempts) else None
+        return None
+    
+    def enqueue(self, job: str, specs: List[Dict[str, Any]]) -> int:
+        with self._locked() as state:
+            entries = []
+            for spec in specs:
+                entries.append({"id": state["next_id"], "spec": spec, "status": PENDING, "attempts": 0})
+                state["next_id"] += 1
+            state["jobs"][job] = entries
+        return len(specs)
+    
+    def claim(self, job: str, worker: str) -> Optional[Partition]:
+        now = time.time()
+        with self._locked() as state:
+            for entry in state["jobs"].get(job, []):
+                expired = entry["status"] == RUNNING and now - entry["claimed_at"] > self.lease
+                if expired and entry["attempts"] >= self.max_attempts:
+                    logger.warning(f"Partition {entry['id']} of {job} failed: {LEASE_EXPIRED_ERROR}")
+                    entry.update(status=FAILED, result={"error": LEASE_EXPIRED_ERROR})
+                    continue
+                if entry["status"] == PENDING or expired:
+                    entry.update(status=RUNNING, attempts=entry["attempts"] + 1, worker=worker, claimed_at=now)
+                    return Partition(job, entry["id"], entry["spec"], entry["attempts"], worker)
+        return None
+    
+    def complete(self, partition: Partition, result: Dict[str, Any]) -> bool:
+        with self._locked() as state:
+            entry = self._entry(state, partition)
+            if entry is not None:
+                entry.update(status=DONE, result=result)
+        return entry is not None or self._stale(partition, "result")
+    
+    def fail(self, partition: Partition, error: str) -> bool:
+        status = FAILED if partition.attempts >= self.max_attempts else PENDING
+        with self._locked() as state:
+            entry = self._entry(state, partition)
+            if entry is not None:
+                entry.update(status=status, result={"error": error})
+        return entry is not None or self._stale(partition, "failure")
+    
+    def release(self, partition: Partition, spec: Dict[str, Any]) -> bool:
+        with self._locked() as state:
+            entry = self._entry(state, partition)
+            if entry is not None:
+                entry.update(status=PENDING, spec=spec, attempts=entry["attempts"] - 1)
+        return entry is not None or self._stale(partition, "release")
+    
+    def counts(self, job: str) -> Dict[str, int]:
+        counts = dict.fromkeys(STATUSES, 0)
+        with self._locked() as state:
+            for entry in state["jobs"].get(job, []):
+                counts[entry["status"]] += 1
+        return counts
+
+
+def get_work_queue(backend: Optional[str] = None) -> WorkQueue:
+    """
+    Create the configured work queue.
+    
+    Args:
+        backend: "postgres" or "file" (defaults to the WORK_QUEUE_BACKEND setting)
+    
+    Returns:
+        Work queue instance
+    """
+    backend = backend or WORK_QUEUE_BACKEND
+    if backend == "postgres":
+        return PostgresWorkQueue()
+    if backend == "file":
+        return FileWorkQueue()
+    raise ValueError(f"Unknown work queue backend: {backend}")
@@ -0,0 +1 @@
+"""Performance benchmarks for the import pipeline (run as scripts, not under pytest)."""
@@ -0,0 +1,79 @@
+"""
+Benchmark: CSV import throughput (rows/sec) by worker count.
+
+Generates a synthetic CSV file and imports it with the example CSVImporter,
+once in streaming mode and once per worker count in parallel mode. Saving is
+replaced by a no-op so the numbers reflect parsing and transformation only.
+
+Usage:
+    python -m benchmarks.bench_parallel_csv --rows 1000000 --workers 1 2 4 8
+"""
+import argparse
+import csv
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from app.logger_config import LOG_NAME
+from examples.example_csv_importer import CSVImporter
+
+
+class NullWriterCSVImporter(CSVImporter):
+    """CSVImporter whose save step only counts records."""
+    
+    def save_data(self, data: List[Dict[str, Any]]) -> bool:
+        return True
+
+
+def generate_csv(path: str, rows: int):
+    """Write a synthetic CSV file with ``rows`` data rows."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["ID", "Name", "Email", "Phone", "Status"])
+        for i in range(rows):
+            # Some quoted fields with delimiters and newlines, as real exports have
+            name = f"Customer {i}, \"VIP\"\nsecond line" if i % 50 == 0 else f"Customer {i}"
+            writer.writerow([i, name, f"USER{i}@EXAMPLE.COM", f"+1 555 {i:07d}", "active" if i % 7 else ""])
+
+
+def run_import(path: str, workers: int, chunk_size: int) -> Dict[str, Any]:
+    """Import the file once and return throughput figures."""
+    config = {"file_path": path, "chunk_size": chunk_size, "parallel_workers": workers}
+    started = time.perf_counter()
+    result = NullWriterCSVImporter(config).run()
+    elapsed = time.perf_counter() - started
+    saved = result["stats"]["saved"]
+    return {"workers": workers, "rows": saved, "seconds": round(elapsed, 3), "rows_per_sec": round(saved / elapsed)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=500000, help="Number of synthetic rows")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts to compare")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows per streaming chunk")
+    parser.add_argument("--file", help="Use an existing CSV file instead of generating one")
+    args = parser.parse_args()
+    logging.getLogger(LOG_NAME).setLevel(logging.WARNING)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.file or os.path.join(tmp, "bench.csv")
+        if not args.file:
+            generate_csv(path, args.rows)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"File: {path} ({size_mb:.1f} MB)")
+        print(f"{'workers':>8} {'rows':>10} {'seconds':>9} {'rows/sec':>10}")
+        
+        baseline = None
+        for workers in args.workers:
+            figures = run_import(path, workers, args.chunk_size)
+            baseline = baseline or figures["rows_per_sec"]
+            print(
+                f"{figures['workers']:>8} {figures['rows']:>10} {figures['seconds']:>9} "
+                f"{figures['rows_per_sec']:>10}  ({figures['rows_per_sec'] / baseline:.2f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: memory of transformed records, dictionaries vs. compact records.
+
+Transforms the same synthetic CSV rows twice: the old way (one dict per
+record, rebuilt into a tuple per row for the writer) and with the CSV
+importer's ColumnMapping, which produces CSVRecord named tuples that the
+writer takes as they are. Reports retained bytes per record and the peak
+allocation of each path, measured with tracemalloc.
+
+Usage:
+    python -m benchmarks.bench_record_memory --rows 200000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from examples.example_csv_importer import CSVImporter
+
+HEADER = ("ID", "Name", "Email", "Phone", "Status")
+INDEX = {column: position for position, column in enumerate(HEADER)}
+
+
+def generate_rows(count: int) -> List[Tuple[str, ...]]:
+    """Synthetic CSV rows as read by CSVSource."""
+    return [
+        (str(i), f" Customer {i} ", f"USER{i}@EXAMPLE.COM", f"+1 555 {i:07d}", "active" if i % 7 else "")
+        for i in range(count)
+    ]
+
+
+def dict_path(rows: List[Tuple[str, ...]]) -> List[Any]:
+    """The per-record dict transform used before ColumnMapping, plus the writer's tuple rebuild."""
+    transformed: List[Dict[str, Any]] = []
+    for row in rows:
+        try:
+            transformed.append({
+                "external_id": row[0],
+                "name": row[1].strip(),
+                "email": row[2].lower().strip(),
+                "phone": row[3].strip(),
+                "status": row[4] or "active",
+            })
+        except Exception:
+            pass
+    data_tuples = [
+        (record["external_id"], record["name"], record["email"], record["phone"], record["status"])
+        for record in transformed
+    ]
+    return [transformed, data_tuples]
+
+
+def record_path(rows: List[Tuple[str, ...]]) -> List[Any]:
+    """ColumnMapping producing CSVRecord tuples consumed by the writer directly."""
+    records, _ = CSVImporter.MAPPING.apply(rows, INDEX)
+    return [records]
+
+
+def measure(path: Callable[[List[Tuple[str, ...]]], List[Any]], rows: List[Tuple[str, ...]]) -> Dict[str, Any]:
+    """Run a transform path and measure retained and peak memory."""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = path(rows)
+    elapsed = time.perf_counter() - started
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {
+        "retained_mb": round(retained / 1024 / 1024, 1),
+        "peak_mb": round(peak / 1024 / 1024, 1),
+        "bytes_per_record": round(retained / len(rows)),
+        "seconds": round(elapsed, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=200000, help="Number of synthetic rows")
+    args = parser.parse_args()
+    
+    rows = generate_rows(args.rows)
+    print(f"{'path':>8} {'retained MB':>12} {'peak MB':>9} {'bytes/record':>13} {'seconds':>8}")
+    for name, path in (("dict", dict_path), ("record", record_path)):
+        figures = measure(path, rows)
+        print(
+            f"{name:>8} {figures['retained_mb']:>12} {figures['peak_mb']:>9} "
+            f"{figures['bytes_per_record']:>13} {figures['seconds']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
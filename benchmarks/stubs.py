@@ -0,0 +1,191 @@
+"""
+Local stand-ins for benchmark runs: synthetic data, a paged HTTP API and writers.
+
+Writers replace the database in ``save_data``:
+- NullWriter: discards rows (measures everything but the write)
+- CopyEncodingWriter: encodes rows as COPY CSV like ``copy_upsert`` does
+- PostgresWriter: writes through ``db_manager`` into a local Postgres
+  configured with the usual DB_* environment variables
+"""
+import csv
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Sequence
+from urllib.parse import parse_qs, urlparse
+
+from app.services.database import COPY_BUFFER_SIZE, _CopyStream, db_manager
+
+# Table used by PostgresWriter
+BENCHMARK_TABLE = "benchmark_import"
+
+
+def generate_records(rows: int, width: int) -> List[Dict[str, Any]]:
+    """
+    Synthetic API-style records.
+    
+    Args:
+        rows: Number of records
+        width: Number of extra "field_N" string fields per record
+    """
+    return [
+        {
+            "id": str(i),
+            "name": f" Customer {i} ",
+            "email": f"USER{i}@EXAMPLE.COM",
+            "status": "active" if i % 7 else None,
+            "created_at": f"2024-01-{i % 28 + 1:02d}T00:00:00Z",
+            **{f"field_{n}": f"value {i}-{n}" for n in range(width)},
+        }
+        for i in range(rows)
+    ]
+
+
+def write_csv(path: str, rows: int, width: int):
+    """
+    Write a synthetic CSV file in the layout of the example CSV importer.
+    
+    Args:
+        path: Output path
+        rows: Number of data rows
+        width: Number of extra columns per row
+    """
+    extra = [f"Extra{n}" for n in range(width)]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["ID", "Name", "Email", "Phone", "Status"] + extra)
+        for i in range(rows):
+            # Some quoted fields with delimiters and newlines, as real exports have
+            name = f"Customer {i}, \"VIP\"\nsecond line" if i % 50 == 0 else f"Customer {i}"
+            writer.writerow(
+                [i, name, f"USER{i}@EXAMPLE.COM", f"+1 555 {i:07d}", "active" if i % 7 else ""]
+                + [f"value {i}-{n}" for n in range(width)]
+            )
+
+
+class PagedAPIServer:
+    """
+    Local HTTP server serving records as ``?page=N&per_page=M`` JSON pages.
+    
+    Pages are serialized once up front, so the server costs little CPU
+    compared with the importer under test.
+    """
+    
+    def __init__(self, records: List[Dict[str, Any]], page_size: int, latency: float = 0.0):
+        pages = {
+            number: json.dumps({"data": records[start:start + page_size]}).encode("utf-8")
+            for number, start in enumerate(range(0, len(records), page_size), start=1)
+        }
+        empty = json.dumps({"data": []}).encode("utf-8")
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                body = pages.get(int(query.get("page", ["1"])[0]), empty)
+                if latency:
+                    time.sleep(latency)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/items"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+    
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class NullWriter:
+    """Writer that discards rows and records when every write started and ended."""
+    
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.finished: List[float] = []
+        self.started = time.perf_counter()
+        self.rows = 0
+    
+    def start(self):
+        """Start the clock, once the test data is prepared."""
+        self.started = time.perf_counter()
+    
+    def write(self, columns: Sequence[str], rows: List[Sequence[Any]]):
+        started = time.perf_counter()
+        self._write(columns, rows)
+        self.finished.append(time.perf_counter())
+        self.latencies.append(self.finished[-1] - started)
+        self.rows += len(rows)
+    
+    def chunk_intervals(self) -> List[float]:
+        """Seconds between consecutive finished writes: the end-to-end time per chunk."""
+        ends = [self.started] + self.finished
+        return [end - previous for previous, end in zip(ends, ends[1:])]
+    
+    def _write(self, columns: Sequence[str], rows: List[Sequence[Any]]):
+        pass
+    
+    def close(self):
+        pass
+
+
+class CopyEncodingWriter(NullWriter):
+    """Writer that encodes rows as COPY CSV input, like ``DatabaseManager.copy_upsert``."""
+    
+    def _write(self, columns: Sequence[str], rows: List[Sequence[Any]]):
+        stream = _CopyStream(rows)
+        while stream.read(COPY_BUFFER_SIZE):
+            pass
+
+
+class PostgresWriter(NullWriter):
+    """
+    Writer upserting into ``BENCHMARK_TABLE`` of a real database.
+    
+    Args:
+        method: "copy" (``copy_upsert``) or "upsert" (``upsert_many``)
+    """
+    
+    def __init__(self, method: str = "copy"):
+        super().__init__()
+        self.method = method
+        self._table_columns = None
+    
+    def _prepare(self, columns: Sequence[str]):
+        definitions = ", ".join(
+            f"{column} TEXT PRIMARY KEY" if column == "external_id" else f"{column} TEXT" for column in columns
+        )
+        db_manager.execute_update(f"DROP TABLE IF EXISTS {BENCHMARK_TABLE}")
+        db_manager.execute_update(
+            f"CREATE UNLOGGED TABLE {BENCHMARK_TABLE} ({definitions}, updated_at TIMESTAMPTZ DEFAULT NOW())"
+        )
+        self._table_columns = tuple(columns)
+    
+    def _write(self, columns: Sequence[str], rows: List[Sequence[Any]]):
+        if self._table_columns != tuple(columns):
+            self._prepare(columns)
+        if self.method == "upsert":
+            db_manager.upsert_many(BENCHMARK_TABLE, columns, rows, update_expressions={"updated_at": "NOW()"})
+        else:
+            db_manager.copy_upsert(BENCHMARK_TABLE, columns, rows, update_expressions={"updated_at": "NOW()"})
+    
+    def close(self):
+        if self._table_columns is not None:
+            db_manager.execute_update(f"DROP TABLE IF EXISTS {BENCHMARK_TABLE}")
+
+
+WRITERS = {
+    "null": NullWriter,
+    "copy": CopyEncodingWriter,
+    "postgres": PostgresWriter,
+    "postgres-upsert": lambda: PostgresWriter("upsert"),
+}
@@ -0,0 +1,292 @@
+"""
+Benchmark suite: throughput, latency and memory of the import pipeline.
+
+Runs BaseImporter in each mode, the example CSV and API importers and the
+DatabaseManager write path against local stand-ins (benchmarks/stubs.py):
+synthetic records of configurable count and width, a local paged HTTP API
+and a pluggable writer ("null", "copy" encoding, or a local Postgres via
+"postgres" / "postgres-upsert" with the usual DB_* variables). Every case
+runs in a fresh process so its peak RSS is its own.
+
+Results are written as JSON; comparing them with a baseline file reports
+cases whose rows/sec dropped, or whose p95 chunk latency or peak memory
+grew, by more than the tolerance, and exits with status 1.
+
+Usage:
+    python -m benchmarks.suite --rows 200000 --width 10 --output baseline.json
+    python -m benchmarks.suite --rows 200000 --width 10 --baseline baseline.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.logger_config import LOG_NAME
+from app.services.base_importer import BaseImporter
+from app.services.metrics import peak_rss_mb
+from app.services.transform import Column, ColumnMapping
+from benchmarks.stubs import WRITERS, PagedAPIServer, generate_records, write_csv
+from examples.example_api_importer import APIImporter
+from examples.example_csv_importer import CSVImporter
+
+# Relative change that counts as a regression when comparing with a baseline
+DEFAULT_TOLERANCE = 0.2
+
+
+def percentiles(values: Sequence[float]) -> Dict[str, Optional[float]]:
+    """Nearest-rank p50/p95/p99 and maximum of durations in seconds, as milliseconds."""
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(values)
+    
+    def rank(fraction: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 3)
+    
+    return {"p50": rank(0.5), "p95": rank(0.95), "p99": rank(0.99), "max": round(ordered[-1] * 1000, 3)}
+
+
+class WriterMixin:
+    """Importer mixin sending ``save_data`` to a benchmark writer."""
+    
+    writer = None
+    
+    def save_data(self, data):
+        self.writer.write(self.columns, data)
+        return True
+
+
+class SyntheticImporter(WriterMixin, BaseImporter):
+    """Importer over in-memory synthetic records, mapped column by column."""
+    
+    def __init__(self, records: List[Dict[str, Any]], width: int, config: Dict[str, Any]):
+        super().__init__(config)
+        self.records = records
+        self.mapping = ColumnMapping(
+            [
+                Column("external_id", source="id"),
+                Column("name", ops=("strip",), default=""),
+                Column("email", ops=("lower", "strip"), default=""),
+                Column("status", default="active"),
+            ] + [Column(f"field_{n}", ops=("strip",)) for n in range(width)],
+            name="SyntheticRecord",
+        )
+        self.columns = self.mapping.names
+    
+    def fetch_data(self):
+        # Pages, like a paginated source
+        for start in range(0, len(self.records), self.chunk_size):
+            yield self.records[start:start + self.chunk_size]
+    
+    def transform_data(self, data):
+        return self.map_records(self.mapping, data)
+
+
+class BenchmarkCSVImporter(WriterMixin, CSVImporter):
+    pass
+
+
+class BenchmarkAPIImporter(WriterMixin, APIImporter):
+    pass
+
+
+def _importer_case(mode: str) -> Callable[[Dict[str, Any], Any], int]:
+    def case(options: Dict[str, Any], writer) -> int:
+        records = generate_records(options["rows"], options["width"])
+        importer = SyntheticImporter(records, options["width"], {"mode": mode, "chunk_size": options["chunk_size"]})
+        importer.writer = writer
+        writer.start()
+        return importer.run()["stats"]["saved"]
+    return case
+
+
+def csv_case(options: Dict[str, Any], writer) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.csv")
+        write_csv(path, options["rows"], options["width"])
+        importer = BenchmarkCSVImporter({"file_path": path, "chunk_size": options["chunk_size"]})
+        importer.writer = writer
+        writer.start()
+        return importer.run()["stats"]["saved"]
+
+
+def api_case(options: Dict[str, Any], writer) -> int:
+    server = PagedAPIServer(generate_records(options["rows"], options["width"]), options["chunk_size"])
+    try:
+        importer = BenchmarkAPIImporter({
+            "api_url": server.url,
+            "pagination": {"type": "page", "page_size": options["chunk_size"]},
+            "chunk_size": options["chunk_size"],
+        })
+        importer.writer = writer
+        writer.start()
+        return importer.run()["stats"]["saved"]
+    finally:
+        server.close()
+
+
+def db_write_case(options: Dict[str, Any], writer) -> int:
+    records = generate_records(options["rows"], options["width"])
+    columns = ("external_id", "name", "email", "status", "created_at") + tuple(
+        f"field_{n}" for n in range(options["width"])
+    )
+    rows = [tuple(record.values()) for record in records]
+    del records
+    writer.start()
+    for start in range(0, len(rows), options["chunk_size"]):
+        writer.write(columns, rows[start:start + options["chunk_size"]])
+    return writer.rows
+
+
+CASES: Dict[str, Callable[[Dict[str, Any], Any], int]] = {
+    "importer_batch": _importer_case("batch"),
+    "importer_streaming": _importer_case("streaming"),
+    "importer_pipeline": _importer_case("pipeline"),
+    "csv_streaming": csv_case,
+    "api_paged": api_case,
+    "db_write": db_write_case,
+}
+
+
+def run_case(name: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one case (in a worker process) and measure it.
+    
+    Args:
+        name: Case name (see ``CASES``)
+        options: "rows", "width", "chunk_size" and "writer"
+    
+    Returns:
+        Figures: rows, seconds, rows_per_sec, chunk and write latency
+        percentiles in milliseconds and peak RSS in megabytes
+    """
+    logging.getLogger(LOG_NAME).setLevel(logging.WARNING)
+    writer = WRITERS[options["writer"]]()
+    try:
+        rows = CASES[name](options, writer)
+    finally:
+        writer.close()
+    seconds = writer.finished[-1] - writer.started if writer.finished else 0.0
+    return {
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(rows / seconds) if seconds else None,
+        "chunk_latency_ms": percentiles(writer.chunk_intervals()),
+        "write_latency_ms": percentiles(writer.latencies),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_suite(cases: Sequence[str], options: Dict[str, Any], repeat: int = 1) -> Dict[str, Any]:
+    """
+    Run cases, each in a fresh process, keeping the fastest of ``repeat`` runs.
+    
+    Returns:
+        Dictionary with run "meta"data and per-case "results"
+    """
+    results = {}
+    for name in cases:
+        runs = []
+        for _ in range(repeat):
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                runs.append(executor.submit(run_case, name, options).result())
+        results[name] = max(runs, key=lambda figures: figures["rows_per_sec"] or 0)
+        print_figures(name, results[name])
+    return {
+        "meta": {
+            **options,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    Compare a suite run with a baseline run.
+    
+    Args:
+        current: Result of ``run_suite``
+        baseline: Earlier result of ``run_suite`` (e.g. loaded from JSON)
+        tolerance: Allowed relative change, e.g. 0.2 for 20%
+    
+    Returns:
+        Descriptions of the regressions found (empty if none)
+    """
+    regressions = []
+    for name, figures in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        checks = (
+            ("rows/sec", figures["rows_per_sec"], base["rows_per_sec"], -1),
+            ("p95 chunk latency ms", figures["chunk_latency_ms"]["p95"], base["chunk_latency_ms"]["p95"], 1),
+            ("peak RSS MB", figures["peak_rss_mb"], base["peak_rss_mb"], 1),
+        )
+        for label, value, reference, direction in checks:
+            if value is None or not reference:
+                continue
+            change = (value - reference) / reference
+            if change * direction > tolerance:
+                regressions.append(f"{name}: {label} {reference} -> {value} ({change:+.0%})")
+    return regressions
+
+
+def print_figures(name: str, figures: Dict[str, Any]):
+    print(
+        f"{name:>20} {figures['rows']:>9} {figures['seconds']:>8} {figures['rows_per_sec'] or '-':>10} "
+        f"{figures['chunk_latency_ms']['p50'] or '-':>9} {figures['chunk_latency_ms']['p95'] or '-':>9} "
+        f"{figures['peak_rss_mb'] or '-':>8}",
+        flush=True,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100000, help="Number of synthetic records")
+    parser.add_argument("--width", type=int, default=5, help="Extra fields per record")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Records per chunk / page / write")
+    parser.add_argument("--writer", choices=sorted(WRITERS), default="copy", help="Where records are written")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES), help="Cases to run")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the fastest is kept")
+    parser.add_argument("--output", help="Write the results to this JSON file (e.g. a new baseline)")
+    parser.add_argument("--baseline", help="Compare with the results in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed relative change")
+    args = parser.parse_args(argv)
+    
+    options = {"rows": args.rows, "width": args.width, "chunk_size": args.chunk_size, "writer": args.writer}
+    print(f"{'case':>20} {'rows':>9} {'seconds':>8} {'rows/sec':>10} {'p50 ms':>9} {'p95 ms':>9} {'peak MB':>8}")
+    result = run_suite(args.cases, options, args.repeat)
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+    
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        differing = [key for key in ("rows", "width", "chunk_size", "writer") if baseline["meta"].get(key) != options[key]]
+        if differing:
+            print(f"Warning: baseline was run with different {', '.join(differing)}")
+        regressions = compare(result, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
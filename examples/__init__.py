@@ -3,8 +3,10 @@ Examples module containing sample importer implementations.
 """
 from examples.example_api_importer import APIImporter
 from examples.example_csv_importer import CSVImporter
+from examples.example_database_importer import DatabaseSourceImporter
 
 __all__ = [
     "APIImporter",
     "CSVImporter",
+    "DatabaseSourceImporter",
 ]
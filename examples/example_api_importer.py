@@ -4,80 +4,207 @@ Example: Import data from API.
 This example demonstrates fetching data from an API and saving it to the database.
 """
 import requests
-from typing import List, Dict, Any
-from app.services.base_importer import BaseImporter
+from typing import Iterator, List, Dict, Any, Optional, Tuple
+from app.services.base_importer import BaseImporter, MODE_STREAMING
 from app.services.database import db_manager
+from app.services.http_client import HttpClient
+from app.services.pagination import DEFAULT_MAX_WORKERS, fetch_pages, pagination_from_config
+from app.services.registry import register_importer
+from app.services.json_stream import FORMAT_AUTO
+from app.services.transform import Column, ColumnMapping, to_json
 from app.logger_config import get_logger
 
 logger = get_logger(__name__)
 
 
+@register_importer("api")
 class APIImporter(BaseImporter):
     """
     Example for importing data from API.
     
     This class fetches data from an API and saves it to the database.
+    
+    Paginated APIs are supported through the "pagination" config section, e.g.
+    {"type": "page", "page_size": 100} or {"type": "cursor", "cursor_key": "next"}.
+    Pages are fetched concurrently (up to "max_workers") and the importer runs
+    in streaming mode, saving each page while the next ones download.
+    
+    Transient failures (timeouts, 429 and 5xx responses) are retried with
+    backoff ("max_retries", "backoff_base", "backoff_max"); "rate_limit" caps
+    the request rate of all workers combined. A request that still fails
+    after all retries fails the import instead of importing nothing.
+    
+    With "incremental": True, the stored watermark is sent as the query
+    parameter named by "watermark_param" (default "updated_since").
+    
+    Paginated imports are resumable: the next page (index or cursor request)
+    is checkpointed, and a run stopped at its deadline continues there.
+    
+    Single (unpaginated) responses are parsed while they download, so a
+    large report is never held in memory as a whole: the records are a
+    top-level array, the "records_key" (default "data") array of an object,
+    or NDJSON lines ("json_format": "auto", "json" or "ndjson"). They are
+    imported in streaming mode, "chunk_size" records at a time.
+    
+    With "http_cache" ("file", "postgres" or a dict, see app/services/http_cache.py),
+    responses are requested conditionally. When the server answers 304 Not
+    Modified, the data was imported by an earlier successful run and is not
+    transformed or saved again: the whole import for a single resource, the
+    page for paginated APIs. Cache hits and misses are in stats["http"].
+    
+    Records repeating an "id" within a chunk are deduplicated before the
+    upsert, the last one winning; override with a "dedup" section (see
+    BaseImporter deduplication) or turn it off with "dedup": None.
     """
     
+    # Target columns, computed one column at a time over each batch
+    MAPPING = ColumnMapping([
+        Column("external_id", source="id"),
+        Column("name", ops=("strip",), default=""),
+        Column("email", ops=("lower", "strip"), default=""),
+        Column("status", default="active"),
+        Column("created_at", source=("created_at", "date")),
+        Column("metadata", func=to_json),  # Store original data as JSON
+    ], name="APIRecord")
+    
     def __init__(self, config: Dict[str, Any] = None):
         super().__init__(config)
         self.api_url = self.config.get("api_url", "https://api.example.com/data")
         self.api_key = self.config.get("api_key", "")
         self.table_name = self.config.get("table_name", "imported_data")
+        self.use_copy = self.config.get("use_copy", False)
+        self.page_size = self.config.get("page_size", 500)
+        self.max_workers = self.config.get("max_workers", DEFAULT_MAX_WORKERS)
+        self.watermark_param = self.config.get("watermark_param", "updated_since")
+        self.watermark_field = self.config.get("watermark_field", "created_at")
+        self.records_key = self.config.get("records_key", "data")
+        self.json_format = self.config.get("json_format", FORMAT_AUTO)
+        self.dedup = self.config.get("dedup", {"key": "external_id"})
+        self.columns = self.MAPPING.names
+        self.pagination = None
+        if self.config.get("pagination"):
+            self.pagination = pagination_from_config(self.config["pagination"])
+            if "mode" not in self.config:
+                self.mode = MODE_STREAMING
+        self.resumable = self.pagination is not None
+        self.page_start: Optional[Dict[str, Any]] = None
+        self.page_progress: Dict[str, Any] = {}
+        
+        headers = {}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        self.client = HttpClient.from_config(self.config, headers=headers)
+        if self.client.cache is None and "mode" not in self.config:
+            # Streamed responses are imported chunk by chunk as they are parsed
+            self.mode = MODE_STREAMING
     
     def fetch_data(self) -> List[Dict[str, Any]]:
         """
         Fetch data from API.
         """
+        if self.pagination:
+            return self.fetch_pages()
+        if self.client.cache is None:
+            return self.stream_records()
+        
+        # Cached responses are stored whole, so they are parsed whole
         try:
-            headers = {}
-            if self.api_key:
-                headers["Authorization"] = f"Bearer {self.api_key}"
-            
-            response = requests.get(self.api_url, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            # If API returns a list, return it directly
-            if isinstance(data, list):
-                return data
-            
-            # If it returns a dict with a "data" key
-            if isinstance(data, dict) and "data" in data:
-                return data["data"]
-            
-            # Otherwise return empty list
-            return []
-            
+            data, modified = self.client.get_json_cached(self.api_url, params=self.request_params())
         except requests.exceptions.RequestException as e:
+            # Surface the failure: an empty result would look like a successful import
             logger.error(f"API request failed: {str(e)}")
+            raise
+        
+        if not modified:
+            logger.info(f"{self.api_url} not modified since the last import, nothing to import")
+            self.stats["not_modified"] = True
             return []
+        
+        # If API returns a list, return it directly
+        if isinstance(data, list):
+            return data
+        
+        # If it returns a dict with a "data" key
+        if isinstance(data, dict) and self.records_key in data:
+            return data[self.records_key]
+        
+        # Otherwise return empty list
+        return []
     
-    def transform_data(self, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def stream_records(self) -> Iterator[List[Dict[str, Any]]]:
         """
-        Transform API data to database-compatible format.
+        Parse the response while it downloads, yielding lists of "chunk_size" records.
         """
-        transformed = []
-        
-        for record in data:
-            try:
-                transformed_record = {
-                    "external_id": record.get("id"),
-                    "name": record.get("name", "").strip(),
-                    "email": record.get("email", "").lower().strip(),
-                    "status": record.get("status", "active"),
-                    "created_at": record.get("created_at") or record.get("date"),
-                    "metadata": record  # Store original data as JSON
-                }
-                transformed.append(transformed_record)
-            except Exception as e:
-                logger.error(f"Error transforming record: {str(e)}")
-                self.stats["errors"] += 1
-        
-        return transformed
+        try:
+            yield from self.client.stream_json(
+                self.api_url,
+                params=self.request_params(),
+                records_key=self.records_key,
+                json_format=self.json_format,
+                batch_size=self.chunk_size
+            )
+        except requests.exceptions.RequestException as e:
+            # Surface the failure: an empty result would look like a successful import
+            logger.error(f"API request failed: {str(e)}")
+            raise
+    
+    def request_params(self) -> Dict[str, Any]:
+        """
+        Query parameters sent with every request.
+        """
+        params = dict(self.config.get("params") or {})
+        if self.incremental and self.watermark is not None:
+            params[self.watermark_param] = self.watermark
+        return params
+    
+    def fetch_pages(self) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Fetch a paginated API, yielding one list of records per page.
+        """
+        yield from fetch_pages(
+            self.client,
+            self.api_url,
+            self.pagination,
+            params=self.request_params(),
+            max_workers=self.max_workers,
+            start=self.page_start,
+            progress=self.page_progress,
+            skip_unchanged=self.client.cache is not None
+        )
+    
+    def checkpoint_position(self) -> Optional[Dict[str, Any]]:
+        """
+        Next page to fetch: {"page": index} or the next cursor {"url", "params"}.
+        """
+        return dict(self.page_progress) or None
+    
+    def restore_position(self, position: Dict[str, Any]):
+        """
+        Start paging at a checkpointed position.
+        """
+        self.page_start = position
+    
+    def on_success(self):
+        """
+        Make this run's cached responses usable for conditional requests.
+        """
+        self.client.commit_cache()
+    
+    def _get_result(self) -> Dict[str, Any]:
+        """
+        Get result dictionary with statistics, including HTTP request counters.
+        """
+        self.stats["http"] = self.client.get_stats()
+        self.stats["bytes_fetched"] = self.stats["http"]["bytes"]
+        return super()._get_result()
+    
+    def transform_data(self, data: List[Dict[str, Any]]) -> List[Tuple[Any, ...]]:
+        """
+        Transform API records to APIRecord tuples in MAPPING column order.
+        """
+        return self.map_records(self.MAPPING, data)
     
-    def save_data(self, data: List[Dict[str, Any]]) -> bool:
+    def save_data(self, data: List[Tuple[Any, ...]]) -> bool:
         """
         Save data to database.
         """
@@ -85,33 +212,49 @@ class APIImporter(BaseImporter):
             return False
         
         try:
-            query = f"""
-                INSERT INTO {self.table_name} 
-                (external_id, name, email, status, created_at, metadata)
-                VALUES (%s, %s, %s, %s, %s, %s::jsonb)
-                ON CONFLICT (external_id) DO UPDATE SET
-                    name = EXCLUDED.name,
-                    email = EXCLUDED.email,
-                    status = EXCLUDED.status,
-                    updated_at = NOW()
-            """
+            columns = list(self.columns)
+            update_columns = ["name", "email", "status"]
+            template = "(%s, %s, %s, %s, %s, %s::jsonb)"
+            update_where = None
+            
+            if self.change_detection:
+                # Rows carry the content hash as their last element
+                hash_column = self.change_detector.hash_column
+                columns.append(hash_column)
+                update_columns.append(hash_column)
+                template = "(%s, %s, %s, %s, %s, %s::jsonb, %s)"
+                update_where = f"{self.table_name}.{hash_column} IS DISTINCT FROM EXCLUDED.{hash_column}"
             
-            data_tuples = [
-                (
-                    record["external_id"],
-                    record["name"],
-                    record["email"],
-                    record["status"],
-                    record["created_at"],
-                    str(record["metadata"])  # JSON string
+            if self.use_copy:
+                rows_affected = db_manager.copy_upsert(
+                    self.table_name,
+                    columns,
+                    data,
+                    update_columns=update_columns,
+                    update_expressions={"updated_at": "NOW()"},
+                    update_where=update_where
                 )
-                for record in data
-            ]
+                logger.info("Saved %d records to %s", rows_affected, self.table_name)
+                return True
             
-            rows_affected = db_manager.execute_batch(query, data_tuples)
-            logger.info(f"Saved {rows_affected} records to {self.table_name}")
+            result = db_manager.upsert_many(
+                self.table_name,
+                columns,
+                data,
+                update_columns=update_columns,
+                update_expressions={"updated_at": "NOW()"},
+                update_where=update_where,
+                page_size=self.page_size,
+                template=template
+            )
+            self.increment_stat("inserted", result["inserted"])
+            self.increment_stat("updated", result["updated"])
+            logger.info(
+                f"Saved {len(data)} records to {self.table_name} "
+                f"({result['inserted']} inserted, {result['updated']} updated)"
+            )
             
-            return rows_affected > 0
+            return True
             
         except Exception as e:
             logger.error(f"Error saving data: {str(e)}", exc_info=True)
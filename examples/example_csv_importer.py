@@ -3,72 +3,194 @@ Example: Import data from CSV file.
 
 This example demonstrates reading data from a CSV file and saving it to the database.
 """
-import csv
-from typing import List, Dict, Any
-from app.services.base_importer import BaseImporter
+import time
+from typing import Iterator, List, Dict, Any, Optional, Tuple
+from app.services.base_importer import BaseImporter, MODE_STREAMING
+from app.services.csv_source import CSVSource
+from app.services.parallel_csv import ParallelCSVReader, split_ranges
+from app.services.registry import register_importer
+from app.services.transform import Column, ColumnMapping
 from app.services.database import db_manager
 from app.logger_config import get_logger
 
 logger = get_logger(__name__)
 
 
+@register_importer("csv")
 class CSVImporter(BaseImporter):
     """
     Example for importing data from CSV file.
+    
+    The file is streamed in batches of "chunk_size" rows, so memory use does
+    not grow with the file size. Gzip/bzip2 compressed files are read
+    transparently. After a run, stats["offset"] is the byte offset after the
+    last saved batch; pass it as "start_offset" to continue an interrupted import.
+    The importer is resumable: the offset is checkpointed, and a run stopped
+    at its deadline continues there (see BaseImporter checkpoints).
+    
+    With "parallel_workers" > 1, an uncompressed file is parsed and transformed
+    in a process pool (see app/services/parallel_csv.py) while this process
+    saves the results, one chunk per "range_size" bytes (default 2 MB).
+    Ranges are saved in file order unless "ordered" is False; unordered runs
+    do not wait for slow ranges but have no resume offset (stats["offset"] is None).
+    Process pools do not work inside AWS Lambda, so use this for local backfills.
+    
+    In fan-out runs (see app/services/fanout.py) an uncompressed file is split
+    into partitions of about "partition_size" bytes (default 64 MB) on record
+    boundaries; each imports its "start_offset" to "end_offset" byte range.
+    
+    Rows repeating an "external_id" within a chunk are deduplicated before the
+    upsert, the last one winning; override with a "dedup" section (see
+    BaseImporter deduplication) or turn it off with "dedup": None.
     """
     
+    # Target columns, their accepted CSV column names and normalisation
+    MAPPING = ColumnMapping([
+        Column("external_id", source=("ID", "id")),
+        Column("name", source=("Name", "name"), ops=("strip",), default=""),
+        Column("email", source=("Email", "email"), ops=("lower", "strip"), default=""),
+        Column("phone", source=("Phone", "phone"), ops=("strip",), default=""),
+        Column("status", source=("Status", "status"), default="active"),
+    ], name="CSVRecord")
+    
     def __init__(self, config: Dict[str, Any] = None):
         super().__init__(config)
         self.file_path = self.config.get("file_path", "data.csv")
         self.table_name = self.config.get("table_name", "imported_data")
         self.delimiter = self.config.get("delimiter", ",")
         self.encoding = self.config.get("encoding", "utf-8")
+        self.start_offset = self.config.get("start_offset", 0)
+        self.end_offset = self.config.get("end_offset")
+        self.partition_size = self.config.get("partition_size", 64 * 1024 * 1024)
+        self.use_copy = self.config.get("use_copy", False)
+        self.page_size = self.config.get("page_size", 500)
+        self.parallel_workers = self.config.get("parallel_workers", 1)
+        self.ordered = self.config.get("ordered", True)
+        self.range_size = self.config.get("range_size", 2 * 1024 * 1024)
+        self.dedup = self.config.get("dedup", {"key": "external_id"})
+        if "mode" not in self.config:
+            self.mode = MODE_STREAMING
+        self.columns = self.MAPPING.names
+        self.resumable = True
+        self.source = CSVSource(
+            self.file_path,
+            delimiter=self.delimiter,
+            encoding=self.encoding,
+            batch_size=self.chunk_size,
+            start_offset=self.start_offset,
+            end_offset=self.end_offset
+        )
     
-    def fetch_data(self) -> List[Dict[str, Any]]:
+    def fetch_data(self) -> Iterator[List[Tuple[str, ...]]]:
         """
-        Read data from CSV file.
+        Read data from CSV file, one batch of row tuples at a time.
         """
         try:
-            data = []
-            with open(self.file_path, 'r', encoding=self.encoding) as f:
-                reader = csv.DictReader(f, delimiter=self.delimiter)
-                for row in reader:
-                    data.append(row)
-            
-            logger.info(f"Read {len(data)} records from {self.file_path}")
-            return data
+            yield from self.source.iter_batches()
+            logger.info(f"Read {self.source.rows_read} records from {self.file_path}")
             
         except FileNotFoundError:
             logger.error(f"File not found: {self.file_path}")
-            return []
+            self.increment_stat("errors")
         except Exception as e:
             logger.error(f"Error reading CSV file: {str(e)}")
-            return []
+            self.increment_stat("errors")
+    
+    def checkpoint_position(self) -> Optional[Dict[str, Any]]:
+        """
+        Byte offset after the last saved batch (None in unordered parallel runs).
+        """
+        if self.source.offset is None:
+            return None
+        return {"file_path": self.file_path, "offset": self.source.offset}
     
-    def transform_data(self, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def restore_position(self, position: Dict[str, Any]):
         """
-        Transform CSV data to database-compatible format.
+        Continue reading at a checkpointed byte offset of the same file.
+        """
+        if position.get("file_path", self.file_path) != self.file_path:
+            logger.warning(f"Ignoring checkpoint of {position['file_path']}, importing {self.file_path}")
+            return
+        self.start_offset = self.source.start_offset = self.source.offset = position["offset"]
+    
+    def plan_partitions(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Byte ranges of about "partition_size" bytes (None for compressed files).
+        """
+        reason = ParallelCSVReader.supports(self.file_path)
+        if reason is not None:
+            logger.info(f"Not splitting {self.file_path}: {reason}")
+            return None
+        _, ranges = split_ranges(self.file_path, self.partition_size, self.start_offset)
+        return [{"start_offset": start, "end_offset": end} for start, end in ranges]
+    
+    def _run_streaming(self):
         """
-        transformed = []
+        Stream the file, in a process pool when "parallel_workers" > 1.
+        """
+        if self.parallel_workers > 1 and self.end_offset is None:
+            reason = ParallelCSVReader.supports(self.file_path)
+            if reason is None:
+                self._run_parallel()
+                return
+            logger.warning(f"Parallel parsing disabled for {self.file_path}: {reason}")
+        super()._run_streaming()
+    
+    def _run_parallel(self):
+        """
+        Parse and transform ranges in worker processes and save them here.
+        """
+        self.stats["chunks"] = 0
+        self.stats["chunk_stats"] = []
         
-        for record in data:
-            try:
-                # Map CSV column names to database column names
-                transformed_record = {
-                    "external_id": record.get("ID") or record.get("id"),
-                    "name": record.get("Name") or record.get("name", "").strip(),
-                    "email": record.get("Email") or record.get("email", "").lower().strip(),
-                    "phone": record.get("Phone") or record.get("phone", "").strip(),
-                    "status": record.get("Status") or record.get("status", "active"),
-                }
-                transformed.append(transformed_record)
-            except Exception as e:
-                logger.error(f"Error transforming record: {str(e)}")
-                self.stats["errors"] += 1
+        # Workers build their own importer; drop objects that cannot be pickled
+        worker_config = {key: value for key, value in self.config.items() if key != "state_store"}
+        reader = ParallelCSVReader(
+            self.file_path,
+            type(self),
+            worker_config,
+            workers=self.parallel_workers,
+            ordered=self.ordered,
+            range_size=self.range_size,
+            start_offset=self.start_offset
+        )
         
-        return transformed
+        results = reader.iter_results()
+        started = time.monotonic()
+        for index, end, rows, transformed_data, errors in results:
+            chunk_stats = self._start_chunk(index, rows)
+            self.increment_stat("errors", errors)
+            chunk_stats["errors"] += errors
+            
+            # In file order, the end of this range is a valid resume point
+            self.source.offset = end if self.ordered else None
+            transformed_data = self._finish_transform(transformed_data, chunk_stats)
+            if transformed_data:
+                self._save_chunk(transformed_data, chunk_stats)
+            if self._chunk_done(started):
+                # Stops the worker processes
+                results.close()
+                break
+            started = time.monotonic()
+        
+        self.source.rows_read = self.stats["fetched"]
+        logger.info(f"Read {self.source.rows_read} records from {self.file_path} with {self.parallel_workers} workers")
     
-    def save_data(self, data: List[Dict[str, Any]]) -> bool:
+    def _get_result(self) -> Dict[str, Any]:
+        """
+        Get result dictionary with statistics, including the bytes read.
+        """
+        if self.source.offset is not None:
+            self.stats["bytes_fetched"] = max(0, self.source.offset - self.start_offset)
+        return super()._get_result()
+    
+    def transform_data(self, data: List[Tuple[str, ...]]) -> List[Tuple[Any, ...]]:
+        """
+        Transform CSV rows to CSVRecord tuples in MAPPING column order.
+        """
+        return self.map_records(self.MAPPING, data, self.source.index)
+    
+    def save_data(self, data: List[Tuple[Any, ...]]) -> bool:
         """
         Save data to database.
         """
@@ -76,33 +198,45 @@ class CSVImporter(BaseImporter):
             return False
         
         try:
-            query = f"""
-                INSERT INTO {self.table_name} 
-                (external_id, name, email, phone, status)
-                VALUES (%s, %s, %s, %s, %s)
-                ON CONFLICT (external_id) DO UPDATE SET
-                    name = EXCLUDED.name,
-                    email = EXCLUDED.email,
-                    phone = EXCLUDED.phone,
-                    status = EXCLUDED.status,
-                    updated_at = NOW()
-            """
+            columns = list(self.columns)
+            update_where = None
+            
+            if self.change_detection:
+                # Rows carry the content hash as their last element
+                hash_column = self.change_detector.hash_column
+                columns.append(hash_column)
+                update_where = f"{self.table_name}.{hash_column} IS DISTINCT FROM EXCLUDED.{hash_column}"
             
-            data_tuples = [
-                (
-                    record["external_id"],
-                    record["name"],
-                    record["email"],
-                    record.get("phone"),
-                    record["status"]
+            if self.use_copy:
+                rows_affected = db_manager.copy_upsert(
+                    self.table_name,
+                    columns,
+                    data,
+                    update_expressions={"updated_at": "NOW()"},
+                    update_where=update_where
                 )
-                for record in data
-            ]
+                logger.info("Saved %d records to %s", rows_affected, self.table_name)
+                self.stats["offset"] = self.source.offset
+                return True
             
-            rows_affected = db_manager.execute_batch(query, data_tuples)
-            logger.info(f"Saved {rows_affected} records to {self.table_name}")
+            result = db_manager.upsert_many(
+                self.table_name,
+                columns,
+                data,
+                update_expressions={"updated_at": "NOW()"},
+                update_where=update_where,
+                page_size=self.page_size
+            )
+            self.increment_stat("inserted", result["inserted"])
+            self.increment_stat("updated", result["updated"])
+            logger.info(
+                f"Saved {len(data)} records to {self.table_name} "
+                f"({result['inserted']} inserted, {result['updated']} updated)"
+            )
             
-            return rows_affected > 0
+            # Resume point: everything up to here is stored
+            self.stats["offset"] = self.source.offset
+            return True
             
         except Exception as e:
             logger.error(f"Error saving data: {str(e)}", exc_info=True)
@@ -0,0 +1,217 @@
+"""
+Example: Import data from another PostgreSQL database.
+
+This example demonstrates copying the rows of a source query into a target
+table with bounded memory, using keyset pages and server-side cursors.
+"""
+import json
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from psycopg2 import sql
+from app.services.base_importer import BaseImporter, MODE_STREAMING
+from app.services.database import DEFAULT_ITERSIZE, DatabaseManager, db_manager, table_identifier
+from app.services.registry import register_importer
+from app.logger_config import get_logger
+
+logger = get_logger(__name__)
+
+# Rows per keyset page, i.e. per source query
+DEFAULT_KEYSET_PAGE_SIZE = 50000
+
+# Rows per fan-out partition
+DEFAULT_PARTITION_ROWS = 1000000
+
+# Source database managers by connection parameters, so warm invocations reuse their pools
+_source_managers: Dict[str, DatabaseManager] = {}
+_source_lock = threading.Lock()
+
+
+def source_manager(connection: Any) -> DatabaseManager:
+    """
+    Get the shared manager of a source database.
+    
+    Args:
+        connection: psycopg2 connection parameters, or a DSN string
+    """
+    if isinstance(connection, str):
+        connection = {"dsn": connection}
+    key = json.dumps(connection, sort_keys=True)
+    with _source_lock:
+        if key not in _source_managers:
+            _source_managers[key] = DatabaseManager(min_conn=1, max_conn=2, connection=connection)
+        return _source_managers[key]
+
+
+@register_importer("database")
+class DatabaseSourceImporter(BaseImporter):
+    """
+    Example for importing the rows of a query on another database.
+    
+    The source is read in keyset pages ordered by "key_columns", a unique
+    key: each page is one short query
+    ``SELECT * FROM (<query>) AS source WHERE (key) > (last key) ORDER BY key LIMIT page_size``
+    read through a server-side cursor "itersize" rows at a time. Memory stays
+    bounded by the chunk size, no source transaction stays open for the whole
+    import, and the key of the last row read is checkpointed, so a run
+    stopped at its deadline continues after it.
+    
+    Config:
+        source: Connection parameters of the source database, e.g.
+            {"dsn": "postgresql://reader@replica/app"} (default: the target database)
+        query: Source SELECT without ORDER BY/LIMIT; or "source_table" to read a table
+        columns: Column names of the query result in order, also the target columns
+        key_columns: Unique key of the query result (default ["id"])
+        table_name: Target table (default "imported_data")
+        conflict_columns: Unique key of the target table (default: key_columns)
+        page_size: Rows per keyset page (default 50000)
+        itersize: Rows per fetch round trip (default 2000)
+        use_copy: Upsert with COPY (default True) instead of multi-row INSERTs
+        after, until: Only read keys after / up to these key values
+        partition_rows: Rows per fan-out partition (default 1000000)
+    
+    In fan-out runs (see app/services/fanout.py) the source is split into
+    key ranges of "partition_rows" rows, imported as "after"/"until" bounds.
+    
+    With "incremental": True, only source rows whose "watermark_field" is
+    later than the stored watermark are read. Override ``transform_data`` to
+    change rows on the way; they are tuples in "columns" order.
+    """
+    
+    def __init__(self, config: Dict[str, Any] = None):
+        super().__init__(config)
+        self.columns = list(self.config["columns"])
+        self.key_columns = list(self.config.get("key_columns", ["id"]))
+        missing = [column for column in self.key_columns if column not in self.columns]
+        if missing:
+            raise ValueError(f"Key columns {missing} are not in columns")
+        self.key_positions = [self.columns.index(column) for column in self.key_columns]
+        if self.config.get("source_table"):
+            self.query = sql.SQL("SELECT {columns} FROM {table}").format(
+                columns=sql.SQL(", ").join(sql.Identifier(column) for column in self.columns),
+                table=table_identifier(self.config["source_table"]),
+            )
+        else:
+            self.query = sql.SQL(self.config["query"])
+        self.table_name = self.config.get("table_name", "imported_data")
+        self.conflict_columns = self.config.get("conflict_columns", self.key_columns)
+        self.page_size = self.config.get("page_size", DEFAULT_KEYSET_PAGE_SIZE)
+        self.itersize = self.config.get("itersize", DEFAULT_ITERSIZE)
+        self.use_copy = self.config.get("use_copy", True)
+        self.until: Optional[List[Any]] = self.config.get("until")
+        self.partition_rows = self.config.get("partition_rows", DEFAULT_PARTITION_ROWS)
+        self.source = source_manager(self.config["source"]) if self.config.get("source") else db_manager
+        if "mode" not in self.config:
+            self.mode = MODE_STREAMING
+        self.resumable = True
+        self.after: Optional[List[Any]] = self.config.get("after")
+    
+    def page_query(self) -> Tuple[sql.Composable, List[Any]]:
+        """
+        Query of the next keyset page and its parameters.
+        """
+        keys = sql.SQL(", ").join(sql.Identifier(column) for column in self.key_columns)
+        filters, params = [], []
+        if self.after is not None:
+            filters.append(sql.SQL("({keys}) > ({values})").format(
+                keys=keys, values=sql.SQL(", ").join([sql.Placeholder()] * len(self.key_columns))
+            ))
+            params.extend(self.after)
+        if self.until is not None:
+            filters.append(sql.SQL("({keys}) <= ({values})").format(
+                keys=keys, values=sql.SQL(", ").join([sql.Placeholder()] * len(self.key_columns))
+            ))
+            params.extend(self.until)
+        if self.incremental and self.watermark is not None:
+            filters.append(sql.SQL("{field} > %s").format(field=sql.Identifier(self.watermark_field)))
+            params.append(self.watermark)
+        where = sql.SQL(" WHERE ") + sql.SQL(" AND ").join(filters) if filters else sql.SQL("")
+        query = sql.SQL("SELECT * FROM ({query}) AS source{where} ORDER BY {keys} LIMIT {limit}").format(
+            query=self.query, where=where, keys=keys, limit=sql.Literal(self.page_size)
+        )
+        return query, params
+    
+    def plan_partitions(self) -> List[Dict[str, Any]]:
+        """
+        Key ranges of "partition_rows" rows, from one scan of the source keys.
+        """
+        keys = sql.SQL(", ").join(sql.Identifier(column) for column in self.key_columns)
+        query = sql.SQL("""
+            SELECT {keys} FROM (
+                SELECT {keys}, row_number() OVER (ORDER BY {keys}) AS row_number FROM ({query}) AS source
+            ) AS numbered
+            WHERE row_number %% {rows} = 0
+            ORDER BY {keys}
+        """).format(keys=keys, query=self.query, rows=sql.Literal(self.partition_rows))
+        bounds = [list(row) for rows in self.source.stream_query(query, [], tuples=True) for row in rows]
+        
+        partitions = []
+        after = self.after
+        for until in bounds:
+            partitions.append({"after": after, "until": until})
+            after = until
+        partitions.append({"after": after, "until": self.until})
+        return partitions
+    
+    def fetch_data(self) -> Iterator[List[Tuple[Any, ...]]]:
+        """
+        Read the source page by page, yielding lists of at most "itersize"
+        and "chunk_size" rows.
+        
+        Each list is a whole chunk, so when it has been saved the key of its
+        last row is the position to resume after.
+        """
+        while True:
+            query, params = self.page_query()
+            count = 0
+            for rows in self.source.stream_query(query, params, itersize=self.itersize, tuples=True):
+                count += len(rows)
+                for start in range(0, len(rows), self.chunk_size):
+                    chunk = rows[start:start + self.chunk_size]
+                    self.after = [chunk[-1][position] for position in self.key_positions]
+                    yield chunk
+            if count < self.page_size:
+                return
+    
+    def checkpoint_position(self) -> Optional[Dict[str, Any]]:
+        """
+        Key of the last row of the last chunk: {"after": [values]}.
+        """
+        return {"after": self.after} if self.after is not None else None
+    
+    def restore_position(self, position: Dict[str, Any]):
+        """
+        Continue after a checkpointed key.
+        """
+        self.after = list(position["after"])
+    
+    def transform_data(self, data: List[Tuple[Any, ...]]) -> List[Tuple[Any, ...]]:
+        """
+        Rows are imported as they are read.
+        """
+        return data
+    
+    def save_data(self, data: List[Tuple[Any, ...]]) -> bool:
+        """
+        Upsert rows into the target table.
+        """
+        if not self.validate_data(data):
+            return False
+        
+        try:
+            if self.use_copy:
+                rows_affected = db_manager.copy_upsert(
+                    self.table_name, self.columns, data, conflict_columns=self.conflict_columns
+                )
+                logger.info("Saved %d records to %s", rows_affected, self.table_name)
+                return True
+            
+            result = db_manager.upsert_many(
+                self.table_name, self.columns, data, conflict_columns=self.conflict_columns
+            )
+            self.increment_stat("inserted", result["inserted"])
+            self.increment_stat("updated", result["updated"])
+            return True
+        
+        except Exception as e:
+            logger.error(f"Error saving data: {str(e)}", exc_info=True)
+            return False
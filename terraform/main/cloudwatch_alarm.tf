@@ -28,3 +28,29 @@ resource "aws_cloudwatch_metric_alarm" "failure_metric_alarm" {
     return_data = true
   }
 }
+
+# Alarm when import throughput drops below the expected rate.
+# Importers publish RecordsPerSecond as Embedded Metric Format log lines
+# (app/services/metrics.py) in the APP_IDENT namespace, also without dimensions.
+resource "aws_cloudwatch_metric_alarm" "throughput_metric_alarm" {
+  count = var.ENVIRONMENT == "prod" && var.THROUGHPUT_ALARM_MIN_RECORDS_PER_SEC > 0 ? 1 : 0
+  alarm_name          = "${var.APP_IDENT}-throughput-alarm"
+  alarm_description   = "Alarm when ${var.APP_IDENT} imports fewer than ${var.THROUGHPUT_ALARM_MIN_RECORDS_PER_SEC} records/sec"
+  comparison_operator = "LessThanThreshold"
+  evaluation_periods  = var.THROUGHPUT_ALARM_EVALUATION_PERIODS
+  datapoints_to_alarm = var.THROUGHPUT_ALARM_EVALUATION_PERIODS  # Every period must be slow
+  threshold           = var.THROUGHPUT_ALARM_MIN_RECORDS_PER_SEC
+  alarm_actions       = [aws_sns_topic.sns_topic.arn]
+  treat_missing_data  = "notBreaching"  # No import ran in the period
+
+  metric_query {
+    id = "e1"
+    metric {
+      metric_name = "RecordsPerSecond"
+      namespace   = var.APP_IDENT
+      period      = var.THROUGHPUT_ALARM_PERIOD
+      stat        = "Average"
+    }
+    return_data = true
+  }
+}
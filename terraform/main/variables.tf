@@ -37,6 +37,24 @@ variable "CPU_ARCHITECTURE" {
   type = string
 }
 
+variable "THROUGHPUT_ALARM_MIN_RECORDS_PER_SEC" {
+  description = "Alarm when the average import throughput falls below this many records/sec (0 disables the alarm)"
+  type        = number
+  default     = 0
+}
+
+variable "THROUGHPUT_ALARM_PERIOD" {
+  description = "Seconds per throughput alarm evaluation period"
+  type        = number
+  default     = 3600
+}
+
+variable "THROUGHPUT_ALARM_EVALUATION_PERIODS" {
+  description = "Number of consecutive slow periods before the throughput alarm fires"
+  type        = number
+  default     = 1
+}
+
 ##################################################
 # API Gateway variables
 ##################################################
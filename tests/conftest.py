@@ -7,3 +7,86 @@ project_root = Path(__file__).parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+
+class StubHTTPServer:
+    """
+    Local HTTP server for importer tests.
+
+    ``handler(path, query, headers)`` returns ``(status, headers, body)``;
+    a dict or list body is sent as JSON. POST requests call
+    ``handler(path, query, headers, body)`` with the decoded JSON body.
+    Every request is recorded.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self.respond()
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self.respond(json.loads(self.rfile.read(length) or b"null"))
+
+            def respond(self, *request_body):
+                parsed = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+                stub.requests.append({
+                    "method": self.command,
+                    "path": parsed.path,
+                    "query": query,
+                    "headers": dict(self.headers),
+                    "body": request_body[0] if request_body else None,
+                })
+                status, headers, body = stub.handler(parsed.path, query, self.headers, *request_body)
+                if isinstance(body, (dict, list)):
+                    body = json.dumps(body)
+                if isinstance(body, str):
+                    body = body.encode("utf-8")
+                body = body or b""
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_http_server():
+    """Factory fixture starting a StubHTTPServer with the given handler."""
+    servers = []
+
+    def start(handler):
+        server = StubHTTPServer(handler)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
@@ -0,0 +1,33 @@
+"""Registered importers shared by the orchestrator and fan-out tests."""
+import threading
+import time
+
+from app.services.registry import register_importer
+from tests.unit.app.services.test_base_importer import MemoryImporter, ResumableImporter, make_records
+
+running = []
+peak = []
+lock = threading.Lock()
+
+
+@register_importer("test_memory")
+class SlowMemoryImporter(MemoryImporter):
+    def __init__(self, config=None):
+        super().__init__(make_records(config.get("count", 3)), config)
+
+    def fetch_data(self):
+        with lock:
+            running.append(self)
+            peak.append(len(running))
+        time.sleep(self.config.get("sleep", 0.02))
+        if self.config.get("fail"):
+            raise RuntimeError("source down")
+        with lock:
+            running.remove(self)
+        return super().fetch_data()
+
+
+@register_importer("test_resumable")
+class ResumableJobImporter(ResumableImporter):
+    def __init__(self, config=None):
+        super().__init__(make_records(5), config)
@@ -0,0 +1,112 @@
+"""Tests for the asyncio importer adapter and the async database pool."""
+import asyncio
+
+import pytest
+from psycopg2 import extensions, pool
+
+from app.services import async_database
+from app.services.async_database import AsyncDatabaseManager, run_async
+from app.services.async_importer import AsyncImporter
+from app.services.database import _record_db, collect_db_stats
+from tests.unit.app.services.test_base_importer import make_records
+
+
+class AsyncMemoryImporter(AsyncImporter):
+    def __init__(self, records, config=None, paged=True):
+        super().__init__(config)
+        self.records = records
+        self.paged = paged
+        self.saved_chunks = []
+        self.closed = False
+
+    def fetch_data_async(self):
+        if not self.paged:
+            return self._fetch_all()
+        return self._fetch_pages()
+
+    async def _fetch_all(self):
+        await asyncio.sleep(0)
+        return self.records
+
+    async def _fetch_pages(self):
+        try:
+            for start in range(0, len(self.records), 2):
+                await asyncio.sleep(0)
+                yield self.records[start:start + 2]
+        finally:
+            self.closed = True
+
+    def transform_data(self, data):
+        return [{"id": record["id"]} for record in data]
+
+    async def save_data_async(self, data):
+        await asyncio.sleep(0)
+        _record_db("round_trips")
+        self.saved_chunks.append(list(data))
+        return True
+
+
+@pytest.mark.parametrize("mode", ["batch", "streaming", "pipeline"])
+def test_async_importer_runs_in_every_mode(mode):
+    importer = AsyncMemoryImporter(make_records(5), {"mode": mode, "chunk_size": 2}, paged=mode != "batch")
+
+    result = importer.run()
+
+    assert result["status"] == "success"
+    assert [record["id"] for chunk in importer.saved_chunks for record in chunk] == [0, 1, 2, 3, 4]
+    assert result["stats"]["metrics"]["db"]["round_trips"] == len(importer.saved_chunks)
+    assert importer.closed or mode == "batch"
+
+
+def test_run_async_raises_coroutine_errors():
+    async def fail():
+        raise ValueError("bad")
+
+    with pytest.raises(ValueError):
+        run_async(fail())
+
+
+class FakeAsyncConnection:
+    closed = 0
+
+    def isexecuting(self):
+        return False
+
+    def get_transaction_status(self):
+        return extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def fake_connect(monkeypatch):
+    opened = []
+
+    async def connect(self):
+        opened.append(FakeAsyncConnection())
+        return opened[-1]
+
+    monkeypatch.setattr(async_database.AsyncDatabaseManager, "_connect", connect)
+    return opened
+
+
+def test_async_pool_reuses_connections_and_waits_for_a_free_one(fake_connect):
+    manager = AsyncDatabaseManager(max_conn=1, pool_timeout=0.05)
+    counters = {}
+
+    async def use():
+        async with manager.get_connection() as first:
+            with pytest.raises(pool.PoolError):
+                async with manager.get_connection():
+                    pass
+        async with manager.get_connection() as second:
+            assert second is first
+
+    with collect_db_stats(lambda name, value: counters.update({name: counters.get(name, 0) + value})):
+        run_async(use())
+
+    assert len(fake_connect) == 1
+    assert counters["checkouts"] == 2
+    run_async(manager.close_pool())
+    assert fake_connect[0].closed
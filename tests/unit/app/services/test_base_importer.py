@@ -0,0 +1,219 @@
+"""Tests for the BaseImporter run modes."""
+import json
+import time
+from typing import Any, Dict, List
+
+import pytest
+
+from app.services.base_importer import BaseImporter, iter_chunks
+from app.services.state_store import FileStateStore
+
+
+class MemoryImporter(BaseImporter):
+    """Importer that reads from and writes to in-memory lists."""
+
+    def __init__(self, records, config=None, fail_on_chunk=None):
+        super().__init__(config)
+        self.records = records
+        self.saved_chunks: List[List[Dict[str, Any]]] = []
+        self.fail_on_chunk = fail_on_chunk
+
+    def fetch_data(self):
+        if self.incremental and self.watermark is not None:
+            return [record for record in self.records if record["updated_at"] > self.watermark]
+        return self.records
+
+    def transform_data(self, data):
+        return [
+            {"id": record["id"], "name": record["name"].upper(), "updated_at": record.get("updated_at")}
+            for record in data
+        ]
+
+    def save_data(self, data):
+        if self.fail_on_chunk is not None and len(self.saved_chunks) == self.fail_on_chunk:
+            self.saved_chunks.append([])
+            return False
+        self.saved_chunks.append(list(data))
+        return True
+
+
+class ResumableImporter(MemoryImporter):
+    """Memory importer that checkpoints the index of the next record."""
+
+    def __init__(self, records, config=None):
+        super().__init__(records, config)
+        self.resumable = True
+        self.position = 0
+
+    def fetch_data(self):
+        while self.position < len(self.records):
+            start = self.position
+            self.position = min(start + self.chunk_size, len(self.records))
+            yield self.records[start:self.position]
+
+    def checkpoint_position(self):
+        return {"next": self.position}
+
+    def restore_position(self, position):
+        self.position = position["next"]
+
+
+def make_records(count):
+    return [{"id": i, "name": f"name-{i}", "updated_at": f"2024-01-{i + 1:02d}"} for i in range(count)]
+
+
+def test_iter_chunks_splits_lists_and_generators():
+    assert list(iter_chunks(make_records(5), 2)) == [
+        make_records(5)[0:2], make_records(5)[2:4], make_records(5)[4:5]
+    ]
+    assert [len(c) for c in iter_chunks(iter(make_records(5)), 2)] == [2, 2, 1]
+
+
+def test_iter_chunks_passes_through_pages_and_splits_large_ones():
+    pages = iter([make_records(3), make_records(1), make_records(5)])
+    assert [len(c) for c in iter_chunks(pages, 4)] == [3, 1, 4, 1]
+
+
+def test_iter_chunks_rejects_invalid_size():
+    with pytest.raises(ValueError):
+        list(iter_chunks([1], 0))
+
+
+def test_batch_mode_is_unchanged():
+    importer = MemoryImporter(make_records(5))
+    result = importer.run()
+
+    metrics = result["stats"].pop("metrics")
+    assert result["status"] == "success"
+    assert result["stats"] == {"fetched": 5, "transformed": 5, "saved": 5, "errors": 0}
+    assert len(importer.saved_chunks) == 1
+    assert [metrics["stages"][stage]["records"] for stage in ("fetch", "transform", "save")] == [5, 5, 5]
+
+
+def test_streaming_mode_saves_each_chunk():
+    importer = MemoryImporter(
+        (record for record in make_records(7)),
+        config={"mode": "streaming", "chunk_size": 3},
+    )
+    result = importer.run()
+
+    assert result["status"] == "success"
+    assert [len(c) for c in importer.saved_chunks] == [3, 3, 1]
+    assert result["stats"]["fetched"] == 7
+    assert result["stats"]["saved"] == 7
+    assert result["stats"]["chunks"] == 3
+    assert [c["saved"] for c in result["stats"]["chunk_stats"]] == [3, 3, 1]
+
+
+def test_streaming_mode_counts_failed_chunks():
+    importer = MemoryImporter(
+        make_records(6),
+        config={"mode": "streaming", "chunk_size": 2},
+        fail_on_chunk=1,
+    )
+    result = importer.run()
+
+    assert result["status"] == "partial"
+    assert result["stats"]["saved"] == 4
+    assert result["stats"]["errors"] == 1
+    assert result["stats"]["chunk_stats"][1]["errors"] == 1
+
+
+def test_incremental_mode_advances_watermark_after_success(tmp_path):
+    store = FileStateStore(str(tmp_path / "state.json"))
+    config = {"incremental": True, "state_store": store, "mode": "streaming", "chunk_size": 2}
+
+    first = MemoryImporter(make_records(5), config=config)
+    assert first.run()["stats"]["watermark"] == "2024-01-05"
+
+    records = make_records(7)
+    second = MemoryImporter(records, config=config)
+    result = second.run()
+
+    assert second.watermark == "2024-01-05"
+    assert result["stats"]["fetched"] == 2
+    assert store.get("watermark", "MemoryImporter") == "2024-01-07"
+
+
+def test_incremental_mode_keeps_watermark_on_errors(tmp_path):
+    store = FileStateStore(str(tmp_path / "state.json"))
+    store.set("watermark", "MemoryImporter", "2024-01-02")
+    importer = MemoryImporter(
+        make_records(6),
+        config={"incremental": True, "state_store": store, "mode": "streaming", "chunk_size": 2},
+        fail_on_chunk=1,
+    )
+
+    result = importer.run()
+
+    assert result["status"] == "partial"
+    assert store.get("watermark", "MemoryImporter") == "2024-01-02"
+
+
+@pytest.mark.parametrize("mode", ["streaming", "pipeline"])
+def test_resumable_import_stops_at_deadline_and_continues(tmp_path, mode):
+    store = FileStateStore(str(tmp_path / "state.json"))
+    # Past deadline: stop after every chunk
+    config = {
+        "mode": mode, "chunk_size": 2, "incremental": True, "state_store": store,
+        "deadline": time.time() - 1, "stop_margin": 0,
+    }
+    results, saved = [], []
+    checkpoint = None
+    while True:
+        importer = ResumableImporter(make_records(5), config={**config, "checkpoint": checkpoint})
+        result = importer.run()
+        results.append(result)
+        saved += importer.saved_chunks
+        if result["status"] != "incomplete":
+            break
+        checkpoint = result["checkpoint"]
+        assert store.get("checkpoint", "ResumableImporter") == checkpoint
+        assert store.get("watermark", "ResumableImporter") is None
+
+    assert [r["status"] for r in results] == ["incomplete"] * 3 + ["success"]
+    assert [r["stats"].get("resumed_from") for r in results] == [None, {"next": 2}, {"next": 4}, {"next": 5}]
+    assert [len(chunk) for chunk in saved] == [2, 2, 1]
+    assert store.get("checkpoint", "ResumableImporter") is None
+    assert store.get("watermark", "ResumableImporter") == "2024-01-05"
+
+
+def test_deadline_is_ignored_without_resume_position():
+    importer = MemoryImporter(
+        make_records(5), config={"mode": "streaming", "chunk_size": 2, "deadline": time.time() - 1}
+    )
+    result = importer.run()
+
+    assert result["status"] == "success"
+    assert result["stats"]["saved"] == 5
+
+
+def test_stage_metrics_and_emf_line(capsys):
+    importer = MemoryImporter(
+        (record for record in make_records(7)),
+        config={"mode": "streaming", "chunk_size": 3, "emit_metrics": True},
+    )
+    metrics = importer.run()["stats"]["metrics"]
+
+    assert metrics["stages"]["fetch"]["records"] == 7
+    assert metrics["stages"]["save"]["records"] == 7
+    assert metrics["stages"]["transform"]["cpu_seconds"] >= 0
+    assert metrics["records_per_sec"] > 0
+    assert metrics["db"] == {"round_trips": 0, "checkouts": 0, "checkout_wait_ms": 0}
+
+    document = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    assert document["Importer"] == "MemoryImporter"
+    assert document["RecordsSaved"] == 7
+    assert document["_aws"]["CloudWatchMetrics"][0]["Dimensions"] == [["Importer"], []]
+    assert {"Name": "RecordsPerSecond", "Unit": "Count/Second"} in document["_aws"]["CloudWatchMetrics"][0]["Metrics"]
+
+
+def test_empty_run_publishes_no_throughput(capsys):
+    importer = MemoryImporter([], config={"mode": "streaming", "emit_metrics": True})
+    metrics = importer.run()["stats"]["metrics"]
+
+    assert metrics["records_per_sec"] is None
+    document = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    assert document["RecordsSaved"] == 0
+    assert "RecordsPerSecond" not in document
+    assert "RecordsPerSecond" not in [metric["Name"] for metric in document["_aws"]["CloudWatchMetrics"][0]["Metrics"]]
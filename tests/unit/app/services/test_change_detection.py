@@ -0,0 +1,71 @@
+"""Tests for content-hash change detection."""
+from datetime import date
+
+from app.services.change_detection import ChangeDetector, record_hash
+from tests.unit.app.services.test_base_importer import MemoryImporter, make_records
+
+
+class FakeDatabase:
+    """Returns stored hashes for the keys it knows."""
+
+    def __init__(self, stored):
+        self.stored = stored
+        self.queries = []
+
+    def execute_query(self, query, params=None):
+        self.queries.append(params)
+        (keys,) = params
+        return [{"key": key, "hash": self.stored[key]} for key in keys if key in self.stored]
+
+
+def test_record_hash_is_stable_and_order_independent():
+    first = record_hash({"a": 1, "b": date(2024, 1, 1)})
+    second = record_hash({"b": date(2024, 1, 1), "a": 1})
+
+    assert first == second
+    assert first != record_hash({"a": 2, "b": date(2024, 1, 1)})
+    assert record_hash({"a": 1, "b": 2}, fields=["a"]) == record_hash({"a": 1, "b": 3}, fields=["a"])
+
+
+def test_filter_changed_skips_records_with_matching_hash():
+    detector = ChangeDetector("items", key_field="id")
+    unchanged = {"id": 1, "name": "same"}
+    modified = {"id": 2, "name": "new name"}
+    new = {"id": 3, "name": "brand new"}
+    detector.database = FakeDatabase({
+        1: detector.hash_record(unchanged),
+        2: detector.hash_record({"id": 2, "name": "old name"}),
+    })
+
+    changed, skipped = detector.filter_changed([dict(unchanged), modified, new])
+
+    assert [record["id"] for record in changed] == [2, 3]
+    assert [record["id"] for record in skipped] == [1]
+    assert all("row_hash" in record for record in changed)
+
+
+def test_importer_reports_unchanged_records():
+    importer = MemoryImporter(make_records(4), config={"change_detection": {"key": "id"}})
+    detector = importer.change_detector
+    stored = {}
+    for record in importer.transform_data(make_records(2)):
+        stored[record["id"]] = detector.hash_record(record)
+    detector.database = FakeDatabase(stored)
+
+    result = importer.run()
+
+    assert result["stats"]["unchanged"] == 2
+    assert result["stats"]["saved"] == 2
+    assert [record["id"] for record in importer.saved_chunks[0]] == [2, 3]
+
+
+def test_filter_changed_appends_hash_to_tuple_records():
+    columns = ("id", "name")
+    detector = ChangeDetector("items", key_field="id")
+    detector.database = FakeDatabase({1: detector.hash_record({"id": 1, "name": "same"})})
+
+    changed, skipped = detector.filter_changed([(1, "same"), (2, "new")], columns)
+
+    assert skipped == [(1, "same", detector.hash_record({"id": 1, "name": "same"}))]
+    assert [row[:2] for row in changed] == [(2, "new")]
+    assert len(changed[0]) == 3
@@ -0,0 +1,101 @@
+"""Tests for the streaming CSV source and the CSV importer."""
+import bz2
+import gzip
+
+import pytest
+
+from app.services.csv_source import CSVSource
+from examples.example_csv_importer import CSVImporter
+
+CSV_TEXT = (
+    "\ufeffID,Name,Email,Status\n"
+    "1, Alice ,ALICE@EXAMPLE.COM,active\n"
+    '2,"Bob, Jr.",bob@example.com,\n'
+    '3,"multi\nline",carol@example.com,inactive\n'
+    "4,Dan,dan@example.com,active\n"
+    "5,Eve,eve@example.com,active\n"
+)
+
+
+@pytest.fixture(params=["plain", "gzip", "bz2"])
+def csv_file(request, tmp_path):
+    data = CSV_TEXT.encode("utf-8")
+    if request.param == "gzip":
+        path = tmp_path / "data.csv.gz"
+        path.write_bytes(gzip.compress(data))
+    elif request.param == "bz2":
+        path = tmp_path / "data.csv.bz2"
+        path.write_bytes(bz2.compress(data))
+    else:
+        path = tmp_path / "data.csv"
+        path.write_bytes(data)
+    return str(path)
+
+
+def test_reads_batches_of_tuples(csv_file):
+    source = CSVSource(csv_file, batch_size=2)
+    batches = list(source.iter_batches())
+
+    assert source.header == ("ID", "Name", "Email", "Status")
+    assert source.index["Email"] == 2
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert batches[1][0] == ("3", "multi\nline", "carol@example.com", "inactive")
+    assert source.rows_read == 5
+
+
+def test_resumes_at_offset(csv_file):
+    first = CSVSource(csv_file, batch_size=3)
+    batches = first.iter_batches()
+    next(batches)
+    resume_at = first.offset
+
+    resumed = CSVSource(csv_file, batch_size=3, start_offset=resume_at)
+    rows = [row for batch in resumed.iter_batches() for row in batch]
+
+    assert [row[0] for row in rows] == ["4", "5"]
+    assert resumed.header == first.header
+
+
+class RecordingCSVImporter(CSVImporter):
+    def __init__(self, config):
+        super().__init__(config)
+        self.saved = []
+
+    def save_data(self, data):
+        self.saved.append(data)
+        self.stats["offset"] = self.source.offset
+        return True
+
+
+def test_csv_importer_streams_and_transforms(csv_file):
+    importer = RecordingCSVImporter({"file_path": csv_file, "chunk_size": 2})
+    result = importer.run()
+
+    assert result["stats"]["saved"] == 5
+    assert result["stats"]["chunks"] == 3
+    assert importer.columns == ("external_id", "name", "email", "phone", "status")
+    assert importer.saved[0][0] == ("1", "Alice", "alice@example.com", "", "active")
+    assert importer.saved[0][1][1:] == ("Bob, Jr.", "bob@example.com", "", "active")
+    assert result["stats"]["offset"] == len(CSV_TEXT.encode("utf-8"))
+
+
+def test_csv_importer_missing_file(tmp_path):
+    importer = CSVImporter({"file_path": str(tmp_path / "missing.csv")})
+    result = importer.run()
+
+    assert result["stats"]["fetched"] == 0
+    assert result["stats"]["errors"] == 1
+    assert result["status"] != "success"
+
+
+def test_stops_at_end_offset(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("id\n1\n2\n3\n4\n")
+    split = len("id\n1\n2\n")
+
+    first = CSVSource(str(path), batch_size=10, end_offset=split)
+    second = CSVSource(str(path), batch_size=10, start_offset=split)
+
+    assert [row[0] for batch in first.iter_batches() for row in batch] == ["1", "2"]
+    assert first.offset == split
+    assert [row[0] for batch in second.iter_batches() for row in batch] == ["3", "4"]
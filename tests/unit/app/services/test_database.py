@@ -0,0 +1,275 @@
+"""Tests for DatabaseManager helpers that do not need a live database."""
+import threading
+from datetime import date
+
+import psycopg2
+import pytest
+
+from app.services import database
+from app.services.database import DatabaseManager, _CopyStream
+
+
+def read_all(stream, size):
+    chunks = []
+    while True:
+        chunk = stream.read(size)
+        if not chunk:
+            return "".join(chunks)
+        chunks.append(chunk)
+
+
+def test_copy_stream_encodes_csv_with_nulls_and_quotes():
+    rows = iter([
+        (1, 'say "hi"', None, ""),
+        (2, {"key": "value"}, True, date(2024, 1, 2)),
+    ])
+    stream = _CopyStream(rows)
+
+    assert read_all(stream, 5) == (
+        '"1","say ""hi""",,""\n'
+        '"2","{""key"": ""value""}","t","2024-01-02"\n'
+    )
+    assert stream.row_count == 2
+
+
+def test_copy_stream_pulls_rows_lazily():
+    consumed = []
+
+    def rows():
+        for i in range(1000):
+            consumed.append(i)
+            yield (i,)
+
+    stream = _CopyStream(rows())
+    stream.read(10)
+
+    assert len(consumed) < 10
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+
+    def fetchmany(self, size):
+        self.conn.fetches.append(size)
+        rows, self.conn.rows = self.conn.rows[:size], self.conn.rows[size:]
+        return rows
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.commits = 0
+        self.rows = []
+        self.fetches = []
+        self.cursor_kwargs = []
+
+    def cursor(self, *args, **kwargs):
+        self.cursor_kwargs.append(kwargs)
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+class FakePool:
+    instances = []
+
+    def __init__(self, minconn, maxconn, **kwargs):
+        self.kwargs = kwargs
+        self.idle = []
+        self.discarded = []
+        self.closed = False
+        FakePool.instances.append(self)
+
+    def getconn(self):
+        return self.idle.pop() if self.idle else FakeConnection()
+
+    def putconn(self, conn, close=False):
+        if self.closed:
+            raise psycopg2.pool.PoolError("connection pool is closed")
+        if close:
+            conn.closed = 1
+            self.discarded.append(conn)
+        else:
+            self.idle.append(conn)
+
+    def closeall(self):
+        self.idle.clear()
+        self.closed = True
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    FakePool.instances = []
+    monkeypatch.setattr(database.pool, "ThreadedConnectionPool", FakePool)
+    return FakePool
+
+
+def test_pool_is_created_lazily_once(fake_pool):
+    manager = DatabaseManager()
+    assert fake_pool.instances == []
+
+    def use_connection():
+        with manager.get_connection():
+            pass
+
+    threads = [threading.Thread(target=use_connection) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(fake_pool.instances) == 1
+    assert manager.get_timings()["connect_ms"] is not None
+    assert manager.get_timings()["first_query_ms"] is not None
+
+
+def test_stale_connection_is_replaced_after_idle(fake_pool):
+    manager = DatabaseManager(healthcheck_interval=0)
+    with manager.get_connection() as conn:
+        first = conn
+    first.broken = True
+
+    with manager.get_connection() as conn:
+        assert conn is not first
+
+    assert fake_pool.instances[0].discarded == [first]
+
+
+def test_get_connection_waits_for_a_free_slot(fake_pool):
+    manager = DatabaseManager(max_conn=1, pool_timeout=0.05)
+
+    with manager.get_connection():
+        with pytest.raises(psycopg2.pool.PoolError):
+            with manager.get_connection():
+                pass
+
+    with manager.get_connection():
+        pass
+
+
+def test_connection_error_survives_a_concurrent_close_pool(fake_pool):
+    manager = DatabaseManager()
+
+    with pytest.raises(RuntimeError, match="query failed"):
+        with manager.get_connection() as conn:
+            manager.close_pool()
+            raise RuntimeError("query failed")
+
+    assert conn.closed
+
+
+def test_db_activity_is_reported_to_the_thread_collector(fake_pool):
+    manager = DatabaseManager()
+    counters = {}
+
+    def record(name, value):
+        counters[name] = counters.get(name, 0) + value
+
+    with database.collect_db_stats(record):
+        for _ in range(3):
+            with manager.get_connection():
+                pass
+    with manager.get_connection():
+        pass
+
+    assert counters["checkouts"] == 3
+    assert counters["round_trips"] == 3  # commits
+    assert counters["checkout_wait_ms"] >= 0
+
+
+def test_stream_query_fetches_in_batches_with_a_named_cursor(fake_pool):
+    manager = DatabaseManager()
+    with manager.get_connection() as conn:
+        conn.rows = [(i,) for i in range(5)]
+
+    batches = list(manager.stream_query("SELECT id FROM source", itersize=2, tuples=True))
+
+    assert batches == [[(0,), (1,)], [(2,), (3,)], [(4,)]]
+    assert conn.fetches == [2, 2, 2]
+    assert conn.cursor_kwargs[-1]["name"].startswith("stream_")
+    assert conn.cursor_kwargs[-1]["cursor_factory"] is psycopg2.extensions.cursor
+
+
+def render(query):
+    """SQL text of a composed query, without needing a connection to quote identifiers."""
+    if isinstance(query, psycopg2.sql.Composed):
+        return "".join(render(part) for part in query)
+    if isinstance(query, psycopg2.sql.Identifier):
+        return ".".join(f'"{name}"' for name in query.strings)
+    return query.string
+
+
+@pytest.fixture
+def fake_execute_values(monkeypatch):
+    """Stand-in for execute_values: RETURNING (xmax = 0) of rows whose id is in ``existing`` is false."""
+    calls = {"pages": [], "existing": set(), "unchanged": set()}
+
+    def execute_values(cur, query, page, template=None, page_size=100, fetch=False):
+        calls["query"] = render(query)
+        calls["pages"].append([row[0] for row in page])
+        # Conflicting rows filtered by update_where are not returned
+        return [(row[0] not in calls["existing"],) for row in page if row[0] not in calls["unchanged"]]
+
+    monkeypatch.setattr(database, "execute_values", execute_values)
+    return calls
+
+
+def test_upsert_many_pages_rows_and_counts_inserts_and_updates(fake_pool, fake_execute_values):
+    fake_execute_values["existing"] = {1, 3}
+    rows = ((i, f"name {i}") for i in range(5))
+
+    result = DatabaseManager().upsert_many("items", ["id", "name"], rows, conflict_columns=("id",), page_size=2)
+
+    assert fake_execute_values["pages"] == [[0, 1], [2, 3], [4]]
+    assert result == {"inserted": 3, "updated": 2, "skipped": 0}
+    assert fake_execute_values["query"] == (
+        'INSERT INTO "items" ("id", "name") VALUES %s '
+        'ON CONFLICT ("id") DO UPDATE SET "name" = EXCLUDED."name" RETURNING (xmax = 0)'
+    )
+
+
+def test_upsert_many_counts_rows_filtered_by_update_where_as_skipped(fake_pool, fake_execute_values):
+    fake_execute_values["existing"] = {1, 2, 3}
+    fake_execute_values["unchanged"] = {2, 3}
+    rows = [(i, "same") for i in range(4)]
+
+    result = DatabaseManager().upsert_many(
+        "items", ["id", "name"], rows, conflict_columns=("id",),
+        update_where='"items"."name" IS DISTINCT FROM EXCLUDED."name"',
+    )
+
+    assert result == {"inserted": 1, "updated": 1, "skipped": 2}
+    assert fake_execute_values["query"].endswith(
+        'WHERE "items"."name" IS DISTINCT FROM EXCLUDED."name" RETURNING (xmax = 0)'
+    )
+
+
+def test_on_conflict_clause_of_copy_upsert():
+    clause = DatabaseManager._on_conflict_clause(
+        ("customer_id", "date"), ["clicks"], {"updated_at": "NOW()"}, "t.clicks <> EXCLUDED.clicks"
+    )
+
+    assert render(clause) == (
+        'ON CONFLICT ("customer_id", "date") DO UPDATE SET "clicks" = EXCLUDED."clicks", '
+        '"updated_at" = NOW() WHERE t.clicks <> EXCLUDED.clicks'
+    )
+    assert render(DatabaseManager._on_conflict_clause(("id",), [])) == 'ON CONFLICT ("id") DO NOTHING'
@@ -0,0 +1,86 @@
+"""Tests for the keyset-paging database source importer."""
+import time
+
+import pytest
+
+from examples.example_database_importer import DatabaseSourceImporter
+
+
+class FakeSource:
+    """Stands in for the source DatabaseManager: keyset pages over in-memory rows."""
+
+    def __init__(self, rows, page_size):
+        self.rows = rows
+        self.page_size = page_size
+        self.calls = []
+
+    def stream_query(self, query, params=None, itersize=2000, tuples=False):
+        self.calls.append(params)
+        after = params[0] if params else None
+        page = [row for row in self.rows if after is None or row[0] > after][:self.page_size]
+        for start in range(0, len(page), itersize):
+            yield page[start:start + itersize]
+
+
+class MemoryDatabaseImporter(DatabaseSourceImporter):
+    def save_data(self, data):
+        self.saved.extend(data)
+        return True
+
+
+def make_importer(rows, config=None):
+    importer = MemoryDatabaseImporter({
+        "query": "SELECT id, name FROM customers",
+        "columns": ["id", "name"],
+        "page_size": 3,
+        "itersize": 2,
+        "chunk_size": 2,
+        **(config or {}),
+    })
+    importer.source = FakeSource(rows, importer.page_size)
+    importer.saved = []
+    return importer
+
+
+def test_reads_keyset_pages_until_a_short_page():
+    rows = [(i, f"name-{i}") for i in range(7)]
+    importer = make_importer(rows)
+
+    result = importer.run()
+
+    assert result["status"] == "success"
+    assert importer.saved == rows
+    assert importer.source.calls == [[], [2], [5]]
+
+
+def test_resumes_after_the_checkpointed_key():
+    rows = [(i, f"name-{i}") for i in range(7)]
+    importer = make_importer(rows, {"checkpoint": {"position": {"after": [4]}}})
+
+    importer.run()
+
+    assert importer.saved == rows[5:]
+    assert importer.source.calls[0] == [4]
+
+
+@pytest.mark.parametrize("mode", ["streaming", "pipeline"])
+def test_checkpoint_at_a_deadline_stop_is_the_last_saved_key(mode):
+    rows = [(i, f"name-{i}") for i in range(20)]
+    # Fetches of 4 rows are saved in chunks of 2; the stop margin exceeds the time left
+    config = {"mode": mode, "page_size": 10, "itersize": 4, "chunk_size": 2, "stop_margin": 3600, "deadline": time.time() + 600}
+    importer = make_importer(rows, config)
+
+    result = importer.run()
+
+    assert result["status"] == "incomplete"
+    assert importer.saved == rows[:len(importer.saved)]
+    assert result["checkpoint"]["position"] == {"after": [importer.saved[-1][0]]}
+
+    resumed = make_importer(rows, {**config, "deadline": None, "checkpoint": {"position": result["checkpoint"]["position"]}})
+    resumed.run()
+    assert importer.saved + resumed.saved == rows
+
+
+def test_key_columns_must_be_selected():
+    with pytest.raises(ValueError):
+        DatabaseSourceImporter({"query": "SELECT name FROM customers", "columns": ["name"]})
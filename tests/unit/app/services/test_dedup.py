@@ -0,0 +1,80 @@
+"""Tests for deduplication of transformed records by key."""
+from operator import itemgetter
+
+import pytest
+
+from app.services.dedup import Deduplicator
+from examples.example_csv_importer import CSVImporter
+from tests.unit.app.services.test_base_importer import MemoryImporter
+
+RECORDS = [
+    {"id": 1, "v": "a", "ts": 2},
+    {"id": 2, "v": "b", "ts": 1},
+    {"id": 1, "v": "c", "ts": 3},
+    {"id": 1, "v": "d", "ts": 1},
+    {"id": None, "v": "e", "ts": 1},
+    {"id": None, "v": "f", "ts": 1},
+]
+
+
+@pytest.mark.parametrize("keep, kept", [
+    ("last", ["d", "b", "e", "f"]),
+    ("first", ["a", "b", "e", "f"]),
+    ("latest", ["c", "b", "e", "f"]),
+])
+def test_keeps_one_record_per_key(keep, kept):
+    deduplicator = Deduplicator("id", keep=keep, order_field="ts")
+
+    unique, dropped = deduplicator.deduplicate(RECORDS, itemgetter("id"), itemgetter("ts"))
+
+    assert [record["v"] for record in unique] == kept
+    assert len(dropped) == 2
+
+
+def test_remembers_keys_of_earlier_chunks_within_the_window():
+    deduplicator = Deduplicator("id", keep="latest", order_field="ts", window=2)
+    get_key, get_order = itemgetter("id"), itemgetter("ts")
+    deduplicator.deduplicate([{"id": 1, "ts": 5}, {"id": 2, "ts": 5}], get_key, get_order)
+
+    unique, _ = deduplicator.deduplicate([{"id": 1, "ts": 4}, {"id": 2, "ts": 6}, {"id": 3, "ts": 1}], get_key, get_order)
+    assert unique == [{"id": 2, "ts": 6}, {"id": 3, "ts": 1}]
+
+    # Key 1 fell out of the window of two keys
+    unique, _ = deduplicator.deduplicate([{"id": 1, "ts": 0}], get_key, get_order)
+    assert unique == [{"id": 1, "ts": 0}]
+
+
+def test_rejects_latest_without_order_field():
+    with pytest.raises(ValueError):
+        Deduplicator("id", keep="latest")
+
+
+def test_streaming_import_counts_duplicates():
+    records = [{"id": i % 4, "name": f"n{i}", "updated_at": i} for i in range(10)]
+    importer = MemoryImporter(records, {
+        "mode": "streaming",
+        "chunk_size": 5,
+        "dedup": {"key": "id", "keep": "first"},
+    })
+
+    result = importer.run()
+
+    assert [[record["id"] for record in chunk] for chunk in importer.saved_chunks] == [[0, 1, 2, 3]]
+    assert result["stats"]["duplicates"] == 6
+    assert result["stats"]["saved"] == 4
+
+
+def test_csv_importer_drops_repeated_ids_by_default(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("ID,Name\n1,old\n2,other\n1,new\n")
+
+    class MemoryCSVImporter(CSVImporter):
+        def save_data(self, data):
+            self.saved = list(data)
+            return True
+
+    importer = MemoryCSVImporter({"file_path": str(path)})
+    result = importer.run()
+
+    assert [(row.external_id, row.name) for row in importer.saved] == [("1", "new"), ("2", "other")]
+    assert result["stats"]["duplicates"] == 1
@@ -0,0 +1,250 @@
+"""Tests for the work queue and planner/worker fan-out runs."""
+import json
+import threading
+import time
+
+from app.services.base_importer import BaseImporter
+from app.services.fanout import Worker, plan, run_workers
+from app.services.orchestrator import ImportJob
+from app.services.registry import register_importer
+from app.services.state_store import FileStateStore
+from app.services.work_queue import (
+    DONE,
+    FAILED,
+    LEASE_EXPIRED_ERROR,
+    PENDING,
+    RUNNING,
+    FileWorkQueue,
+    Partition,
+    PostgresWorkQueue,
+)
+from tests.unit.app import importers  # noqa: F401  registers "test_memory"
+
+
+@register_importer("test_numbers")
+class NumbersImporter(BaseImporter):
+    """Imports the numbers [start, end) to a JSON lines file, split into ranges of "size"."""
+
+    def __init__(self, config=None):
+        config = dict(config or {})
+        config["state_store"] = FileStateStore(config["state_path"])
+        super().__init__(config)
+        self.start = self.config.get("start", 0)
+        self.end = self.config["end"]
+        self.resumable = True
+        self.position = self.start
+
+    def plan_partitions(self):
+        size = self.config["size"]
+        return [{"start": start, "end": min(start + size, self.end)} for start in range(self.start, self.end, size)]
+
+    def fetch_data(self):
+        if self.config.get("fail"):
+            raise RuntimeError("source down")
+        while self.position < self.end:
+            start = self.position
+            self.position = min(start + self.chunk_size, self.end)
+            yield [{"n": n} for n in range(start, self.position)]
+
+    def checkpoint_position(self):
+        return {"next": self.position}
+
+    def restore_position(self, position):
+        self.position = position["next"]
+
+    def transform_data(self, data):
+        return data
+
+    def save_data(self, data):
+        with open(self.config["out"], "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record) + "\n" for record in data))
+        return True
+
+
+def numbers_job(tmp_path, name="numbers", **config):
+    return ImportJob(name, "test_numbers", {
+        "end": 10,
+        "size": 3,
+        "mode": "streaming",
+        "out": str(tmp_path / "out.jsonl"),
+        "state_path": str(tmp_path / "state.json"),
+        **config,
+    })
+
+
+def saved_numbers(tmp_path):
+    with open(tmp_path / "out.jsonl", encoding="utf-8") as f:
+        return sorted(json.loads(line)["n"] for line in f)
+
+
+def test_file_queue_claims_each_partition_once(tmp_path):
+    queue = FileWorkQueue(str(tmp_path / "queue.json"))
+    queue.enqueue("job", [{"name": "a"}, {"name": "b"}])
+
+    first = queue.claim("job", "w1")
+    second = queue.claim("job", "w2")
+
+    assert [first.spec["name"], second.spec["name"]] == ["a", "b"]
+    assert queue.claim("job", "w3") is None
+    queue.complete(first, {"saved": 1})
+    assert queue.counts("job") == {PENDING: 0, RUNNING: 1, DONE: 1, FAILED: 0}
+
+
+def test_file_queue_retries_failures_and_expired_leases(tmp_path):
+    queue = FileWorkQueue(str(tmp_path / "queue.json"), lease=0, max_attempts=3)
+    queue.enqueue("job", [{"name": "a"}])
+
+    partition = queue.claim("job", "w1")
+    queue.fail(partition, "boom")
+    partition = queue.claim("job", "w1")
+    assert partition.attempts == 2
+    # The lease expired: the worker is presumed dead and the partition is claimed again
+    partition = queue.claim("job", "w2")
+    assert partition.attempts == 3
+    queue.fail(partition, "boom")
+
+    assert queue.claim("job", "w1") is None
+    assert queue.counts("job")[FAILED] == 1
+
+
+def test_file_queue_fails_partition_whose_last_claim_expired(tmp_path):
+    queue = FileWorkQueue(str(tmp_path / "queue.json"), lease=0, max_attempts=2)
+    queue.enqueue("job", [{"name": "a"}])
+
+    # Each claim's worker dies without recording an outcome
+    assert queue.claim("job", "w1").attempts == 1
+    assert queue.claim("job", "w2").attempts == 2
+    assert queue.claim("job", "w3") is None
+
+    assert queue.counts("job")[FAILED] == 1
+
+
+def test_stale_worker_cannot_finish_a_reclaimed_partition(tmp_path):
+    queue = FileWorkQueue(str(tmp_path / "queue.json"), lease=0)
+    queue.enqueue("job", [{"name": "a"}])
+    stale = queue.claim("job", "w1")
+    # The lease expired and another worker claimed the partition
+    current = queue.claim("job", "w2")
+
+    assert queue.complete(stale, {"saved": 1}) is False
+    assert queue.release(stale, {"name": "a", "config": {"checkpoint": {}}}) is False
+    assert queue.fail(stale, "boom") is False
+    assert queue.counts("job")[RUNNING] == 1
+
+    assert queue.complete(current, {"saved": 2}) is True
+    assert queue.counts("job")[DONE] == 1
+
+
+class FakeDatabase:
+    def __init__(self, rowcount):
+        self.rowcount = rowcount
+        self.updates = []
+        self.queries = []
+
+    def execute_update(self, query, params=None):
+        self.updates.append((query, params))
+        return self.rowcount
+
+    def execute_query(self, query, params=None):
+        self.queries.append((query, params))
+        return []
+
+
+def test_postgres_queue_updates_only_the_current_claim():
+    database = FakeDatabase(rowcount=0)
+    queue = PostgresWorkQueue(database=database)
+    partition = Partition("job", 7, {"name": "a"}, attempts=2, worker="w1")
+
+    assert queue.complete(partition, {"saved": 1}) is False
+    assert queue.release(partition, {"name": "a"}) is False
+    for _, params in database.updates:
+        assert params[-3:] == (7, "w1", 2)
+
+    database.rowcount = 1
+    assert queue.fail(partition, "boom") is True
+
+
+def test_postgres_queue_fails_expired_claims_at_max_attempts():
+    database = FakeDatabase(rowcount=1)
+    queue = PostgresWorkQueue(database=database, lease=60, max_attempts=3)
+    queue._table_ready = True
+
+    assert queue.claim("job", "w1") is None
+
+    [(_, params)] = database.updates
+    assert params[0].adapted == {"error": LEASE_EXPIRED_ERROR}
+    assert params[1:] == ("job", 3, 60)
+    # Expired claims are only taken over below max_attempts
+    [(_, params)] = database.queries
+    assert params == ("w1", "job", 3, 60)
+
+
+def test_plan_and_worker_import_every_partition(tmp_path):
+    queue = FileWorkQueue(str(tmp_path / "queue.json"))
+
+    planned = plan([numbers_job(tmp_path)], queue)
+    result = Worker(queue, "w1").run(["numbers"])
+
+    assert planned["summary"]["partitions"] == 4
+    assert result["status"] == "success"
+    assert list(result["results"]) == ["numbers#0", "numbers#1", "numbers#2", "numbers#3"]
+    assert result["summary"]["queue"]["numbers"][DONE] == 4
+    assert result["continuation"] is None
+    assert saved_numbers(tmp_path) == list(range(10))
+
+
+def test_worker_releases_partition_stopped_at_deadline(tmp_path):
+    queue = FileWorkQueue(str(tmp_path / "queue.json"))
+    # The stop margin exceeds the time left, so every run stops after one chunk
+    plan([numbers_job(tmp_path, chunk_size=2, stop_margin=3600)], queue)
+
+    result = Worker(queue, "w1", remaining_ms=lambda: 600000, time_margin_ms=0).run(["numbers"])
+
+    assert result["status"] == "incomplete"
+    assert result["results"]["numbers#0"]["status"] == "incomplete"
+    assert result["continuation"] == ["numbers"]
+    partition = queue.claim("numbers", "w2")
+    assert partition.attempts == 1
+    assert partition.spec["config"]["checkpoint"]["position"] == {"next": 2}
+
+    Worker(queue, "w2").orchestrator.run([ImportJob.from_spec(partition.spec)])
+    assert saved_numbers(tmp_path) == [0, 1, 2]
+
+
+def test_worker_keeps_claim_of_partition_still_running(tmp_path):
+    queue = FileWorkQueue(str(tmp_path / "queue.json"))
+    queue.enqueue("slow", [{"name": "slow#0", "importer": "test_memory", "config": {"sleep": 0.5}}])
+    deadline = time.monotonic() + 0.2
+    remaining_ms = lambda: (deadline - time.monotonic()) * 1000
+
+    result = Worker(queue, "w1", remaining_ms=remaining_ms, time_margin_ms=150).run(["slow"])
+
+    assert result["results"]["slow#0"]["status"] == "running"
+    # Not released: no other worker imports it while the thread is still writing
+    assert queue.counts("slow")[RUNNING] == 1
+    assert queue.claim("slow", "w2") is None
+    for thread in threading.enumerate():
+        if thread.name.startswith("importer"):
+            thread.join()
+
+
+def test_worker_marks_partition_failed_after_max_attempts(tmp_path):
+    queue = FileWorkQueue(str(tmp_path / "queue.json"), max_attempts=2)
+    plan([numbers_job(tmp_path, end=3, fail=True)], queue)
+
+    result = Worker(queue, "w1").run(["numbers"])
+
+    assert result["status"] == "partial"
+    assert result["results"]["numbers#0"]["status"] == FAILED
+    assert result["summary"]["queue"]["numbers"][FAILED] == 1
+
+
+def test_run_workers_shares_the_queue_between_processes(tmp_path):
+    queue = FileWorkQueue(str(tmp_path / "queue.json"))
+    plan([numbers_job(tmp_path, end=40, size=2)], queue)
+
+    results = run_workers(["numbers"], 2, queue, modules=[__name__])
+
+    assert sum(result["summary"]["partitions"] for result in results) == 20
+    assert saved_numbers(tmp_path) == list(range(40))
+
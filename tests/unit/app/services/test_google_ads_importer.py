@@ -0,0 +1,255 @@
+"""Tests for the sharded Google Ads report importer against a local fake report server."""
+import threading
+import time
+from datetime import date, timedelta
+
+from app.services import google_ads_importer
+from app.services.google_ads_importer import SHARD_NAMESPACE, GoogleAdsReportImporter, plan_shards
+from app.services.state_store import FileStateStore
+
+START = date(2024, 1, 1)
+CAMPAIGNS = 3
+
+
+def report_handler(page_size=2, fail=None):
+    """Daily rows per campaign for POST "{customer}/report" {"query": "<start>..<end>"}, paged by pageToken."""
+    def handler(path, query, headers, body):
+        customer_id = path.split("/")[2]
+        start, end = (date.fromisoformat(value) for value in body["query"].split(".."))
+        offset = int(body.get("pageToken", 0))
+        if fail and fail(customer_id, start, offset):
+            return 400, {}, {"error": "bad request"}
+        rows = []
+        day = start
+        while day <= end:
+            for campaign in range(CAMPAIGNS):
+                rows.append({
+                    "customer": {"id": customer_id},
+                    "campaign": {"id": str(campaign), "name": f"Campaign {campaign}"},
+                    "segments": {"date": day.isoformat()},
+                    "metrics": {"impressions": "100", "clicks": "7", "costMicros": "1500000"},
+                })
+            day += timedelta(days=1)
+        page = {"results": rows[offset:offset + page_size]}
+        if offset + page_size < len(rows):
+            page["nextPageToken"] = str(offset + page_size)
+        return 200, {}, page
+    return handler
+
+
+class MemoryImporter(GoogleAdsReportImporter):
+    def __init__(self, config):
+        super().__init__(config)
+        self.saved = []
+        self.lock = threading.Lock()
+
+    def save_data(self, data):
+        with self.lock:
+            self.saved.extend(data)
+        return True
+
+
+def make_importer(server, tmp_path, importer_class=MemoryImporter, **config):
+    return importer_class({
+        "report_url": server.url + "/customers/{customer_id}/report",
+        "customer_ids": ["123-456-7890", "555"],
+        "start_date": "2024-01-01",
+        "end_date": "2024-01-10",
+        "shard_days": 4,
+        "query": "{start_date}..{end_date}",
+        "max_retries": 0,
+        "shard_backoff": 0,
+        "state_store": FileStateStore(str(tmp_path / "state.json")),
+        **config,
+    })
+
+
+def test_plan_shards_splits_accounts_and_dates():
+    shards = plan_shards(["123-456-7890", 555], START, date(2024, 1, 10), days=4)
+
+    assert [shard.id for shard in shards[:3]] == [
+        "1234567890:2024-01-01:2024-01-04",
+        "1234567890:2024-01-05:2024-01-08",
+        "1234567890:2024-01-09:2024-01-10",
+    ]
+    assert len(shards) == 6
+
+
+def test_plan_partitions_has_one_partition_per_shard(stub_http_server, tmp_path):
+    server = stub_http_server(report_handler())
+    importer = make_importer(server, tmp_path)
+
+    partitions = importer.plan_partitions()
+
+    assert partitions[:2] == [
+        {"customer_ids": ["1234567890"], "start_date": "2024-01-01", "end_date": "2024-01-04"},
+        {"customer_ids": ["1234567890"], "start_date": "2024-01-05", "end_date": "2024-01-08"},
+    ]
+    # Each partition's config plans exactly its own shard
+    assert [shard.id for partition in partitions for shard in make_importer(server, tmp_path, **partition).shards] == [
+        shard.id for shard in importer.shards
+    ]
+
+
+def test_imports_all_shards_in_parallel(stub_http_server, tmp_path):
+    server = stub_http_server(report_handler())
+    importer = make_importer(server, tmp_path, shard_workers=3)
+
+    result = importer.run()
+
+    assert result["status"] == "success"
+    assert result["stats"]["shards"] == {"total": 6, "skipped": 0, "done": 6, "failed": 0}
+    assert len(importer.saved) == len({(r.customer_id, r.campaign_id, r.date) for r in importer.saved}) == 2 * 10 * CAMPAIGNS
+    assert importer.saved[0].cost_micros == 1500000
+    assert {request["method"] for request in server.requests} == {"POST"}
+    # One first page per shard: its account and date window
+    first_pages = sorted((r["path"], r["body"]["query"]) for r in server.requests if "pageToken" not in r["body"])
+    assert first_pages == sorted(
+        (f"/customers/{shard.customer_id}/report", f"{shard.start}..{shard.end}") for shard in importer.shards
+    )
+    # Progress is only kept while the import is unfinished
+    assert importer.state_store.get(SHARD_NAMESPACE, importer.state_key) is None
+
+
+def test_failed_shard_is_retried_and_rerun_alone(stub_http_server, tmp_path):
+    attempts = {"count": 0}
+    broken = {"on": True}
+
+    def fail(customer_id, start, offset):
+        if customer_id == "555" and start == date(2024, 1, 5) and offset == 0:
+            attempts["count"] += 1
+            return broken["on"]
+        return False
+
+    server = stub_http_server(report_handler(fail=fail))
+    importer = make_importer(server, tmp_path, shard_retries=1)
+
+    result = importer.run()
+
+    assert result["status"] == "partial"
+    assert attempts["count"] == 2
+    assert result["stats"]["shards"]["failed"] == 1
+    state = importer.state_store.get(SHARD_NAMESPACE, importer.state_key)
+    assert state["555:2024-01-05:2024-01-08"]["status"] == "failed"
+
+    broken["on"] = False
+    server.requests.clear()
+    rerun = make_importer(server, tmp_path)
+    result = rerun.run()
+
+    assert result["status"] == "success"
+    assert result["stats"]["shards"] == {"total": 6, "skipped": 5, "done": 1, "failed": 0}
+    assert {request["body"]["query"] for request in server.requests} == {"2024-01-05..2024-01-08"}
+    assert len(rerun.saved) == 4 * CAMPAIGNS
+    assert rerun.state_store.get(SHARD_NAMESPACE, rerun.state_key) is None
+
+
+def test_transient_shard_failure_succeeds_on_retry(stub_http_server, tmp_path):
+    failures = {"left": 1}
+
+    def fail(customer_id, start, offset):
+        if customer_id == "1234567890" and start == START and failures["left"]:
+            failures["left"] -= 1
+            return True
+        return False
+
+    server = stub_http_server(report_handler(fail=fail))
+    importer = make_importer(server, tmp_path)
+
+    result = importer.run()
+
+    assert result["status"] == "success"
+    assert result["stats"]["shard_retries"] == 1
+    assert len(importer.saved) == 2 * 10 * CAMPAIGNS
+
+
+def test_pages_are_posted_with_the_next_page_token(stub_http_server, tmp_path):
+    server = stub_http_server(report_handler(page_size=5))
+    importer = make_importer(server, tmp_path, customer_ids=["555"], end_date="2024-01-02", body={"pageSize": 5})
+
+    importer.run()
+
+    assert [request["body"] for request in server.requests] == [
+        {"pageSize": 5, "query": "2024-01-01..2024-01-02"},
+        {"pageSize": 5, "query": "2024-01-01..2024-01-02", "pageToken": "5"},
+    ]
+    assert server.requests[0]["headers"]["Content-Type"] == "application/json"
+
+
+def test_resumes_only_shards_not_done(stub_http_server, tmp_path):
+    server = stub_http_server(report_handler())
+    importer = make_importer(server, tmp_path)
+    done = {shard.id: {"status": "done", "rows": 12} for shard in importer.shards[1:]}
+    importer.state_store.set(SHARD_NAMESPACE, importer.state_key, done)
+
+    result = importer.run()
+
+    assert result["stats"]["shards"] == {"total": 6, "skipped": 5, "done": 1, "failed": 0}
+    assert {request["body"]["query"] for request in server.requests} == {"2024-01-01..2024-01-04"}
+
+
+def test_retry_counts_the_shard_once(stub_http_server, tmp_path):
+    failures = {"left": 1}
+
+    def fail(customer_id, start, offset):
+        # The second page fails once, after the first one was saved
+        if customer_id == "555" and start == START and offset == 2 and failures["left"]:
+            failures["left"] -= 1
+            return True
+        return False
+
+    server = stub_http_server(report_handler(fail=fail))
+    dedup = {"key": ["customer_id", "campaign_id", "date"], "keep": "first"}
+    importer = make_importer(server, tmp_path, chunk_size=2, dedup=dedup)
+
+    result = importer.run()
+
+    stats = result["stats"]
+    assert stats["shard_retries"] == 1
+    # The retry saves the first page again, not as duplicates of the failed attempt
+    assert stats["fetched"] == stats["saved"] == 2 * 10 * CAMPAIGNS
+    assert stats.get("duplicates", 0) == 0
+    assert stats["chunks"] == len(stats["chunk_stats"]) == 2 * 10 * CAMPAIGNS // 2
+
+
+def test_no_retry_without_time_for_the_backoff(stub_http_server, tmp_path):
+    attempts = {"count": 0}
+
+    def fail(customer_id, start, offset):
+        if customer_id == "555" and start == START:
+            attempts["count"] += 1
+            return True
+        return False
+
+    server = stub_http_server(report_handler(fail=fail))
+    importer = make_importer(server, tmp_path, shard_backoff=60, stop_margin=0, deadline=time.time() + 30)
+
+    started = time.monotonic()
+    result = importer.run()
+
+    assert time.monotonic() - started < 10
+    assert attempts["count"] == 1
+    assert result["stats"]["shards"]["failed"] == 1
+    assert "shard_retries" not in result["stats"]
+
+
+def test_retry_takes_back_upsert_counts(stub_http_server, tmp_path, monkeypatch):
+    failures = {"left": 1}
+
+    def fail(customer_id, start, offset):
+        if customer_id == "555" and start == START and offset == 2 and failures["left"]:
+            failures["left"] -= 1
+            return True
+        return False
+
+    def upsert_many(table, columns, rows, conflict_columns):
+        return {"inserted": len(rows), "updated": 0, "skipped": 0}
+
+    monkeypatch.setattr(google_ads_importer.db_manager, "upsert_many", upsert_many)
+    server = stub_http_server(report_handler(fail=fail))
+    importer = make_importer(server, tmp_path, GoogleAdsReportImporter, chunk_size=2, use_copy=False)
+
+    stats = importer.run()["stats"]
+
+    assert stats["shard_retries"] == 1
+    assert stats["inserted"] == stats["saved"] == 2 * 10 * CAMPAIGNS
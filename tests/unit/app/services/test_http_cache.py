@@ -0,0 +1,95 @@
+"""Tests for the conditional-request HTTP cache and its use by the API importer."""
+import time
+
+from app.services.http_cache import CachedResponse, FileHttpCache
+from examples.example_api_importer import APIImporter
+
+
+class MemoryAPIImporter(APIImporter):
+    def __init__(self, config, fail_save=False):
+        super().__init__(config)
+        self.saved = []
+        self.fail_save = fail_save
+
+    def save_data(self, data):
+        if self.fail_save:
+            return False
+        self.saved.extend(data)
+        return True
+
+
+def etag_handler(pages):
+    """Serve {"data": records} per page with an ETag per page version, answering 304 when it matches."""
+    def handler(path, query, headers):
+        page = int(query.get("page", 1))
+        records, version = pages.get(page, ([], "empty"))
+        etag = f'"{page}-{version}"'
+        if headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        return 200, {"ETag": etag, "Content-Type": "application/json"}, {"data": records}
+    return handler
+
+
+def records(*ids):
+    return [{"id": str(i), "name": f"name-{i}", "email": f"u{i}@x.com"} for i in ids]
+
+
+def test_unchanged_resource_skips_the_import(stub_http_server, tmp_path):
+    server = stub_http_server(etag_handler({1: (records(1, 2), "v1")}))
+    config = {"api_url": server.url, "http_cache": {"backend": "file", "directory": str(tmp_path)}}
+
+    first = MemoryAPIImporter(config)
+    first.run()
+    second = MemoryAPIImporter(config)
+    result = second.run()
+
+    assert len(first.saved) == 2
+    assert second.saved == []
+    assert result["stats"]["not_modified"] is True
+    assert result["stats"]["http"]["cache_hits"] == 1
+    assert server.requests[1]["headers"]["If-None-Match"] == '"1-v1"'
+
+
+def test_failed_import_does_not_commit_the_cache(stub_http_server, tmp_path):
+    server = stub_http_server(etag_handler({1: (records(1), "v1")}))
+    config = {"api_url": server.url, "http_cache": {"backend": "file", "directory": str(tmp_path)}}
+
+    MemoryAPIImporter(config, fail_save=True).run()
+    retry = MemoryAPIImporter(config)
+    retry.run()
+
+    assert "If-None-Match" not in server.requests[1]["headers"]
+    assert len(retry.saved) == 1
+
+
+def test_paged_import_skips_only_unchanged_pages(stub_http_server, tmp_path):
+    pages = {1: (records(1, 2), "v1"), 2: (records(3, 4), "v1"), 3: (records(5), "v1")}
+    server = stub_http_server(etag_handler(pages))
+    config = {
+        "api_url": server.url,
+        "pagination": {"type": "page", "page_size": 2},
+        "max_workers": 1,
+        "http_cache": {"backend": "file", "directory": str(tmp_path)},
+    }
+    MemoryAPIImporter(config).run()
+
+    pages[2] = (records(3, 40), "v2")
+    second = MemoryAPIImporter(config)
+    result = second.run()
+
+    assert [record[0] for record in second.saved] == ["3", "40"]
+    assert result["stats"]["http"]["cache_hits"] == 2
+
+
+def test_file_cache_evicts_expired_and_oldest_entries(tmp_path):
+    cache = FileHttpCache(str(tmp_path), ttl=60, max_bytes=10)
+    cache.put("old", CachedResponse(b"123456", etag="a", stored_at=time.time() - 120))
+    cache.put("first", CachedResponse(b"123456", etag="b"))
+    cache.commit(["first"])
+    cache.put("second", CachedResponse(b"123456", etag="c"))
+    cache.commit(["second"])
+
+    assert cache.get("old") is None
+    assert cache.get("first") is None
+    assert cache.get("second").committed
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["second.body", "second.json"]
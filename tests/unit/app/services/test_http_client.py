@@ -0,0 +1,94 @@
+"""Tests for the retrying HTTP client."""
+import threading
+import time
+
+import pytest
+import requests
+
+from app.services.http_client import HttpClient, TokenBucket, parse_retry_after
+from examples.example_api_importer import APIImporter
+
+
+def flaky_handler(failures, status=503, headers=None):
+    calls = {"count": 0}
+
+    def handler(path, query, request_headers):
+        calls["count"] += 1
+        if calls["count"] <= failures:
+            return status, headers or {}, {"error": "try again"}
+        return 200, {}, {"data": [{"id": 1}]}
+
+    return handler
+
+
+def test_retries_transient_errors(stub_http_server):
+    server = stub_http_server(flaky_handler(2))
+    client = HttpClient(backoff_base=0.01)
+
+    assert client.get_json(server.url) == {"data": [{"id": 1}]}
+    stats = client.get_stats()
+    assert stats["requests"] == 3
+    assert stats["retries"] == 2
+    assert stats["failures"] == 0
+
+
+def test_honours_retry_after_on_429(stub_http_server):
+    server = stub_http_server(flaky_handler(1, status=429, headers={"Retry-After": "0.2"}))
+    client = HttpClient(backoff_base=10)
+
+    started = time.monotonic()
+    client.get_json(server.url)
+
+    assert 0.2 <= time.monotonic() - started < 5
+    assert client.get_stats()["throttled"] == 1
+
+
+def test_gives_up_after_max_retries(stub_http_server):
+    server = stub_http_server(flaky_handler(10))
+    client = HttpClient(max_retries=2, backoff_base=0.01)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.get(server.url)
+    assert len(server.requests) == 3
+    assert client.get_stats()["failures"] == 1
+
+
+def test_does_not_retry_client_errors(stub_http_server):
+    server = stub_http_server(flaky_handler(10, status=404))
+    client = HttpClient(backoff_base=0.01)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.get(server.url)
+    assert len(server.requests) == 1
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("not a date") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_token_bucket_limits_shared_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+    started = time.monotonic()
+
+    threads = [threading.Thread(target=lambda: [bucket.acquire() for _ in range(5)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 20 tokens at 50/s with a burst of 1 take at least ~0.38s
+    assert time.monotonic() - started >= 0.35
+
+
+def test_api_importer_reports_failure_instead_of_empty_import(stub_http_server):
+    server = stub_http_server(flaky_handler(10))
+    importer = APIImporter({"api_url": server.url, "max_retries": 1, "backoff_base": 0.01})
+
+    result = importer.run()
+
+    assert result["status"] == "partial"
+    assert result["stats"]["errors"] == 1
+    assert result["stats"]["http"]["retries"] == 1
@@ -0,0 +1,88 @@
+"""Tests for incremental JSON parsing and streamed API imports."""
+import json
+
+import pytest
+
+from app.services.http_client import HttpClient
+from app.services.json_stream import JSONStream
+from examples.example_api_importer import APIImporter
+
+RECORDS = [{"id": i, "name": f"café {i}", "score": 12345 + i, "tags": [1, 2.5, None, True]} for i in range(25)]
+
+
+def chunked(text, size):
+    data = text.encode("utf-8")
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 16, 1 << 20])
+@pytest.mark.parametrize("body", [
+    json.dumps(RECORDS),
+    json.dumps({"total": 25, "data": RECORDS, "next": None}, indent=2),
+    "\n".join(json.dumps(record) for record in RECORDS) + "\n",
+])
+def test_parses_records_across_chunk_boundaries(body, size):
+    batches = list(JSONStream(chunked(body, size)).iter_batches(10))
+
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    assert [record for batch in batches for record in batch] == RECORDS
+
+
+def test_numbers_split_between_chunks_are_not_truncated():
+    assert list(JSONStream([b"[1, 23", b"45, 6", b"7]"]).iter_records()) == [1, 2345, 67]
+
+
+def test_object_without_records_key_has_no_records():
+    assert list(JSONStream([b'{"results": [1, 2]}']).iter_records()) == []
+    assert list(JSONStream([b'{"results": [1, 2]}'], records_key="results").iter_records()) == [1, 2]
+
+
+def test_rejects_truncated_and_trailing_data():
+    with pytest.raises(ValueError):
+        list(JSONStream([b'[{"id": 1}, {"id"']).iter_records())
+    with pytest.raises(ValueError):
+        list(JSONStream([b"[1, 2] 3"]).iter_records())
+
+
+class MemoryAPIImporter(APIImporter):
+    def __init__(self, config):
+        super().__init__(config)
+        self.saved = []
+
+    def save_data(self, data):
+        self.saved.append(list(data))
+        return True
+
+
+def test_api_importer_streams_ndjson_in_chunks(stub_http_server):
+    body = "\n".join(json.dumps({**record, "email": "A@B.COM"}) for record in RECORDS)
+    server = stub_http_server(lambda path, query, headers: (200, {"Content-Type": "application/x-ndjson"}, body))
+    importer = MemoryAPIImporter({"api_url": server.url, "chunk_size": 10})
+
+    result = importer.run()
+
+    assert result["status"] == "success"
+    assert [len(chunk) for chunk in importer.saved] == [10, 10, 5]
+    assert result["stats"]["http"]["bytes"] == len(body.encode("utf-8"))
+    row = importer.saved[0][0]
+    assert row.email == "a@b.com"
+    # The metadata column holds valid JSON of the original record
+    assert json.loads(row.metadata)["name"] == "café 0"
+
+
+def test_stream_json_counts_retries_before_the_body(stub_http_server):
+    calls = []
+
+    def handler(path, query, headers):
+        calls.append(path)
+        if len(calls) == 1:
+            return 503, {}, b""
+        return 200, {"Content-Type": "application/json"}, {"data": RECORDS}
+
+    server = stub_http_server(handler)
+    client = HttpClient(max_retries=1, backoff_base=0.01)
+
+    records = [record for batch in client.stream_json(server.url) for record in batch]
+
+    assert records == RECORDS
+    assert client.get_stats()["retries"] == 1
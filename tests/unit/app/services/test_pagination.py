@@ -0,0 +1,162 @@
+"""Tests for paginated fetching against a local stub HTTP server."""
+import threading
+import time
+
+from app.services.http_client import HttpClient
+from app.services.pagination import (
+    CursorPagination,
+    OffsetPagination,
+    PageNumberPagination,
+    fetch_pages,
+    pagination_from_config,
+)
+from examples.example_api_importer import APIImporter
+
+RECORDS = [{"id": i, "name": f"name-{i}", "email": f"User{i}@Example.com"} for i in range(23)]
+
+
+def page_handler(page_size, delay=0.0):
+    def handler(path, query, headers):
+        time.sleep(delay)
+        page = int(query.get("page", 1))
+        start = (page - 1) * page_size
+        return 200, {}, {"data": RECORDS[start:start + page_size]}
+    return handler
+
+
+def collect_ids(pages):
+    return sorted(record["id"] for page in pages for record in page)
+
+
+def test_page_number_pagination_fetches_all_pages(stub_http_server):
+    server = stub_http_server(page_handler(5))
+    pages = list(fetch_pages(HttpClient(), server.url, PageNumberPagination(page_size=5), max_workers=3))
+
+    assert collect_ids(pages) == list(range(23))
+    # 5 pages of data; at most max_workers - 1 extra speculative requests
+    assert 5 <= len(server.requests) <= 7
+
+
+def test_page_number_pagination_runs_concurrently(stub_http_server):
+    in_flight = {"current": 0, "max": 0}
+    lock = threading.Lock()
+    fetch_page = page_handler(5)
+
+    def handler(path, query, headers):
+        with lock:
+            in_flight["current"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["current"])
+        time.sleep(0.05)
+        with lock:
+            in_flight["current"] -= 1
+        return fetch_page(path, query, headers)
+
+    server = stub_http_server(handler)
+    pages = list(fetch_pages(HttpClient(), server.url, PageNumberPagination(page_size=5), max_workers=4))
+
+    assert collect_ids(pages) == list(range(23))
+    assert in_flight["max"] > 1
+
+
+def test_page_number_pagination_uses_reported_total(stub_http_server):
+    def handler(path, query, headers):
+        page = int(query["page"])
+        return 200, {}, {"data": RECORDS[(page - 1) * 10:page * 10], "total_pages": 3}
+
+    server = stub_http_server(handler)
+    strategy = PageNumberPagination(page_size=10, total_key="total_pages")
+    pages = list(fetch_pages(HttpClient(), server.url, strategy, max_workers=8))
+
+    assert collect_ids(pages) == list(range(23))
+    assert sorted(int(r["query"]["page"]) for r in server.requests)[-1] <= 8
+
+
+def test_offset_pagination(stub_http_server):
+    def handler(path, query, headers):
+        offset, limit = int(query["offset"]), int(query["limit"])
+        return 200, {}, RECORDS[offset:offset + limit]
+
+    server = stub_http_server(handler)
+    pages = list(fetch_pages(HttpClient(), server.url, OffsetPagination(page_size=10)))
+
+    assert collect_ids(pages) == list(range(23))
+
+
+def test_cursor_and_next_link_pagination(stub_http_server):
+    def handler(path, query, headers):
+        start = int(query.get("cursor", 0))
+        body = {"data": RECORDS[start:start + 10]}
+        if start + 10 < len(RECORDS):
+            body["next_cursor"] = str(start + 10)
+            body["next"] = f"{server.url}/items?cursor={start + 10}"
+        return 200, {}, body
+
+    server = stub_http_server(handler)
+    cursor_pages = list(fetch_pages(HttpClient(), server.url, CursorPagination()))
+    link_pages = list(fetch_pages(HttpClient(), server.url, CursorPagination(next_url_key="next")))
+
+    assert [len(page) for page in cursor_pages] == [10, 10, 3]
+    assert collect_ids(link_pages) == list(range(23))
+
+
+def test_pagination_from_config():
+    strategy = pagination_from_config({"type": "offset", "page_size": 50})
+    assert isinstance(strategy, OffsetPagination)
+    assert strategy.params_for(2) == {"offset": 100, "limit": 50}
+
+
+def test_api_importer_streams_pages(stub_http_server):
+    server = stub_http_server(page_handler(5))
+    saved = []
+
+    class RecordingImporter(APIImporter):
+        def save_data(self, data):
+            saved.append(data)
+            return True
+
+    importer = RecordingImporter({
+        "api_url": server.url,
+        "pagination": {"type": "page", "page_size": 5},
+        "max_workers": 2,
+    })
+    result = importer.run()
+
+    assert result["status"] == "success"
+    assert result["stats"]["saved"] == 23
+    assert result["stats"]["chunks"] == 5
+    assert sorted(row[0] for page in saved for row in page) == list(range(23))
+
+
+def test_fetch_pages_reports_and_resumes_position(stub_http_server):
+    server = stub_http_server(page_handler(5))
+    progress = {}
+    pages = fetch_pages(HttpClient(), server.url, PageNumberPagination(page_size=5), max_workers=1, progress=progress)
+    first = next(pages)
+    assert progress == {"page": 0}
+    next(pages)
+    assert progress == {"page": 1}
+    pages.close()
+
+    rest = list(fetch_pages(HttpClient(), server.url, PageNumberPagination(page_size=5), start=progress))
+    assert collect_ids([first] + rest) == list(range(23))
+
+
+def test_cursor_pagination_resumes_from_next_request(stub_http_server):
+    def handler(path, query, headers):
+        start = int(query.get("cursor", 0))
+        body = {"data": RECORDS[start:start + 10]}
+        if start + 10 < len(RECORDS):
+            body["next_cursor"] = str(start + 10)
+        return 200, {}, body
+
+    server = stub_http_server(handler)
+    progress = {}
+    pages = fetch_pages(HttpClient(), server.url, CursorPagination(), params={"q": "x"}, progress=progress)
+    next(pages)
+    next(pages)
+    pages.close()
+    assert progress == {"url": server.url, "params": {"q": "x", "cursor": "10"}}
+
+    rest = list(fetch_pages(HttpClient(), server.url, CursorPagination(), start=progress, progress=progress))
+    assert collect_ids(rest) == list(range(10, 23))
+    assert progress["url"] is None
@@ -0,0 +1,64 @@
+"""Tests for range-split parallel CSV parsing."""
+import csv
+
+from app.services.parallel_csv import ParallelCSVReader, parse_range, read_header, split_ranges
+from examples.example_csv_importer import CSVImporter
+
+
+def write_csv(path, count):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["ID", "Name", "Email", "Status"])
+        for i in range(count):
+            # Every third name spans two lines to exercise quote tracking
+            name = f"name {i}\nsecond line" if i % 3 == 0 else f"name {i}"
+            writer.writerow([i, name, f"user{i}@example.com", "active"])
+    return str(path)
+
+
+def test_split_ranges_respects_quoted_newlines(tmp_path):
+    path = write_csv(tmp_path / "data.csv", 200)
+
+    header_end, ranges = split_ranges(path, range_size=256)
+    rows = [row for start, end in ranges for row in parse_range(path, start, end)]
+
+    assert len(ranges) > 5
+    assert ranges[0][0] == header_end
+    assert all(prev[1] == nxt[0] for prev, nxt in zip(ranges, ranges[1:]))
+    assert read_header(path) == ("ID", "Name", "Email", "Status")
+    assert [row[0] for row in rows] == [str(i) for i in range(200)]
+    assert rows[3][1] == "name 3\nsecond line"
+
+
+class RecordingCSVImporter(CSVImporter):
+    def save_data(self, data):
+        self.stats.setdefault("batches", []).append([row[0] for row in data])
+        self.stats["offset"] = self.source.offset
+        return True
+
+
+def test_parallel_importer_matches_sequential(tmp_path):
+    path = write_csv(tmp_path / "data.csv", 300)
+    config = {"file_path": path, "parallel_workers": 2, "range_size": 512}
+
+    result = RecordingCSVImporter(config).run()
+
+    saved = [external_id for batch in result["stats"]["batches"] for external_id in batch]
+    assert saved == [str(i) for i in range(300)]
+    assert result["stats"]["saved"] == 300
+    assert result["stats"]["chunks"] > 1
+    assert result["stats"]["offset"] == (tmp_path / "data.csv").stat().st_size
+
+
+def test_parallel_reader_unordered_and_resume(tmp_path):
+    path = write_csv(tmp_path / "data.csv", 100)
+    _, ranges = split_ranges(path, range_size=256)
+    resume_at = ranges[2][0]
+
+    reader = ParallelCSVReader(
+        path, CSVImporter, {"file_path": path}, workers=2, ordered=False, range_size=256, start_offset=resume_at
+    )
+    ids = sorted(int(row[0]) for *_, transformed, _ in reader.iter_results() for row in transformed)
+
+    skipped = sum(len(parse_range(path, start, end)) for start, end in ranges[:2])
+    assert ids == list(range(skipped, 100))
@@ -0,0 +1,109 @@
+"""Tests for the bounded pipeline and the importer's pipeline mode."""
+import threading
+import time
+
+import pytest
+
+from app.services.pipeline import Pipeline
+from tests.unit.app.services.test_base_importer import MemoryImporter, make_records
+
+
+def test_pipeline_runs_stages_and_bounds_queues():
+    produced = []
+    saved = []
+
+    def source():
+        for i in range(20):
+            produced.append(i)
+            yield [i]
+
+    def slow_save(item):
+        time.sleep(0.005)
+        # Two full queues, one item per stage and one waiting to be queued
+        assert len(produced) - len(saved) <= 2 * 2 + 3
+        saved.extend(item)
+
+    metrics = Pipeline(("fetch", source()), [("double", lambda item: [item[0] * 2]), ("save", slow_save)]).run()
+
+    assert saved == [i * 2 for i in range(20)]
+    assert metrics["stages"]["save"]["records"] == 20
+    assert metrics["queues"]["fetch->double"]["max_depth"] <= 2
+
+
+def test_pipeline_failure_cancels_other_stages():
+    closed = threading.Event()
+
+    def source():
+        try:
+            for i in range(1000):
+                yield [i]
+        finally:
+            closed.set()
+
+    def failing(item):
+        if item[0] == 3:
+            raise RuntimeError("boom")
+        return item
+
+    with pytest.raises(RuntimeError, match="boom"):
+        Pipeline(("fetch", source()), [("transform", failing), ("save", lambda item: None)]).run()
+    assert closed.is_set()
+
+
+class PipelineImporter(MemoryImporter):
+    def save_data(self, data):
+        if any(record["id"] == 7 for record in data):
+            raise ValueError("bad chunk")
+        return super().save_data(data)
+
+
+def test_importer_pipeline_mode():
+    importer = MemoryImporter(make_records(10), config={"mode": "pipeline", "chunk_size": 3})
+    result = importer.run()
+
+    assert result["status"] == "success"
+    assert result["stats"]["saved"] == 10
+    assert result["stats"]["chunks"] == 4
+    assert set(result["stats"]["pipeline"]["stages"]) == {"fetch", "transform", "save"}
+
+
+def test_importer_pipeline_error_is_counted():
+    importer = PipelineImporter(make_records(10), config={"mode": "pipeline", "chunk_size": 3})
+    result = importer.run()
+
+    assert result["stats"]["errors"] == 1
+    assert result["stats"]["saved"] <= 6
+    assert "pipeline" in result["stats"]
+
+
+class ErrorCountingImporter(MemoryImporter):
+    """Every chunk has one bad record and fails to save; a chunk is transformed while the previous one fails."""
+
+    def __init__(self, records, config):
+        super().__init__(records, config)
+        self.save_failed = [threading.Event() for _ in range(4)]
+
+    def transform_data(self, data):
+        index = data[0]["id"] // 3
+        if index:
+            self.save_failed[index - 1].wait(1)
+        self.count_transform_errors(1)
+        return super().transform_data(data)
+
+    def save_data(self, data):
+        return False
+
+    def _save_chunk(self, data, chunk_stats):
+        try:
+            return super()._save_chunk(data, chunk_stats)
+        finally:
+            self.save_failed[chunk_stats["chunk"]].set()
+
+
+def test_importer_pipeline_charges_errors_to_their_chunk():
+    importer = ErrorCountingImporter(make_records(12), config={"mode": "pipeline", "chunk_size": 3})
+    result = importer.run()
+
+    # One transform error and one save error per chunk
+    assert [chunk["errors"] for chunk in result["stats"]["chunk_stats"]] == [2, 2, 2, 2]
+    assert result["stats"]["errors"] == 8
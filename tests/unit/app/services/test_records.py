@@ -0,0 +1,39 @@
+"""Tests for compact record types."""
+import pickle
+
+import pytest
+
+from app.services.database import _CopyStream
+from app.services.records import define_record
+from app.services.transform import Column, ColumnMapping
+
+
+def test_define_record_is_compact_and_dict_like():
+    Customer = define_record("Customer", ["external_id", "email"])
+    record = Customer("1", "a@example.com")
+
+    assert define_record("Customer", ("external_id", "email")) is Customer
+    assert not hasattr(record, "__dict__")
+    assert record == ("1", "a@example.com")
+    assert record.email == record.get("email") == "a@example.com"
+    assert record.get("missing", 0) == 0
+    # Tuple methods and helpers are not fields
+    assert record.get("count") is None
+    assert record.get("_asdict", "none") == "none"
+
+
+def test_define_record_rejects_a_get_column():
+    with pytest.raises(ValueError):
+        define_record("Broken", ["id", "get"])
+
+
+def test_records_pickle_and_feed_copy_directly():
+    mapping = ColumnMapping([Column("external_id", source="id"), Column("name", default="")], name="Item")
+    records, _ = mapping.apply([{"id": 1, "name": "a,b"}, {"id": 2}])
+
+    restored = pickle.loads(pickle.dumps(records))
+    stream = _CopyStream(records)
+
+    assert type(restored[0]) is mapping.record_type
+    assert restored[1].name == ""
+    assert stream.read(1024) == '"1","a,b"\n"2",""\n'
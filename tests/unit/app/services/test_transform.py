@@ -0,0 +1,51 @@
+"""Tests for the column-mapping transform."""
+from app.services.transform import Column, ColumnMapping
+
+MAPPING = ColumnMapping([
+    Column("external_id", source="id", ops=("int",)),
+    Column("name", ops=("strip",), default=""),
+    Column("email", source=("email", "mail"), ops=("strip", "lower")),
+    Column("status", default="active"),
+    Column("label", func=lambda record: f"{record['name']}#{record['id']}"),
+])
+
+
+def test_apply_dict_records():
+    rows, failures = MAPPING.apply([
+        {"id": "1", "name": " Alice ", "email": " ALICE@X.COM", "status": "inactive"},
+        {"id": "2", "name": None, "mail": "Bob@X.com", "status": ""},
+    ])
+
+    assert failures == []
+    assert MAPPING.names == ("external_id", "name", "email", "status", "label")
+    assert rows == [
+        (1, "Alice", "alice@x.com", "inactive", " Alice #1"),
+        (2, "", "bob@x.com", "active", "None#2"),
+    ]
+
+
+def test_apply_drops_only_failing_records():
+    rows, failures = MAPPING.apply([
+        {"id": "1", "name": "a"},
+        {"id": "x", "name": "b"},
+        {"id": "3"},
+    ])
+
+    assert [row[0] for row in rows] == [1]
+    assert [position for position, _ in failures] == [1, 2]
+    assert isinstance(failures[0][1], ValueError)
+    assert isinstance(failures[1][1], KeyError)
+
+
+def test_apply_sequence_rows_with_header_index():
+    mapping = ColumnMapping([
+        Column("external_id", source=("ID", "id")),
+        Column("phone", source="Phone", default=""),
+        Column("amount", source="Amount", ops=("float",), default=0.0),
+    ])
+    index = {"ID": 0, "Amount": 1}
+
+    rows, failures = mapping.apply([("1", "2.5"), ("2", ""), ("3",)], index)
+
+    assert rows == [("1", "", 2.5), ("2", "", 0.0)]
+    assert [position for position, _ in failures] == [2]
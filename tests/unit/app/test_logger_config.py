@@ -0,0 +1,89 @@
+"""Tests for log rate limiting and JSON log formatting."""
+import json
+import logging
+
+from app.logger_config import JsonFormatter, RateLimitFilter, rate_limited
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def make_logger(name, log_filter):
+    handler = ListHandler()
+    handler.addFilter(log_filter)
+    log = logging.getLogger(f"test_logger_config.{name}")
+    log.handlers = [handler]
+    log.propagate = False
+    log.setLevel(logging.DEBUG)
+    return log, handler
+
+
+def test_rate_limit_drops_messages_per_key_and_reports_suppressed():
+    now = [0.0]
+    log, handler = make_logger("limit", RateLimitFilter(limit=2, window=60, clock=lambda: now[0]))
+
+    for n in range(5):
+        log.error("Error transforming record %s: %s", n, "bad", extra=rate_limited("transform"))
+        log.info("Chunk %d done", n)
+    now[0] = 61
+    log.error("Error transforming record %s: %s", 5, "bad", extra=rate_limited("transform"))
+
+    errors = [message for message in handler.messages if message.startswith("Error")]
+    assert errors == [
+        "Error transforming record 0: bad",
+        "Error transforming record 1: bad",
+        "Error transforming record 5: bad (3 similar messages suppressed)",
+    ]
+    assert len([message for message in handler.messages if message.startswith("Chunk")]) == 5
+
+
+def test_rate_limit_samples_and_summarizes():
+    log_filter = RateLimitFilter(limit=1, window=60, sample_every=3, clock=lambda: 0.0)
+    log, handler = make_logger("sample", log_filter)
+
+    for n in range(8):
+        log.warning("Retry %d", n, extra=rate_limited("retry"))
+    log_filter.summarize(log)
+    log_filter.summarize(log)
+
+    assert handler.messages == [
+        "Retry 0",
+        "Retry 3 (2 similar messages suppressed)",
+        "Retry 6 (2 similar messages suppressed)",
+        "Suppressed 1 'retry' log messages",
+    ]
+
+
+def test_rate_limit_counts_each_record_once_across_handlers():
+    log_filter = RateLimitFilter(limit=2, window=60, clock=lambda: 0.0)
+    log, console = make_logger("handlers", log_filter)
+    file = ListHandler()
+    file.addFilter(log_filter)
+    log.addHandler(file)
+
+    for n in range(4):
+        log.error("Failed %d", n, extra=rate_limited("failure"))
+
+    assert console.messages == file.messages == ["Failed 0", "Failed 1"]
+    # The JSON output does not include the filter's bookkeeping
+    record = logging.LogRecord("importer", logging.ERROR, "base.py", 10, "Failed", (), None)
+    record.rate_limit_key = "failure"
+    log_filter.filter(record)
+    assert "_rate_limit_decision" not in json.loads(JsonFormatter().format(record))
+
+
+def test_json_formatter_includes_extra_fields():
+    record = logging.LogRecord("importer", logging.ERROR, "base.py", 10, "Record %s failed", (7,), None)
+    record.rate_limit_key = "transform"
+
+    document = json.loads(JsonFormatter().format(record))
+
+    assert document["level"] == "ERROR"
+    assert document["message"] == "Record 7 failed"
+    assert document["rate_limit_key"] == "transform"
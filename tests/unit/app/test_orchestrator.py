@@ -0,0 +1,115 @@
+"""Tests for the importer registry, the orchestrator and the Lambda handler."""
+import threading
+import time
+
+import pytest
+
+from app import lambda_handler
+from app.local_runner import run_until_complete
+from app.services.orchestrator import ImportJob, Orchestrator, jobs_from_event
+from app.services.registry import get_importer
+from app.services.state_store import FileStateStore
+from tests.unit.app.importers import peak  # also registers "test_memory" and "test_resumable"
+
+
+def test_jobs_from_event():
+    jobs = jobs_from_event({"importers": ["test_memory", {"name": "acct_1", "importer": "test_memory"}]})
+
+    assert [(job.name, job.importer) for job in jobs] == [("test_memory", "test_memory"), ("acct_1", "test_memory")]
+    with pytest.raises(ValueError):
+        jobs_from_event({"importers": ["test_memory", "test_memory"]})
+    with pytest.raises(KeyError):
+        get_importer("missing")
+
+
+def test_scheduled_event_runs_only_the_configured_importers():
+    # EventBridge schedules send an empty event: registered importers are not all run
+    assert [job.name for job in jobs_from_event({})] == ["intaker"]
+
+
+def test_orchestrator_limits_concurrency_and_aggregates():
+    peak.clear()
+    jobs = [ImportJob(f"job_{i}", "test_memory", {"count": i + 1}) for i in range(5)]
+    jobs.append(ImportJob("broken", "test_memory", {"fail": True}))
+
+    result = Orchestrator(concurrency=2).run(jobs)
+
+    assert max(peak) <= 2
+    assert result["status"] == "partial"
+    assert list(result["results"]) == [job.name for job in jobs]
+    assert result["results"]["job_4"]["stats"]["saved"] == 5
+    assert result["results"]["broken"]["status"] == "partial"
+    assert result["summary"]["saved"] == 15
+    assert result["summary"]["success"] == 5
+
+
+def test_orchestrator_skips_jobs_without_time_left():
+    deadline = time.monotonic() + 0.15
+    remaining_ms = lambda: (deadline - time.monotonic()) * 1000
+    jobs = [ImportJob(f"job_{i}", "test_memory", {"sleep": 0.1}) for i in range(4)]
+
+    result = Orchestrator(concurrency=1, remaining_ms=remaining_ms, time_margin_ms=0).run(jobs)
+
+    statuses = [r["status"] for r in result["results"].values()]
+    assert statuses[0] == "success"
+    assert "skipped" in statuses
+
+
+def test_orchestrator_waits_for_importers_running_at_the_deadline():
+    deadline = time.monotonic() + 0.4
+    remaining_ms = lambda: (deadline - time.monotonic()) * 1000
+    jobs = [ImportJob("quick", "test_memory", {"sleep": 0.15}), ImportJob("stuck", "test_memory", {"sleep": 0.6})]
+
+    result = Orchestrator(concurrency=2, remaining_ms=remaining_ms, time_margin_ms=350, return_margin_ms=100).run(jobs)
+
+    # "quick" ran past the deadline but finished before the invocation ends
+    assert result["results"]["quick"]["status"] == "success"
+    assert result["results"]["stuck"]["status"] == "running"
+    # A second run must not start while "stuck" is still writing
+    assert result["continuation"] is None
+    for thread in threading.enumerate():
+        if thread.name.startswith("importer"):
+            thread.join()
+
+
+def test_lambda_handler_runs_selected_importers():
+    class Context:
+        def get_remaining_time_in_millis(self):
+            return 600000
+
+    response = lambda_handler.lambda_handler({"importers": [{"name": "a", "importer": "test_memory"}]}, Context())
+
+    assert response["statusCode"] == 200
+    assert response["body"]["result"]["results"]["a"]["status"] == "success"
+
+
+def test_orchestrator_returns_continuation_for_stopped_jobs(tmp_path):
+    store = FileStateStore(str(tmp_path / "state.json"))
+    # The stop margin exceeds the time left, so the importer stops after one chunk
+    config = {"mode": "streaming", "chunk_size": 2, "stop_margin": 3600, "state_store": store}
+    jobs = [ImportJob("resumable", "test_resumable", config), ImportJob("plain", "test_memory")]
+
+    result = Orchestrator(remaining_ms=lambda: 600000, time_margin_ms=0).run(jobs)
+
+    assert result["status"] == "incomplete"
+    assert result["results"]["resumable"]["status"] == "incomplete"
+    assert result["results"]["plain"]["status"] == "success"
+    [spec] = result["continuation"]
+    assert spec["name"] == "resumable"
+    assert spec["config"]["checkpoint"]["position"] == {"next": 2}
+    assert "deadline" not in spec["config"]
+
+
+def test_local_runner_follows_continuations(tmp_path):
+    store = FileStateStore(str(tmp_path / "state.json"))
+    config = {"mode": "streaming", "chunk_size": 2, "stop_margin": 3600, "state_store": store}
+    event = {"importers": [{"name": "resumable", "importer": "test_resumable", "config": config}]}
+
+    responses = run_until_complete(event, budget_s=60)
+
+    assert len(responses) == 4
+    assert responses[0]["body"]["continuation"]["importers"][0]["config"]["checkpoint"]["position"] == {"next": 2}
+    assert responses[-1]["body"]["continuation"] is None
+    saved = [r["body"]["result"]["results"]["resumable"]["stats"]["saved"] for r in responses]
+    assert saved == [2, 2, 1, 0]
+    assert store.get("checkpoint", "ResumableJobImporter") is None